@@ -6,7 +6,7 @@
 %global tests_version 2
 %global tests_tar test-data-copr-backend
 
-%global copr_common_version 0.13.1.dev
+%global copr_common_version 0.14.1.dev
 
 Name:       copr-backend
 Version:    1.155
@@ -47,6 +47,7 @@ BuildRequires: python3-filelock
 BuildRequires: python3-gobject
 BuildRequires: python3-httpretty
 BuildRequires: python3-humanize
+BuildRequires: python3-inotify_simple
 BuildRequires: python3-libmodulemd1 >= 1.7.0
 BuildRequires: python3-munch
 BuildRequires: python3-netaddr
@@ -85,6 +86,7 @@ Requires:   python3-fedmsg
 Requires:   python3-filelock
 Requires:   python3-gobject
 Requires:   python3-humanize
+Requires:   python3-inotify_simple
 Requires:   python3-jinja2
 Requires:   python3-libmodulemd1 >= 1.7.0
 Requires:   python3-munch
@@ -203,6 +205,7 @@ useradd -r -g copr -G lighttpd -s /bin/bash -c "COPR user" copr
 %systemd_postun_with_restart copr-backend-log.service
 %systemd_postun_with_restart copr-backend-build.service
 %systemd_postun_with_restart copr-backend-action.service
+%systemd_postun_with_restart copr-backend-msgbus.service
 
 %files
 %license LICENSE
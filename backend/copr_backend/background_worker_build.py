@@ -5,12 +5,13 @@ BuildBackgroundWorker class + internals.
 import glob
 import logging
 import os
-import pipes
 import shutil
 import statistics
 import time
 import json
 
+from concurrent.futures import ThreadPoolExecutor
+
 from packaging import version
 
 from copr_common.enums import StatusEnum
@@ -19,8 +20,12 @@ from copr_backend.background_worker import BackgroundWorker
 from copr_backend.cancellable_thread import CancellableThreadTask
 from copr_backend.constants import build_log_format
 from copr_backend.exceptions import CoprSignError, CoprBackendError
+from copr_backend.fake_builder import (
+    FakeBuilderConnection, FakeBuilderHostFactory,
+)
 from copr_backend.helpers import (
-    call_copr_repo, pkg_name_evr, run_cmd, register_build_result,
+    call_copr_repo, gzip_file, pkg_name_evr,
+    register_build_result, PathWatcher,
 )
 from copr_backend.job import BuildJob
 from copr_backend.msgbus import MessageSender
@@ -309,17 +314,21 @@ class BuildBackgroundWorker(BackgroundWorker):
 
         repodata = os.path.join(self.job.chroot_dir, "repodata/repomd.xml")
         waiting_since = time.time()
-        while time.time() - waiting_since < 60:
-            if os.path.exists(repodata):
-                return
-
-            # Either (a) the very first copr-repo run in this chroot dir
-            # is still running on background (or failed), or (b) we are
-            # hitting the race condition between
-            # 'rm -rf repodata && mv .repodata repodata' sequence that
-            # is done in createrepo_c.  Try again after some time.
-            self.log.info(MESSAGES["repo_waiting"])
-            time.sleep(2)
+        with PathWatcher(repodata) as watcher:
+            # Either (a) the very first copr-repo run in this chroot dir is
+            # still running on background (or failed), or (b) we are hitting
+            # the race condition between 'rm -rf repodata && mv .repodata
+            # repodata' sequence that is done in createrepo_c.  Wait till the
+            # repodata directory appears (or at most 2s), and try again.
+            if not os.path.exists(repodata):
+                self.log.info(MESSAGES["repo_waiting"])
+
+            while time.time() - waiting_since < self.opts.repo_wait_timeout:
+                if os.path.exists(repodata):
+                    return
+
+                self._cancel_if_requested()
+                watcher.wait(2)
 
         # This should never happen, but if yes - we need to debug
         # properly.  Give up waiting, and fail the build.  That should
@@ -390,7 +399,11 @@ class BuildBackgroundWorker(BackgroundWorker):
         """
         self.log.info("Trying to allocate VM")
 
-        vm_factory = ResallocHostFactory(server=self.opts.resalloc_connection)
+        if self.opts.fake_builder.enabled:
+            vm_factory = FakeBuilderHostFactory()
+        else:
+            vm_factory = ResallocHostFactory(
+                server=self.opts.resalloc_connection)
         while True:
             self.host = vm_factory.get_host(self.job.tags, self.job.sandbox)
             self._proctitle("Waiting for VM, info: {}".format(self.host.info))
@@ -411,6 +424,11 @@ class BuildBackgroundWorker(BackgroundWorker):
 
     def _alloc_ssh_connection(self):
         self.log.info("Allocating ssh connection to builder")
+        if self.opts.fake_builder.enabled:
+            self.ssh = FakeBuilderConnection(self.opts.fake_builder,
+                                             host=self.host.hostname,
+                                             log=self.log)
+            return
         self.ssh = SSHConnection(
             user=self.opts.build_user,
             host=self.host.hostname,
@@ -508,8 +526,8 @@ class BuildBackgroundWorker(BackgroundWorker):
 
     def _compress_live_logs(self):
         """
-        Compress builder-live.log and backend.log by gzip.
-        Never raise any exception!
+        Compress builder-live.log and backend.log by gzip, in-process and in
+        parallel.  Never raise any exception!
         """
         logs = [
             self.job.builder_log,
@@ -542,20 +560,41 @@ class BuildBackgroundWorker(BackgroundWorker):
         #     RewriteRule ^(.*)$ %{REQUEST_URI}.gz [R]
         #     </FilesMatch>
 
+        to_compress = []
         for src in logs:
             dest = src + ".gz"
             if os.path.exists(dest):
-                # This shouldn't ever happen, but if it happened - gzip below
-                # would interactively ask whether we want to overwrite the
-                # existing file, and it would deadlock the worker.
+                # This shouldn't ever happen, but if it happened - we would
+                # overwrite the existing file.  Rather keep both.
                 self.log.error("Compressed log %s exists", dest)
                 continue
+            to_compress.append(src)
 
-            self.log.info("Compressing %s by gzip", src)
-            res = run_cmd(["gzip", src])
-            if res.returncode not in [0, 2]:
-                self.log.error("Unable to compress file %s: %s",
-                               src, res.stderr)
+        if not to_compress:
+            return
+
+        # Compress the logs in parallel, zlib releases GIL.
+        self.log.info("Compressing %s by gzip", ", ".join(to_compress))
+        start = time.time()
+        took = []
+        with ThreadPoolExecutor(max_workers=len(to_compress)) as executor:
+            futures = {
+                executor.submit(gzip_file, src,
+                                self.opts.log_compression_level): src
+                for src in to_compress
+            }
+            for future, src in futures.items():
+                try:
+                    took.append(future.result())
+                except OSError as err:
+                    self.log.error("Unable to compress file %s: %s",
+                                   src, err.strerror)
+                except Exception:  # pylint: disable=broad-except
+                    self.log.exception("Unable to compress file %s", src)
+
+        elapsed = time.time() - start
+        self.log.info("Logs compressed in %.2fs (%.2fs saved by parallel "
+                      "compression)", elapsed, max(0, sum(took) - elapsed))
 
     def _download_results(self):
         """
@@ -638,22 +677,22 @@ class BuildBackgroundWorker(BackgroundWorker):
         return build_details
 
     def _collect_built_packages(self, job):
+        """
+        Return the "NAME VERSION" lines for the built binary packages.  The
+        data are taken from job.results (see _parse_results()) so we don't
+        have to query the RPM files again.
+        """
         self.log.info("Listing built binary packages in %s",
                       job.results_dir)
 
-        cmd = (
-            "builtin cd {0} && "
-            "for f in `ls *.rpm | grep -v \"src.rpm$\"`; do"
-            "   rpm -qp --qf \"%{{NAME}} %{{VERSION}}\n\" $f; "
-            "done".format(pipes.quote(job.results_dir))
-        )
-
-        result = run_cmd(cmd, shell=True)
-        built_packages = result.stdout.strip()
+        built_packages = "\n".join(sorted(
+            "{} {}".format(package["name"], package["version"])
+            for package in job.results.get("packages", [])
+            if package["arch"] != "src"
+        ))
         self.log.info("Built packages:\n%s", built_packages)
         return built_packages
 
-
     def _get_build_details(self, job):
         """
         :return: dict with build_details
@@ -36,6 +36,7 @@ class BuildStatus(object):
 
 
 LOG_REDIS_FIFO = "copr:backend:log:fifo::"
+MSGBUS_OUTBOX_STREAM = "copr:backend:msgbus:outbox::"
 
 default_log_format = Formatter(
     '[%(asctime)s][%(levelname)6s][PID:%(process)d][%(name)10s][%(filename)s:%(funcName)s:%(lineno)d] %(message)s')
@@ -9,8 +9,9 @@ from copr_backend.rpm_builds import (
     RPMBuildWorkerManager,
     BuildQueueTask,
 )
-from copr_backend.worker_manager import GroupWorkerLimit
+from copr_backend.worker_manager import GroupWorkerLimit, TaskLeases
 from ..exceptions import FrontendClientException
+from ..helpers import get_redis_connection
 
 
 class _PriorityCounter:
@@ -75,6 +76,12 @@ class _PriorityCounter:
 class BuildDispatcher(Dispatcher):
     """
     Kick-off build dispatcher daemon.
+
+    When the [sharding] section is configured in copr-be.conf, the dispatcher
+    only asks Frontend for the tasks of the configured architectures, and it
+    claims a lease (in Redis shared by all the backend hosts) for each task
+    before starting the worker.  So multiple backend hosts (with shared results
+    storage) can process the same build queue, and no task is started twice.
     """
     task_type = 'build'
     worker_manager_class = RPMBuildWorkerManager
@@ -99,12 +106,37 @@ class BuildDispatcher(Dispatcher):
                 name=limit_type,
             ))
 
+        if backend_opts.shard_name:
+            self.log.info("shard %s, arches: %s, source builds: %s",
+                          backend_opts.shard_name,
+                          ", ".join(backend_opts.shard_arches) or "all",
+                          backend_opts.shard_srpm_builds)
+            self.leases = TaskLeases(
+                get_redis_connection(backend_opts.leases),
+                owner=backend_opts.shard_name,
+                prefix=self.task_type,
+                timeout=backend_opts.leases.timeout,
+            )
+
+    @property
+    def pending_jobs_params(self):
+        """
+        Query arguments for the /backend/pending-jobs/ Frontend route.
+        """
+        params = {}
+        if self.opts.shard_arches:
+            params["arch"] = self.opts.shard_arches
+        if not self.opts.shard_srpm_builds:
+            params["srpm"] = 0
+        return params
+
     def get_frontend_tasks(self):
         """
         Retrieve a list of build jobs to be done.
         """
         try:
-            raw_tasks = self.frontend_client.get('pending-jobs').json()
+            raw_tasks = self.frontend_client.get(
+                'pending-jobs', params=self.pending_jobs_params).json()
         except (FrontendClientException, ValueError) as error:
             self.log.exception("Retrieving build jobs from %s failed with error: %s",
                                self.opts.frontend_base_url, error)
@@ -0,0 +1,107 @@
+"""
+MessageBusPublisher daemon, sending the messages queued in MessageOutbox.
+"""
+
+import time
+
+from setproctitle import setproctitle
+
+from copr_backend.helpers import get_redis_connection, get_redis_logger
+from copr_backend.msgbus import MessageOutbox, create_msg_buses
+
+
+class MessageBusPublisher:
+    """
+    Single process which keeps persistent connections to all the configured
+    message buses, and sends the messages queued by build workers (see
+    MessageOutbox) in batches.  When a bus is not available, we re-try with
+    exponential backoff (the messages for other buses are sent meanwhile, and
+    the builds are not blocked at all).
+    """
+
+    batch_size = 100
+    max_backoff = 300
+
+    def __init__(self, opts, log=None):
+        self.opts = opts
+        self.log = log or get_redis_logger(opts, "backend.msgbus", "msgbus")
+        self.redis = get_redis_connection(opts)
+        self.buses = create_msg_buses(opts, self.log)
+        self.outbox = MessageOutbox(self.redis,
+                                    [bus.opts.bus_id for bus in self.buses])
+        self._failures = {}
+        self._next_attempt = {}
+
+    def _ready(self, bus):
+        return self._next_attempt.get(bus.opts.bus_id, 0) <= time.time()
+
+    def _backoff(self, bus):
+        bus_id = bus.opts.bus_id
+        self._failures[bus_id] = self._failures.get(bus_id, 0) + 1
+        delay = min(self.max_backoff, 2 ** self._failures[bus_id])
+        self._next_attempt[bus_id] = time.time() + delay
+        self.log.warning("Publishing to %s failed, re-trying in %ss",
+                         bus.info, delay)
+
+    def publish_batch(self, bus):
+        """
+        Send one batch of pending messages to the ``bus``.  Return the number
+        of processed messages.
+        """
+        bus_id = bus.opts.bus_id
+        processed = []
+        try:
+            for entry_id, data in self.outbox.pending(bus_id, self.batch_size):
+                message = self.outbox.to_message(bus, data)
+                try:
+                    message.validate()
+                except Exception:  # pylint: disable=broad-except
+                    self.log.exception("Dropping invalid message %s", data)
+                    processed.append(entry_id)
+                    continue
+
+                try:
+                    bus.publish(message)
+                except Exception:  # pylint: disable=broad-except
+                    self.log.exception("Failed to publish %s message",
+                                       data["topic"])
+                    self._backoff(bus)
+                    break
+
+                processed.append(entry_id)
+                self._failures.pop(bus_id, None)
+        finally:
+            self.outbox.remove(bus_id, processed)
+        return len(processed)
+
+    def publish_pending(self):
+        """
+        Send the pending messages to all the available buses.  Return the
+        number of processed messages.
+        """
+        processed = 0
+        for bus in self.buses:
+            if self._ready(bus):
+                processed += self.publish_batch(bus)
+        return processed
+
+    def wait_for_messages(self, timeout=1):
+        """
+        Block till there are some messages for the available buses, at most
+        ``timeout`` seconds.
+        """
+        streams = {self.outbox.stream(bus.opts.bus_id): 0
+                   for bus in self.buses if self._ready(bus)}
+        if not streams:
+            time.sleep(timeout)
+            return
+        self.redis.xread(streams, count=1, block=int(timeout * 1000))
+
+    def run(self):
+        """ Send the messages, indefinitely """
+        setproctitle("MessageBusPublisher")
+        self.log.info("Publishing messages to: %s",
+                      ", ".join(bus.info for bus in self.buses))
+        while True:
+            if not self.publish_pending():
+                self.wait_for_messages()
@@ -33,6 +33,10 @@ class Dispatcher(multiprocessing.Process):
     # there's no limit
     max_workers = float("inf")
 
+    # optional TaskLeases instance, set when tasks are shared with dispatchers
+    # running on other hosts
+    leases = None
+
     # we keep track what build's newly appeared in the task list after fetching
     # the new set from frontend after get_frontend_tasks() call
     _previous_task_fetch_ids = set()
@@ -97,6 +101,7 @@ class Dispatcher(multiprocessing.Process):
             max_workers=self.max_workers,
             frontend_client=self.frontend_client,
             limits=self.limits,
+            leases=self.leases,
         )
 
         timeout = self.sleeptime
@@ -0,0 +1,192 @@
+"""
+Fake builder, for benchmarking the backend without any real VMs.
+
+Instead of allocating resalloc tickets and running copr-rpmbuild over SSH, the
+build worker may use the local FakeBuilderHostFactory and FakeBuilderConnection
+classes (see the [fake_builder] section in copr-be.conf).  The fake builder
+simulates the copr-rpmbuild commands; it waits for the configured build
+duration while "streaming" the configured number of log lines, and generates
+tiny (but valid) RPM files with payload of the configured size by local
+rpmbuild.  So the whole dispatch -> build -> download -> sign -> createrepo
+pipeline can be benchmarked on a single machine.  The per-build backend
+overhead is then the worker run time minus the ``build_duration``.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from copr_backend.sshcmd import SSHConnection
+from copr_backend.vm_alloc import HostFactory, RemoteHost
+
+# Anything higher than the MIN_BUILDER_VERSION of the build worker.
+FAKE_BUILDER_VERSION = "999"
+
+FAKE_SPEC = """\
+Name: {name}
+Version: 1.0
+Release: 1
+Summary: Fake package built by the Copr fake builder
+License: MIT
+BuildArch: noarch
+
+%description
+Fake package built by the Copr fake builder, build {build_id}.
+
+%install
+mkdir -p %{{buildroot}}/usr/share/{name}
+head -c {payload_size} /dev/urandom > %{{buildroot}}/usr/share/{name}/payload
+
+%files
+/usr/share/{name}
+"""
+
+LOG_LINE = "fake builder log line {:08d} " + 64 * "." + "\n"
+
+
+class FakeBuilderHost(RemoteHost):
+    """
+    Immediately ready host, no allocation is needed.
+    """
+    def __init__(self, hostname):
+        self.hostname = hostname
+
+    def check_ready(self):
+        return True
+
+    def release(self):
+        pass
+
+    @property
+    def info(self):
+        return "FakeBuilderHost, hostname={}".format(self.hostname)
+
+
+class FakeBuilderHostFactory(HostFactory):
+    """
+    Provide FakeBuilderHost instances.
+    """
+    counter = 0
+
+    def get_host(self, tags=None, sandbox=None):
+        FakeBuilderHostFactory.counter += 1
+        return FakeBuilderHost("fake-builder-{}-{}".format(
+            os.getpid(), self.counter))
+
+
+class FakeBuilderConnection(SSHConnection):
+    """
+    Simulate the copr-rpmbuild commands (executed by BuildBackgroundWorker)
+    locally, instead of running them over SSH.
+
+    :param opts: The ``opts.fake_builder`` part of the backend configuration.
+    """
+    def __init__(self, opts, host=None, log=None):
+        super().__init__(host=host, log=log)
+        self.opts = opts
+        self.resultdir = None
+        self.started = None
+        self.canceled = threading.Event()
+
+    def _start_build(self, command):
+        """
+        Simulate 'copr-rpmbuild --detached', generate the results right away.
+        """
+        build_id = int(re.search(r"--build-id (\d+)", command).group(1))
+        srpm = "--srpm" in command
+
+        self.started = time.time()
+        self.resultdir = tempfile.mkdtemp(prefix="copr-fake-builder-")
+        try:
+            self._generate_rpms(build_id, srpm)
+        except (OSError, subprocess.CalledProcessError) as err:
+            return 1, "", "Can't generate fake RPMs: {}\n".format(err)
+        return 0, "{}\n".format(os.getpid()), ""
+
+    def _generate_rpms(self, build_id, srpm):
+        name = "copr-fake-{}".format(build_id)
+        topdir = os.path.join(self.resultdir, ".rpmbuild")
+        specfile = os.path.join(topdir, name + ".spec")
+        os.makedirs(topdir)
+        with open(specfile, "w") as fd:
+            fd.write(FAKE_SPEC.format(name=name, build_id=build_id,
+                                      payload_size=self.opts.result_size))
+
+        subprocess.run([
+            "rpmbuild", "-bs" if srpm else "-ba", specfile,
+            "--define", "_topdir " + topdir,
+            "--define", "_rpmdir " + self.resultdir,
+            "--define", "_srcrpmdir " + self.resultdir,
+            "--define", "_build_name_fmt "
+                        "%%{NAME}-%%{VERSION}-%%{RELEASE}.%%{ARCH}.rpm",
+        ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(topdir)
+
+        if not srpm:
+            # what copr-rpmbuild would generate, see FAKE_SPEC
+            results = {"packages": [
+                {"name": name, "epoch": 0, "version": "1.0", "release": "1",
+                 "arch": arch}
+                for arch in ["src", "noarch"]
+            ]}
+            with open(os.path.join(self.resultdir, "results.json"), "w") as fd:
+                json.dump(results, fd)
+
+        with open(os.path.join(self.resultdir, "success"), "w") as fd:
+            fd.write("done\n")
+
+    def _tail_log(self, stdout):
+        """
+        Simulate 'copr-rpmbuild-log', write the log lines evenly till the
+        build duration is over (or till the build is canceled).
+        """
+        duration = self.opts.build_duration
+        written = 0
+        while True:
+            elapsed = time.time() - self.started
+            progress = min(1, elapsed / duration) if duration > 0 else 1
+            target = int(self.opts.log_lines * progress)
+            stdout.writelines(LOG_LINE.format(line)
+                              for line in range(written, target))
+            stdout.flush()
+            written = target
+            if progress >= 1 or self.canceled.wait(0.1):
+                return 0
+
+    def _cancel_build(self):
+        self.canceled.set()
+        if self.resultdir:
+            shutil.rmtree(self.resultdir, ignore_errors=True)
+        return 0, "", ""
+
+    def run(self, user_command, stdout=None, stderr=None, max_retries=0):
+        if user_command == "copr-rpmbuild-log":
+            with open(os.devnull, "w") as devnull:
+                return self._tail_log(stdout or devnull)
+        return self.run_expensive(user_command, max_retries)[0]
+
+    def run_expensive(self, user_command, max_retries=0):
+        if user_command.startswith("rpm -q copr-rpmbuild"):
+            return 0, FAKE_BUILDER_VERSION + "\n", ""
+        if user_command.startswith("/usr/bin/test -f /etc/mock/"):
+            return 0, "", ""
+        if user_command.startswith("copr-rpmbuild "):
+            return self._start_build(user_command)
+        if user_command == "copr-rpmbuild-cancel":
+            return self._cancel_build()
+        self.log.error("Fake builder can not run '%s'", user_command)
+        return 1, "", "unknown command\n"
+
+    def rsync_download(self, src, dest, logfile=None, max_retries=0):
+        self.log.info("Copying fake builder results %s to %s",
+                      self.resultdir, dest)
+        shutil.copytree(self.resultdir, dest, dirs_exist_ok=True)
+        shutil.rmtree(self.resultdir)
+        if logfile:
+            with open(os.path.join(dest, logfile), "w") as fd:
+                fd.write("results copied from {}\n".format(self.resultdir))
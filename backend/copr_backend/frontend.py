@@ -26,6 +26,9 @@ class FrontendClient:
         self.msg = None
         self.logger = logger
 
+        # {(url_path, params): response}, the last GET responses with ETag
+        self._etag_cache = {}
+
     @property
     def log(self):
         'return configured logger object, or no-op logger'
@@ -34,9 +37,28 @@ class FrontendClient:
             self.logger.addHandler(logging.NullHandler())
         return self.logger
 
-    def get(self, url_path):
-        'Issue relentless GET request to Frontend'
-        return self.send(url_path, method='get')
+    def get(self, url_path, params=None):
+        """
+        Issue relentless GET request to Frontend.  If the previous response to
+        the same request had an ETag, ask Frontend only for a new data (and
+        re-use the previous response if nothing changed).
+        """
+        key = (url_path, repr(sorted((params or {}).items())))
+        cached = self._etag_cache.get(key)
+        headers = None
+        if cached is not None:
+            headers = {"If-None-Match": cached.headers["ETag"]}
+
+        response = self.send(url_path, method='get', params=params,
+                             headers=headers)
+        if response.status_code == 304 and cached is not None:
+            return cached
+
+        if "ETag" in response.headers:
+            self._etag_cache[key] = response
+        else:
+            self._etag_cache.pop(key, None)
+        return response
 
     def post(self, url_path, data):
         'Issue relentless POST request to Frontend'
@@ -46,10 +68,13 @@ class FrontendClient:
         'Issue relentless POST request to Frontend'
         return self.send(url_path, data=data, method='put')
 
-    def send(self, url_path, method='post', data=None, authenticate=True):
+    def send(self, url_path, method='post', data=None, authenticate=True,
+             params=None, headers=None):
         """ Repeat the request until it succeeds.  """
+        # pylint: disable=too-many-arguments
         while True:
-            response = self._send_attempt(url_path, method, data, authenticate)
+            response = self._send_attempt(url_path, method, data, authenticate,
+                                          params, headers)
             fe_be_api_version = response.headers.get("Copr-FE-BE-API-Version", 0)
             if int(fe_be_api_version) >= MIN_FE_BE_API:
                 return response
@@ -60,17 +85,25 @@ class FrontendClient:
                 continue
             raise FrontendClientException(msg % (fe_be_api_version, MIN_FE_BE_API))
 
-    def _send_attempt(self, url_path, method='post', data=None, authenticate=True):
+    def _send_attempt(self, url_path, method='post', data=None, authenticate=True,
+                      params=None, headers=None):
         # """
         # Repeat the request until it succeeds, or timeout is reached.
         # """
+        # pylint: disable=too-many-arguments
         url = "{}/{}/".format(self.frontend_url, url_path)
         auth = self.frontend_auth if authenticate else None
 
+        kwargs = {}
+        if params:
+            kwargs["params"] = params
+        if headers:
+            kwargs["headers"] = headers
+
         try:
             request = SafeRequest(auth=auth, log=self.log,
                                   try_indefinitely=self.try_indefinitely)
-            response = request.send(url, method=method, data=data)
+            response = request.send(url, method=method, data=data, **kwargs)
             return response
         except RequestError as ex:
             raise FrontendClientException from ex
@@ -8,7 +8,9 @@ import errno
 import time
 import types
 import glob
+import gzip
 import pipes
+import shutil
 
 import configparser
 from configparser import ConfigParser
@@ -31,16 +33,24 @@ from munch import Munch
 from redis import StrictRedis
 
 from copr.v3 import Client
+
 from copr_backend.constants import DEF_BUILD_USER, DEF_BUILD_TIMEOUT, DEF_CONSECUTIVE_FAILURE_THRESHOLD, \
     CONSECUTIVE_FAILURE_REDIS_KEY, default_log_format
 from copr_backend.exceptions import CoprBackendError, CoprBackendSrpmError
 
 from . import constants
 
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    # inotify_simple is optional, we fallback to polling
+    INotify = None
+
 
 LOG_COMPONENTS = [
     "spawner", "terminator", "vmm", "build_dispatcher", "action_dispatcher",
     "backend", "actions", "worker", "modifyrepo", "pruner", "analyze-results",
+    "msgbus",
 ]
 
 
@@ -396,14 +406,62 @@ class BackendConfigReader(object):
         opts.aws_cloudfront_distribution = _get_conf(
             cp, "backend", "aws_cloudfront_distribution", None)
 
+        opts.log_compression_level = _get_conf(
+            cp, "backend", "log_compression_level", 6, mode="int")
+        if not 0 <= opts.log_compression_level <= 9:
+            raise CoprBackendError(
+                "log_compression_level must be in range 0-9, got {}".format(
+                    opts.log_compression_level))
+
+        opts.repo_wait_timeout = _get_conf(
+            cp, "backend", "repo_wait_timeout", 60, mode="int")
+
         # ssh options
         opts.ssh = Munch()
         opts.ssh.builder_config = _get_conf(
             cp, "ssh", "builder_config", "/home/copr/.ssh/builder_config")
 
+        # fake builder options, see copr_backend.fake_builder
+        opts.fake_builder = Munch()
+        opts.fake_builder.enabled = _get_conf(
+            cp, "fake_builder", "enabled", False, mode="bool")
+        opts.fake_builder.build_duration = _get_conf(
+            cp, "fake_builder", "build_duration", 10, mode="float")
+        opts.fake_builder.log_lines = _get_conf(
+            cp, "fake_builder", "log_lines", 1000, mode="int")
+        opts.fake_builder.result_size = _get_conf(
+            cp, "fake_builder", "result_size", 1024, mode="int")
+
         opts.msg_buses = []
-        for bus_config in glob.glob('/etc/copr/msgbuses/*.conf'):
-            opts.msg_buses.append(pyconffile(bus_config))
+        for bus_config in sorted(glob.glob('/etc/copr/msgbuses/*.conf')):
+            bus_opts = pyconffile(bus_config)
+            if not hasattr(bus_opts, "bus_id"):
+                # unique per bus, the msgbus outbox has one stream per bus_id
+                bus_opts.bus_id = os.path.splitext(
+                    os.path.basename(bus_config))[0]
+            opts.msg_buses.append(bus_opts)
+
+        opts.msgbus_outbox = _get_conf(
+            cp, "backend", "msgbus_outbox", False, mode="bool")
+
+        # build dispatcher sharding, see BuildDispatcher
+        opts.shard_name = _get_conf(cp, "sharding", "name", None)
+        opts.shard_arches = [
+            arch.strip() for arch in
+            _get_conf(cp, "sharding", "arches", "").split(",")
+            if arch.strip()
+        ]
+        opts.shard_srpm_builds = _get_conf(
+            cp, "sharding", "srpm_builds", True, mode="bool")
+        opts.leases = Munch()
+        opts.leases.redis_host = _get_conf(
+            cp, "sharding", "leases_redis_host", opts.redis_host)
+        opts.leases.redis_port = _get_conf(
+            cp, "sharding", "leases_redis_port", opts.redis_port)
+        opts.leases.redis_db = _get_conf(
+            cp, "sharding", "leases_redis_db", opts.redis_db)
+        opts.leases.timeout = _get_conf(
+            cp, "sharding", "lease_timeout", 600, mode="int")
 
         # thoughts for later
         # ssh key for connecting to builders?
@@ -687,6 +745,75 @@ def pkg_name_evr(srpm_path):
     return name, evr
 
 
+def gzip_file(src, level=6):
+    """
+    Compress the ``src`` file in-process to ``src.gz`` and remove ``src``,
+    similarly to what the 'gzip' utility does.  Return the number of seconds
+    the compression took.
+    """
+    start = time.time()
+    dest = src + ".gz"
+    with open(src, "rb") as src_fd:
+        with gzip.open(dest, "wb", compresslevel=level) as dest_fd:
+            shutil.copyfileobj(src_fd, dest_fd, 1024*1024)
+    shutil.copystat(src, dest)
+    os.unlink(src)
+    return time.time() - start
+
+
+class PathWatcher:
+    """
+    Wait for the ``path`` to appear on the filesystem.  When inotify is
+    available, the existing parent directories of ``path`` are watched, so
+    the wait() method returns right after something is created (or moved)
+    there.  Otherwise wait() just sleeps.
+    """
+    mask = 0
+    if INotify:
+        mask = (inotify_flags.CREATE | inotify_flags.MOVED_TO
+                | inotify_flags.CLOSE_WRITE)
+
+    def __init__(self, path, depth=2):
+        self.path = path
+        self.depth = depth
+        self.inotify = INotify() if INotify else None
+
+    def _add_watches(self):
+        directory = self.path
+        for _ in range(self.depth):
+            directory = os.path.dirname(directory)
+            try:
+                # Adding the same directory twice is a no-op.
+                self.inotify.add_watch(directory, self.mask)
+            except OSError:
+                # the directory doesn't exist (yet)
+                pass
+
+    def wait(self, timeout):
+        """
+        Wait at most ``timeout`` seconds for a change in the watched
+        directories.  The caller should re-check the ``path`` existence.
+        """
+        if not self.inotify:
+            time.sleep(timeout)
+            return
+        # re-try, the parent directories could be created in the meantime
+        self._add_watches()
+        self.inotify.read(timeout=int(timeout * 1000))
+
+    def close(self):
+        """ Release the inotify file descriptor """
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+
 def format_filename(name, version, release, epoch, arch, zero_epoch=False):
     if not epoch.isdigit() and zero_epoch:
         epoch = "0"
@@ -7,9 +7,13 @@ import logging
 import copy
 import json
 
+from munch import Munch
+
 from copr_messaging import schema
 
-from .constants import BuildStatus
+from .constants import BuildStatus, MSGBUS_OUTBOX_STREAM
+from .exceptions import CoprBackendError
+from .helpers import get_redis_connection
 
 try:
     import fedmsg
@@ -174,12 +178,19 @@ class MsgBus(object):
 
         for attempt in range(1, self.opts.bus_publish_retries + 1):
             try:
-                self._send_message(message)
+                self.publish(message)
                 break
             except Exception: # pylint: disable=W0703
                 # We don't want to halt the worker because of messaging.
                 self.log.exception("Attempt %s to publish a message failed", attempt)
 
+    def publish(self, message):
+        """
+        Send the already validated message, without re-trying.  Exceptions
+        are propagated to the caller.
+        """
+        self._send_message(message)
+
     def announce_job(self, msg_type, job, who, ip, pid):
         """
         Compat thing to be removed;  future types of messages (v2+) should be
@@ -333,29 +344,138 @@ class MsgBusFedoraMessaging(MsgBus):
         fm_api.publish(message)
 
 
+def _bus_id(bus_config):
+    bus_classes = {
+        "stomp": MsgBusStomp,
+        "fedora-messaging": MsgBusFedoraMessaging,
+    }
+    return getattr(bus_config, "bus_id",
+                   bus_classes[bus_config.bus_type].__name__)
+
+
+def get_msg_bus_ids(backend_opts):
+    """
+    Return the list of IDs of all the configured buses, without connecting
+    to them.
+    """
+    bus_ids = [_bus_id(bus_config) for bus_config in backend_opts.msg_buses
+               if bus_config.bus_type in ["stomp", "fedora-messaging"]]
+    if backend_opts.fedmsg_enabled:
+        bus_ids.append(MsgBusFedmsg.__name__)
+    return bus_ids
+
+
+def create_msg_buses(backend_opts, log):
+    """
+    Instantiate (and connect) all the configured message buses.
+    """
+    msg_buses = []
+    for bus_config in backend_opts.msg_buses:
+        if bus_config.bus_type == 'stomp':
+            msg_buses.append(MsgBusStomp(bus_config, log))
+        elif bus_config.bus_type == 'fedora-messaging':
+            msg_buses.append(MsgBusFedoraMessaging(bus_config, log))
+
+    if backend_opts.fedmsg_enabled:
+        msg_buses.append(MsgBusFedmsg(log))
+    return msg_buses
+
+
+class MessageOutbox:
+    """
+    Durable queue of not yet sent messages, one Redis stream per configured
+    message bus.  Build workers only add messages here, and the
+    copr-backend-msgbus daemon (MessageBusPublisher) sends them.
+    """
+
+    # the BuildJob attributes needed by message_from_worker_job()
+    job_fields = ["submitter", "project_name", "project_owner",
+                  "package_name", "build_id", "chroot", "package_version",
+                  "status"]
+
+    def __init__(self, redis, bus_ids):
+        duplicate = {bus_id for bus_id in bus_ids if bus_ids.count(bus_id) > 1}
+        if duplicate:
+            # the buses would remove each other's messages from the stream
+            raise CoprBackendError(
+                "Message buses need unique bus_id, duplicate: {}".format(
+                    ", ".join(sorted(duplicate))))
+        self.redis = redis
+        self.bus_ids = bus_ids
+
+    @staticmethod
+    def stream(bus_id):
+        """ Redis stream name for the given bus """
+        return MSGBUS_OUTBOX_STREAM + bus_id
+
+    def add(self, topic, job, who, ip, pid):
+        """ Queue the message for all the buses """
+        # pylint: disable=too-many-arguments
+        data = json.dumps({
+            "topic": topic,
+            # missing fields stay missing, they are '(undefined)' in messages
+            "job": {field: getattr(job, field) for field in self.job_fields
+                    if hasattr(job, field)},
+            "who": who,
+            "ip": ip,
+            "pid": pid,
+        })
+        for bus_id in self.bus_ids:
+            self.redis.xadd(self.stream(bus_id), {"message": data})
+
+    def pending(self, bus_id, count):
+        """
+        Return at most ``count`` oldest not-yet-sent messages for ``bus_id``,
+        as a list of (entry_id, message_dict) pairs.
+        """
+        entries = self.redis.xrange(self.stream(bus_id), count=count)
+        return [(entry_id, json.loads(fields["message"]))
+                for entry_id, fields in entries]
+
+    def remove(self, bus_id, entry_ids):
+        """ Drop the already processed messages """
+        if entry_ids:
+            self.redis.xdel(self.stream(bus_id), *entry_ids)
+
+    @staticmethod
+    def to_message(bus, data):
+        """
+        Convert the ``data`` returned by pending() to the message object for
+        the given ``bus``.
+        """
+        return message_from_worker_job(bus.style, data["topic"],
+                                       Munch(data["job"]), data["who"],
+                                       data["ip"], data["pid"])
+
+
 class MessageSender:
     """
-    Automatically send messages to all configured buses.
+    Automatically send messages to all configured buses, or queue them into
+    the MessageOutbox (if msgbus_outbox is enabled in copr-be.conf).
     """
     def __init__(self, backend_opts, name, log):
         self.log = log
         self.name = name
+        self.outbox = None
+        self.msg_buses = []
 
-        msg_buses = []
-        for bus_config in backend_opts.msg_buses:
-            if bus_config.bus_type == 'stomp':
-                msg_buses.append(MsgBusStomp(bus_config, log))
-            elif bus_config.bus_type == 'fedora-messaging':
-                msg_buses.append(MsgBusFedoraMessaging(bus_config, log))
+        if backend_opts.msgbus_outbox:
+            self.outbox = MessageOutbox(get_redis_connection(backend_opts),
+                                        get_msg_bus_ids(backend_opts))
+        else:
+            self.msg_buses = create_msg_buses(backend_opts, log)
 
-        if backend_opts.fedmsg_enabled:
-            msg_buses.append(MsgBusFedmsg(log))
-
-        self.msg_buses = msg_buses
         self.pid = os.getpid()
 
     def announce(self, topic, job, host):
         """ Send message to all configured buses """
+        if self.outbox:
+            if self.outbox.bus_ids:
+                self.log.info("Queueing %s message to outbox", topic)
+                self.outbox.add(topic, job, who=self.name, ip=host,
+                                pid=self.pid)
+            return
+
         for bus in self.msg_buses:
             self.log.info("Sending %s message in %s", bus.info, topic)
             bus.announce_job(
@@ -3,6 +3,7 @@ Allocate VMs
 """
 
 import time
+from threading import Event, Thread
 from resalloc.client import Connection as ResallocConnection
 
 
@@ -48,24 +49,26 @@ class RemoteHost:
         return "no info"
 
     @staticmethod
-    def _incremental_sleep(sleeptimes=None):
+    def _sleeptimes(sleeptimes=None):
         """
-        Wait cca two minutes with faster cadence, and then fallback to one
-        minute sleep.
+        Generate the sleep times, cca two minutes with faster cadence, and then
+        fallback to one minute sleep.
         """
-        counter = 0
         if sleeptimes is None:
             # wait cca two minutes, then fallback to 60s sleep(s)
             sleeptimes = [3, 3, 6, 6, 10, 10, 10, 20, 20, 20, 30]
-
+        yield from sleeptimes
         while True:
-            try:
-                sleeptime = sleeptimes[counter]
-            except IndexError:
-                sleeptime = 60
+            yield 60
+
+    @classmethod
+    def _incremental_sleep(cls, sleeptimes=None):
+        """
+        Sleep before each iteration, see _sleeptimes()
+        """
+        for sleeptime in cls._sleeptimes(sleeptimes):
             time.sleep(sleeptime)
             yield
-            counter += 1
 
     def wait_ready(self):
         """
@@ -101,6 +104,43 @@ class ResallocHost(RemoteHost):
         self.hostname = str(self.ticket.output).strip()
         return True
 
+    def _wait_on_server(self, woken):
+        """
+        Block in the server-side ticket wait, and wake up the wait_ready()
+        loop once the server resolves the ticket.  We use a separate
+        connection, the XML-RPC connections can not be shared among threads.
+        """
+        try:
+            connection = self._factory.new_connection()
+            connection.getTicket(self.ticket.id).wait()
+        except Exception:  # pylint: disable=broad-except
+            # e.g. older resalloc server, wait_ready() keeps polling
+            return
+        woken.set()
+
+    def wait_ready(self):
+        """
+        Poll the ticket by ticket.collect() with the incremental timeouts,
+        but wake up as soon as the server-side ticket.wait() (in a background
+        thread) returns.  So the build starts right after the host becomes
+        available, and the polling is the fallback if the server wait
+        doesn't return (e.g. for closed tickets).  Return True if we
+        successfully waited for the VM.
+        """
+        woken = Event()
+        if self._factory:
+            Thread(target=self._wait_on_server, args=(woken,),
+                   daemon=True).start()
+        timeouts = self._sleeptimes()
+        try:
+            while not self._check_ready():
+                if woken.wait(next(timeouts)):
+                    # the waiting thread is done, poll from now on
+                    woken.clear()
+        except RemoteHostAllocationTerminated:
+            return False
+        return True
+
     def release(self):
         self.ticket.close()
 
@@ -130,8 +170,13 @@ class ResallocHostFactory(HostFactory):
     https://github.com/praiskup/resalloc
     """
     def __init__(self, server="http://localhost:49100"):
-        self.conn = ResallocConnection(
-            server, request_survives_server_restart=True)
+        self.server = server
+        self.conn = self.new_connection()
+
+    def new_connection(self):
+        """ Return a new connection to the resalloc server """
+        return ResallocConnection(
+            self.server, request_survives_server_restart=True)
 
     def get_host(self, tags=None, sandbox=None):
         request_tags = ["copr_builder"]
@@ -140,4 +185,5 @@ class ResallocHostFactory(HostFactory):
 
         host = ResallocHost()
         host.ticket = self.conn.newTicket(request_tags, sandbox)
+        host._factory = self  # pylint: disable=protected-access
         return host
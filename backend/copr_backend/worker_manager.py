@@ -222,6 +222,67 @@ class QueueTask:
         return 0
 
 
+class TaskLeases:
+    """
+    Lease-based task claiming, for several dispatchers (typically on multiple
+    backend hosts, each having its own WorkerManager) processing the same
+    Frontend queue.  Leases are stored in a Redis DB shared by all the
+    dispatchers, and a worker is started for the task only when we
+    successfully claim the task lease.  The lease is renewed while the worker
+    runs, and released when the worker is done.  If the owner dies, the
+    lease expires after ``timeout`` seconds.
+    """
+
+    _renew_script = """
+        if redis.call("get", KEYS[1]) == ARGV[1] then
+            return redis.call("expire", KEYS[1], ARGV[2])
+        end
+        return redis.call("set", KEYS[1], ARGV[1], "NX", "EX", ARGV[2])
+    """
+
+    _release_script = """
+        if redis.call("get", KEYS[1]) == ARGV[1] then
+            return redis.call("del", KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, redis_connection, owner, prefix, timeout=600):
+        self.redis = redis_connection
+        self.owner = owner
+        self.prefix = prefix
+        self.timeout = timeout
+
+    def _key(self, task_id):
+        return "copr:backend:lease:{}::{}".format(self.prefix, task_id)
+
+    def claim(self, task_id):
+        """
+        Try to claim the lease for ``task_id``, return True if we own it.
+        """
+        key = self._key(task_id)
+        if self.redis.set(key, self.owner, nx=True, ex=self.timeout):
+            return True
+        return self.redis.get(key) == self.owner
+
+    def renew(self, task_id):
+        """
+        Extend our lease for ``task_id`` (or re-claim it if it expired).
+        Return True if we still own the lease.
+        """
+        return bool(self.redis.eval(self._renew_script, 1, self._key(task_id),
+                                    self.owner, self.timeout))
+
+    def release(self, task_id):
+        """ Drop our lease for ``task_id`` """
+        self.redis.eval(self._release_script, 1, self._key(task_id),
+                        self.owner)
+
+    def owner_of(self, task_id):
+        """ Return the owner of the ``task_id`` lease, or None """
+        return self.redis.get(self._key(task_id))
+
+
 class WorkerManager():
     """
     Automatically process 'self.tasks' priority queue, and start background jobs
@@ -257,7 +318,8 @@ class WorkerManager():
 
 
     def __init__(self, redis_connection=None, max_workers=8, log=None,
-                 frontend_client=None, limits=None):
+                 frontend_client=None, limits=None, leases=None):
+        # pylint: disable=too-many-arguments
         self.tasks = JobQueue()
         self.log = log if log else logging.getLogger()
         self.redis = redis_connection
@@ -271,6 +333,9 @@ class WorkerManager():
         self._tracked_workers = set(self.worker_ids())
         self._limits = limits or []
         self._last_worker_cleanup = None
+        # optional TaskLeases instance, when tasks are shared with other
+        # WorkerManagers
+        self._leases = leases
 
     def start_task(self, worker_id, task):
         """
@@ -461,6 +526,11 @@ class WorkerManager():
             if break_on_limit:
                 continue
 
+            if self._leases and not self._leases.claim(repr(task)):
+                self.log.debug("Task '%s' skipped, leased by %s", task.id,
+                               self._leases.owner_of(repr(task)))
+                continue
+
             self._start_worker(task, now)
 
         self.log.debug("Reaped %s processes", self._clean_daemon_processes())
@@ -486,6 +556,8 @@ class WorkerManager():
     def _delete_worker(self, worker_id):
         self.redis.delete(worker_id)
         self._tracked_workers.discard(worker_id)
+        if self._leases:
+            self._leases.release(self.get_task_id_from_worker_id(worker_id))
 
     def _cleanup_workers(self, now):
         """
@@ -538,6 +610,12 @@ class WorkerManager():
                     self._delete_worker(worker_id)
                 continue
 
+            if self._leases:
+                task_id = self.get_task_id_from_worker_id(worker_id)
+                if not self._leases.renew(task_id):
+                    self.log.error("Lease for task %s taken by %s", task_id,
+                                   self._leases.owner_of(task_id))
+
             checked = info.get('checked', allocated)
 
             if now - float(checked) > self.worker_timeout_deadcheck:
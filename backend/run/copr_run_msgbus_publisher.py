@@ -0,0 +1,18 @@
+#!/usr/bin/python3
+# coding: utf-8
+
+from copr_backend.helpers import get_backend_opts
+from copr_backend.daemons.msgbus_publisher import MessageBusPublisher
+
+
+def main():
+    opts = get_backend_opts()
+    if not opts.msgbus_outbox:
+        # the workers send the messages themselves
+        return
+    publisher = MessageBusPublisher(opts)
+    publisher.run()
+
+
+if __name__ == "__main__":
+    main()
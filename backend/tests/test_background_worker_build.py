@@ -232,11 +232,12 @@ def f_build_rpm_sign_on(f_build_rpm_case):
     config.bw = _reset_build_worker()
     return config
 
+@_patch_bwbuild_object("PathWatcher", mock.MagicMock())
 @_patch_bwbuild_object("time")
 def test_waiting_for_repo_fail(mc_time, f_build_rpm_case_no_repodata, caplog):
     """ check that worker loops in _wait_for_repo """
     worker = f_build_rpm_case_no_repodata.bw
-    mc_time.time.side_effect = [1, 2, 3, 4, 5, 6, 120, 121]
+    mc_time.time.side_effect = [1, 2, 3, 4, 5, 6, 120, 121, 122, 123]
     worker.process()
     expected = [
         (logging.ERROR, str(BackendError(MESSAGES["give_up_repo"]))),
@@ -244,7 +245,11 @@ def test_waiting_for_repo_fail(mc_time, f_build_rpm_case_no_repodata, caplog):
     ]
     for exp in expected:
         assert exp in [(r[1], r[2]) for r in caplog.record_tuples]
+    # logged once, not on every wakeup
+    assert [r[2] for r in caplog.record_tuples].count(
+        MESSAGES["repo_waiting"]) == 1
 
+@_patch_bwbuild_object("PathWatcher", mock.MagicMock())
 @_patch_bwbuild_object("time")
 def test_waiting_for_repo_success(mc_time, f_build_rpm_case_no_repodata, caplog):
     """ check that worker loops in _wait_for_repo """
@@ -252,7 +257,7 @@ def test_waiting_for_repo_success(mc_time, f_build_rpm_case_no_repodata, caplog)
 
     # on the 6th call to time(), create the repodata
     mc_time.time.side_effect = testlib.TimeSequenceSideEffect(
-        [1, 2, 3, 4, 5, 6, 120],
+        [1, 2, 3, 4, 5, 6, 120, 121, 122],
         {6: lambda: _create_job_repodata(worker.job)}
     )
 
@@ -371,6 +376,23 @@ def test_sign_built_packages_exception(mc_sign_rpms, mc_sign_one,
             found_fail = True
     assert found_fail
 
+def test_parse_results_without_results_json(f_build_rpm_case):
+    worker = f_build_rpm_case.bw
+    worker.job = _get_rpm_job_object(worker.opts)
+    os.makedirs(worker.job.results_dir)
+
+    # broken builder output is an error, we don't guess the results
+    with pytest.raises(BackendError):
+        worker._parse_results()
+    assert worker.job.results is None
+
+    source = os.path.join(os.environ["TEST_DATA_DIRECTORY"], "build_results",
+                          "00848963-example", "results.json")
+    shutil.copy(source, worker.job.results_dir)
+    worker._parse_results()
+    details = worker._get_build_details(worker.job)
+    assert details == {"built_packages": "example 1.0.14"}
+
 def _get_log_content(job, log="backend.log.gz"):
     logfile = os.path.join(job.results_dir, log)
     cmd = ["gunzip", "-c", logfile]
@@ -1,7 +1,10 @@
 """ tests for BackendConfigReader class """
 
+import glob
+import os
 import shutil
 import tempfile
+from unittest import mock
 
 import pytest
 
@@ -81,3 +84,26 @@ class TestBackendConfigReader:
         config = self.minimal_config_snippet + broken_config
         with pytest.raises(CoprBackendError):
             BackendConfigReader(self.get_config_file(config)).read()
+
+    @pytest.mark.parametrize("level", ["-1", "10"])
+    def test_invalid_log_compression_level(self, level):
+        config = self.minimal_config_snippet + \
+            "log_compression_level={}\n".format(level)
+        with pytest.raises(CoprBackendError):
+            BackendConfigReader(self.get_config_file(config)).read()
+
+    def test_msg_bus_ids(self):
+        bus_dir = os.path.join(self.workdir, "msgbuses")
+        os.mkdir(bus_dir)
+        for name, content in [("fedora.conf", "bus_type = 'stomp'\n"),
+                              ("ci.conf", "bus_type = 'stomp'\n"),
+                              ("other.conf", "bus_id = 'explicit'\n")]:
+            with open(os.path.join(bus_dir, name), "w") as config:
+                config.write(content)
+
+        bus_configs = glob.glob(os.path.join(bus_dir, "*.conf"))
+        with mock.patch("copr_backend.helpers.glob.glob",
+                        return_value=bus_configs):
+            opts = BackendConfigReader(self.get_minimal_config_file()).read()
+        assert [bus.bus_id for bus in opts.msg_buses] == \
+            ["ci", "fedora", "explicit"]
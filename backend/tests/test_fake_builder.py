@@ -0,0 +1,76 @@
+""" test the fake builder used for backend benchmarks """
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pytest
+from munch import Munch
+
+from copr_backend.fake_builder import (
+    FakeBuilderConnection,
+    FakeBuilderHostFactory,
+)
+
+# pylint: disable=attribute-defined-outside-init
+
+
+class TestFakeBuilder:
+    def setup_method(self, method):
+        self.workdir = tempfile.mkdtemp(prefix="copr-backend-test-")
+        self.opts = Munch(build_duration=0.5, log_lines=50, result_size=1024)
+        host = FakeBuilderHostFactory().get_host(["copr_builder"])
+        assert host.wait_ready()
+        self.conn = FakeBuilderConnection(self.opts, host=host.hostname)
+
+    def teardown_method(self, method):
+        shutil.rmtree(self.workdir)
+
+    def test_builder_checks(self):
+        rc, out, _ = self.conn.run_expensive(
+            "rpm -q copr-rpmbuild --qf \"%{VERSION}\n\"")
+        assert rc == 0
+        assert out.strip()
+        assert self.conn.run("/usr/bin/test -f /etc/mock/fedora-30-x86_64.cfg") == 0
+        assert self.conn.run("echo unknown") == 1
+
+    def test_live_log(self):
+        self.conn.started = time.time()
+        log = io.StringIO()
+        assert self.conn.run("copr-rpmbuild-log", stdout=log) == 0
+        assert time.time() - self.conn.started >= 0.5
+        assert len(log.getvalue().splitlines()) == 50
+
+    def test_canceled_live_log(self):
+        self.conn.started = time.time()
+        self.opts.build_duration = 3600
+        assert self.conn.run_expensive("copr-rpmbuild-cancel")[0] == 0
+        log = io.StringIO()
+        assert self.conn.run("copr-rpmbuild-log", stdout=log) == 0
+        assert time.time() - self.conn.started < 5
+
+    @pytest.mark.skipif(not shutil.which("rpmbuild"),
+                        reason="rpmbuild is not installed")
+    def test_build_and_download(self):
+        rc, out, _ = self.conn.run_expensive(
+            "copr-rpmbuild --verbose --drop-resultdir --build-id 10 "
+            "--chroot fedora-30-x86_64 --detached")
+        assert rc == 0
+        assert int(out)
+        self.conn.run("copr-rpmbuild-log")
+        self.conn.rsync_download("/var/lib/copr-rpmbuild/results/",
+                                 self.workdir, logfile="rsync.log")
+
+        assert set(os.listdir(self.workdir)) == {
+            "copr-fake-10-1.0-1.noarch.rpm",
+            "copr-fake-10-1.0-1.src.rpm",
+            "results.json",
+            "rsync.log",
+            "success",
+        }
+        with open(os.path.join(self.workdir, "results.json")) as fd:
+            packages = json.load(fd)["packages"]
+        assert {package["arch"] for package in packages} == {"noarch", "src"}
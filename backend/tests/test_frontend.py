@@ -84,6 +84,22 @@ class TestFrontendClient(object):
 
         assert method.called
 
+    def test_get_etag(self, mask_frontend_request):
+        first = self._get_fake_response()
+        first.headers["ETag"] = '"abc"'
+        not_modified = self._get_fake_response()
+        not_modified.status_code = 304
+        mask_frontend_request.side_effect = [first, not_modified, not_modified]
+
+        assert self.fc.get("pending-jobs", {"arch": "x86_64"}) == first
+        assert "headers" not in mask_frontend_request.call_args[1]
+        assert self.fc.get("pending-jobs", {"arch": "x86_64"}) == first
+        assert mask_frontend_request.call_args[1]["headers"] == \
+            {"If-None-Match": '"abc"'}
+        # different query, no ETag sent
+        assert self.fc.get("pending-jobs") == not_modified
+        assert "headers" not in mask_frontend_request.call_args[1]
+
     def test_post_to_frontend_repeated_first_try_ok(self, mask_frontend_request, mc_time):
         mc_time.time.return_value = 0
         response = self._get_fake_response()
@@ -1,14 +1,18 @@
 # coding: utf-8
 
 import os
+import gzip
 import json
 import logging
 import tempfile
+import threading
+import time
 from munch import Munch
 
 from copr_common.tree import walk_limited
 from copr_backend.background_worker_build import BackendError
-from copr_backend.helpers import get_redis_logger, get_chroot_arch, format_filename, get_redis_connection
+from copr_backend.helpers import get_redis_logger, get_chroot_arch, format_filename, get_redis_connection, \
+    gzip_file, PathWatcher
 from copr_backend.constants import LOG_REDIS_FIFO
 
 """
@@ -100,3 +104,31 @@ class TestHelpers(object):
             assert root == os.path.join(results, "user1/foo/srpm-builds")
             assert set(subdirs) == {"222", "111"}
             assert files == []
+
+
+def test_gzip_file(f_temp_directory):
+    src = os.path.join(f_temp_directory.workdir, "builder-live.log")
+    with open(src, "w") as fd:
+        fd.write("build log line\n" * 1000)
+    assert gzip_file(src, level=1) >= 0
+    assert not os.path.exists(src)
+    with gzip.open(src + ".gz", "rt") as fd:
+        assert fd.read() == "build log line\n" * 1000
+
+
+def test_path_watcher(f_temp_directory):
+    repomd = os.path.join(f_temp_directory.workdir, "chroot", "repodata",
+                          "repomd.xml")
+
+    def _createrepo():
+        os.makedirs(os.path.dirname(repomd))
+        open(repomd, "w").close()
+
+    creator = threading.Timer(0.3, _createrepo)
+    start = time.time()
+    with PathWatcher(repomd) as watcher:
+        creator.start()
+        while not os.path.exists(repomd):
+            assert time.time() - start < 5
+            watcher.wait(1)
+    creator.join()
@@ -0,0 +1,153 @@
+"""
+Test the message bus outbox, and the MessageBusPublisher daemon.
+"""
+
+import time
+from unittest import mock
+
+from munch import Munch
+import pytest
+
+from copr_backend.daemons.msgbus_publisher import MessageBusPublisher
+from copr_backend.exceptions import CoprBackendError
+from copr_backend.helpers import get_redis_connection
+from copr_backend.msgbus import MessageOutbox, MessageSender, MsgBus
+
+# pylint: disable=redefined-outer-name,protected-access
+
+REDIS_OPTS = Munch(
+    redis_db=9,
+    redis_port=7777,
+)
+
+
+class FakeStompBus(MsgBus):
+    """
+    Local stand-in for MsgBusStomp, it just records the sent messages and
+    it can be switched to the "broker is down" mode.
+    """
+    style = 'v1stomp'
+    bus_type = 'stomp'
+
+    def __init__(self, opts, log=None):
+        super().__init__(opts, log)
+        self.sent = []
+        self.broken = False
+
+    def _send_message(self, message):
+        if self.broken:
+            raise ConnectionError("broker is down")
+        self.sent.append(message)
+
+
+def _job(build_id):
+    return Munch(
+        submitter="jdoe",
+        project_name="foo",
+        project_owner="jdoe",
+        package_name="hello",
+        build_id=build_id,
+        chroot="fedora-rawhide-x86_64",
+        package_version="1.0-1",
+        status=1,
+    )
+
+
+@pytest.fixture
+def f_publisher():
+    """ MessageBusPublisher with two fake STOMP buses """
+    redis = get_redis_connection(REDIS_OPTS)
+    redis.flushdb()
+    opts = Munch(REDIS_OPTS)
+    opts.msg_buses = []
+    opts.fedmsg_enabled = False
+    opts.msgbus_outbox = True
+
+    buses = [
+        FakeStompBus(Munch(bus_id="bus1", destination="/topic/copr")),
+        FakeStompBus(Munch(bus_id="bus2", destination="/topic/copr")),
+    ]
+    opts.msg_buses = [Munch(bus_type="stomp", bus_id=bus.opts.bus_id)
+                      for bus in buses]
+    with mock.patch("copr_backend.daemons.msgbus_publisher.create_msg_buses",
+                    return_value=buses):
+        publisher = MessageBusPublisher(opts, log=mock.MagicMock())
+    yield opts, publisher
+    redis.flushdb()
+
+
+def test_sender_queues_to_outbox(f_publisher):
+    opts, publisher = f_publisher
+    with mock.patch("copr_backend.msgbus.create_msg_buses") as create:
+        sender = MessageSender(opts, "worker-1", mock.MagicMock())
+        assert not create.called
+
+    sender.announce("build.start", _job(1), "1.2.3.4")
+    for bus_id in ["bus1", "bus2"]:
+        pending = sender.outbox.pending(bus_id, 10)
+        assert len(pending) == 1
+        assert pending[0][1]["job"]["build_id"] == 1
+        assert pending[0][1]["ip"] == "1.2.3.4"
+
+    assert publisher.publish_pending() == 2
+    for bus in publisher.buses:
+        assert len(bus.sent) == 1
+        assert bus.sent[0].body["build"] == "1"
+        assert bus.sent[0].body["builder"] == "1.2.3.4"
+        assert publisher.outbox.pending(bus.opts.bus_id, 10) == []
+
+
+def test_outbox_undefined_fields(f_publisher):
+    opts, publisher = f_publisher
+    outbox = MessageOutbox(get_redis_connection(opts), ["bus1", "bus2"])
+    job = _job(1)
+    del job["package_version"]
+    outbox.add("build.start", job, "worker", "1.2.3.4", 666)
+    assert publisher.publish_pending() == 2
+    assert publisher.buses[0].sent[0].body["package"] == "hello-(undefined)"
+
+
+def test_outbox_unique_bus_ids():
+    with pytest.raises(CoprBackendError):
+        MessageOutbox(None, ["bus1", "bus2", "bus1"])
+
+
+def test_publisher_backoff(f_publisher):
+    opts, publisher = f_publisher
+    outbox = MessageOutbox(get_redis_connection(opts), ["bus1", "bus2"])
+    broken, working = publisher.buses
+    broken.broken = True
+
+    for build_id in range(3):
+        outbox.add("build.end", _job(build_id), "worker", "1.2.3.4", 666)
+
+    assert publisher.publish_pending() == 3
+    assert len(working.sent) == 3
+    assert not broken.sent
+    assert len(outbox.pending("bus1", 10)) == 3
+    assert not publisher._ready(broken)
+
+    # the broken bus is skipped till the backoff expires
+    broken.broken = False
+    assert publisher.publish_pending() == 0
+
+    publisher._next_attempt["bus1"] = time.time()
+    assert publisher.publish_pending() == 3
+    assert [m.body["build"] for m in broken.sent] == ["0", "1", "2"]
+    assert outbox.pending("bus1", 10) == []
+
+
+def test_publisher_throughput(f_publisher):
+    opts, publisher = f_publisher
+    outbox = MessageOutbox(get_redis_connection(opts), ["bus1", "bus2"])
+    count = 1000
+    for build_id in range(count):
+        outbox.add("build.start", _job(build_id), "worker", "1.2.3.4", 666)
+
+    processed = 0
+    while processed < 2 * count:
+        processed += publisher.publish_pending()
+
+    for bus in publisher.buses:
+        assert len(bus.sent) == count
+        assert outbox.pending(bus.opts.bus_id, 10) == []
@@ -1,5 +1,6 @@
 " test vm_alloc.py "
 
+import threading
 from unittest import mock
 
 import pytest
@@ -9,6 +10,8 @@ from copr_backend.vm_alloc import (
     ResallocHostFactory,
 )
 
+from testlib.resalloc import FakeResallocServer
+
 @mock.patch('copr_backend.vm_alloc.ResallocConnection')
 def test_ticket(_rcon):
     hf = ResallocHostFactory()
@@ -54,9 +57,14 @@ class _collect_side_effect:
         self.host.ticket.output = "host" if ret else None
         self.counter += 1
 
-@mock.patch('copr_backend.vm_alloc.time.sleep')
+def _timeouts(event):
+    """ Event() is mocked, the server-side wait never wakes us up """
+    event.return_value.wait.return_value = False
+    return event.return_value.wait.call_args_list
+
+@mock.patch('copr_backend.vm_alloc.Event')
 @mock.patch('copr_backend.vm_alloc.ResallocConnection')
-def test_ticket_wait_ready_normal(_rcon, sleep):
+def test_ticket_wait_ready_normal(_rcon, event):
     hf = ResallocHostFactory()
     host = hf.get_host()
     host.ticket.collect.side_effect = _collect_side_effect(
@@ -69,16 +77,17 @@ def test_ticket_wait_ready_normal(_rcon, sleep):
         mock.call(6),
         mock.call(6),
     ]
+    timeouts = _timeouts(event)
     host.wait_ready()
-    assert sleep.call_args_list == expected_calls
+    assert timeouts == expected_calls
     assert host.hostname == "host"
     # cached
     host.wait_ready()
-    assert sleep.call_args_list == expected_calls
+    assert timeouts == expected_calls
 
-@mock.patch('copr_backend.vm_alloc.time.sleep')
+@mock.patch('copr_backend.vm_alloc.Event')
 @mock.patch('copr_backend.vm_alloc.ResallocConnection')
-def test_ticket_wait_ready_raises(_rcon, sleep):
+def test_ticket_wait_ready_raises(_rcon, event):
     hf = ResallocHostFactory()
     host = hf.get_host()
     host.ticket.collect.side_effect = _collect_side_effect(
@@ -86,13 +95,14 @@ def test_ticket_wait_ready_raises(_rcon, sleep):
         host,
     )
     expected_calls = [mock.call(3)]
+    timeouts = _timeouts(event)
     assert not host.wait_ready()
-    assert sleep.call_args_list == expected_calls
+    assert timeouts == expected_calls
 
 
-@mock.patch('copr_backend.vm_alloc.time.sleep')
+@mock.patch('copr_backend.vm_alloc.Event')
 @mock.patch('copr_backend.vm_alloc.ResallocConnection')
-def test_ticket_wait_ready_fallback(_rcon, sleep):
+def test_ticket_wait_ready_fallback(_rcon, event):
     hf = ResallocHostFactory()
     host = hf.get_host()
 
@@ -100,5 +110,43 @@ def test_ticket_wait_ready_fallback(_rcon, sleep):
         [False for _ in range(20)] + [True],
         host,
     )
+    timeouts = _timeouts(event)
     host.wait_ready()
-    assert len(sleep.call_args_list) == 20
+    assert len(timeouts) == 20
+    assert timeouts[-1] == mock.call(60)
+
+
+@pytest.fixture
+def f_fake_server_host():
+    """ ResallocHost talking to the in-process FakeResallocServer """
+    server = FakeResallocServer()
+    with mock.patch('copr_backend.vm_alloc.ResallocConnection',
+                    return_value=server):
+        host = ResallocHostFactory().get_host(tags=["arch_x86_64"])
+        assert server.tickets[host.ticket.id]["tags"] == \
+            ["copr_builder", "arch_x86_64"]
+        yield server, host
+
+
+def test_ticket_wait_ready_fake_server(f_fake_server_host):
+    server, host = f_fake_server_host
+    resolver = threading.Timer(0.1, server.resolve,
+                               args=(host.ticket.id, "1.2.3.4"))
+    resolver.start()
+    assert host.wait_ready()
+    resolver.join()
+
+    # woken up by the server-side wait, not by the 3s polling timeout
+    assert host.hostname == "1.2.3.4"
+    assert server.collect_calls == 2
+    assert server.wait_calls == 1
+
+
+def test_ticket_wait_ready_fake_server_closed(f_fake_server_host):
+    server, host = f_fake_server_host
+    closer = threading.Timer(0.1, host.release)
+    closer.start()
+    assert not host.wait_ready()
+    closer.join()
+    assert host.hostname is None
+    assert server.wait_calls == 1
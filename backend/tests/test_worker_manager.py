@@ -14,7 +14,7 @@ from copr_common.enums import DefaultActionPriorityEnum
 from copr_backend.helpers import get_redis_connection
 from copr_backend.actions import ActionWorkerManager, ActionQueueTask, Action
 from copr_backend.worker_manager import (
-    JobQueue, PredicateWorkerLimit, QueueTask, WorkerManager
+    JobQueue, PredicateWorkerLimit, QueueTask, TaskLeases, WorkerManager
 )
 
 WORKDIR = os.path.dirname(__file__)
@@ -321,6 +321,67 @@ def wait_pid_exit(pid):
         time.sleep(0.1)
 
 
+class LeasedToyWorkerManager(ToyWorkerManager):
+    """ Don't start any background process, just record the started tasks """
+    # pylint: disable=abstract-method
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = []
+
+    def start_task(self, worker_id, task):
+        self.started.append(task.id)
+
+
+class TestTaskLeases:
+    """ Two worker managers (backend hosts) processing the same queue """
+
+    def setup_method(self, method):
+        self.redis = get_redis_connection(REDIS_OPTS)
+        self.redis.flushall()
+        other_opts = copy.deepcopy(REDIS_OPTS)
+        other_opts.redis_db = 10
+        self.other_redis = get_redis_connection(other_opts)
+        self.managers = []
+        for owner, redis in [("be1", self.redis), ("be2", self.other_redis)]:
+            leases = TaskLeases(self.redis, owner=owner, prefix="toy")
+            manager = LeasedToyWorkerManager(redis_connection=redis,
+                                             max_workers=50, log=log,
+                                             leases=leases)
+            for task_id in range(10):
+                manager.add_task(ToyQueueTask(task_id))
+            self.managers.append(manager)
+
+    @patch('copr_backend.worker_manager.time.sleep')
+    def test_task_started_once(self, _mc_sleep):
+        be1, be2 = self.managers
+        be1.run(timeout=0.1)
+        be2.run(timeout=0.1)
+        assert be1.started == list(range(10))
+        assert be2.started == []
+        assert be2._leases.owner_of("3") == "be1"
+
+        # the finished worker drops the lease, and the task can be taken by
+        # the other backend (e.g. when re-submitted)
+        be1._delete_worker("worker:3")
+        assert be1._leases.owner_of("3") is None
+        be2.add_task(ToyQueueTask(3))
+        be2.run(timeout=0.1)
+        assert be2.started == [3]
+
+    def test_lease_renewal(self):
+        be1, be2 = self.managers
+        assert be1._leases.claim("1")
+        assert not be2._leases.claim("1")
+        assert not be2._leases.renew("1")
+        assert be1._leases.renew("1")
+        be2._leases.release("1")
+        assert be1._leases.owner_of("1") == "be1"
+        be1._leases.release("1")
+        assert be2._leases.renew("1")
+        assert be1._leases.owner_of("1") == "be2"
+
+
 class TestActionWorkerManager(BaseTestWorkerManager):
     # pylint: disable=attribute-defined-outside-init
     def setup_worker_manager(self):
@@ -0,0 +1,81 @@
+"""
+Fake, in-process resalloc server for testing the VM allocation logic.
+"""
+
+import itertools
+import threading
+
+
+class FakeTicket:
+    """
+    Client-side ticket, mimics the resalloc.client.Ticket interface.
+    """
+    def __init__(self, server, ticket_id):
+        self._server = server
+        self.id = ticket_id  # pylint: disable=invalid-name
+        self.ready = False
+        self.closed = False
+        self.output = None
+
+    def _update(self):
+        ticket = self._server.tickets[self.id]
+        self.ready = ticket["state"] == "ready"
+        self.closed = ticket["state"] == "closed"
+        self.output = ticket["output"]
+
+    def collect(self):
+        """ non-blocking ticket check """
+        self._server.collect_calls += 1
+        self._update()
+
+    def wait(self):
+        """ block till the ticket is resolved """
+        self._server.wait_calls += 1
+        self._server.tickets[self.id]["event"].wait()
+        self._update()
+
+    def close(self):
+        """ close the ticket on server """
+        self._server.close(self.id)
+
+
+class FakeResallocServer:
+    """
+    Pass this as a return value of the patched ResallocConnection class.  The
+    tickets are resolved explicitly by the resolve() method, e.g. from another
+    thread.
+    """
+    def __init__(self):
+        self._counter = itertools.count(1)
+        self.tickets = {}
+        self.collect_calls = 0
+        self.wait_calls = 0
+
+    def newTicket(self, tags, sandbox=None):  # pylint: disable=invalid-name
+        """ mimic resalloc.client.Connection.newTicket() """
+        ticket_id = next(self._counter)
+        self.tickets[ticket_id] = {
+            "tags": tags,
+            "sandbox": sandbox,
+            "state": "open",
+            "output": None,
+            "event": threading.Event(),
+        }
+        return FakeTicket(self, ticket_id)
+
+    def getTicket(self, ticket_id):  # pylint: disable=invalid-name
+        """ mimic resalloc.client.Connection.getTicket() """
+        return FakeTicket(self, ticket_id)
+
+    def resolve(self, ticket_id, hostname):
+        """ assign a host to the ticket """
+        ticket = self.tickets[ticket_id]
+        ticket["state"] = "ready"
+        ticket["output"] = hostname + "\n"
+        ticket["event"].set()
+
+    def close(self, ticket_id):
+        """ close the ticket """
+        ticket = self.tickets[ticket_id]
+        ticket["state"] = "closed"
+        ticket["event"].set()
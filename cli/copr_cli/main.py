@@ -222,9 +222,10 @@ class Commands(object):
             return owner, m.group(3), m.group(4)
         raise CoprException("Unexpected chroot path format")
 
-    def _watch_builds(self, build_ids):
+    def _watch_builds(self, build_ids, events=False):
         """
         :param build_ids: list of build IDs
+        :param events: watch the build events stream instead of polling
         """
         print("Watching build(s): (this may be safely interrupted)")
 
@@ -234,38 +235,73 @@ class Commands(object):
 
         watched = set(build_ids)
         done = set()
+        use_events = events
+
+        def _update(build_id, state):
+            now = datetime.datetime.now()
+            if prevstatus[build_id] != state:
+                prevstatus[build_id] = state
+                print("  {0} Build {2}: {1}".format(
+                    now.strftime("%H:%M:%S"),
+                    state, build_id))
+                sys.stdout.flush()
+
+            if state in ["failed"]:
+                failed_ids.append(build_id)
+            if state in ["canceled"]:
+                canceled_ids.append(build_id)
+            if state in ["succeeded", "skipped",
+                         "failed", "canceled"]:
+                done.add(build_id)
+            if state == "unknown":
+                raise copr_exceptions.CoprBuildException(
+                    "Unknown status.")
 
         try:
             while watched != done:
+                # one request for all the watched builds
+                try:
+                    states = {
+                        build.id: build.state for build in
+                        self.client.build_proxy.get_states(watched - done)
+                    }
+                except requests.ConnectionError as e:
+                    raise CoprRequestException(e)
+
                 for build_id in watched:
                     if build_id in done:
                         continue
-                    try:
-                        build_details = self.client.build_proxy.get(build_id=build_id)
-                    except requests.ConnectionError as e:
-                        raise CoprRequestException(e)
-                    now = datetime.datetime.now()
-                    if prevstatus[build_id] != build_details.state:
-                        prevstatus[build_id] = build_details.state
-                        print("  {0} Build {2}: {1}".format(
-                            now.strftime("%H:%M:%S"),
-                            build_details.state, build_id))
-                        sys.stdout.flush()
-
-                    if build_details.state in ["failed"]:
-                        failed_ids.append(build_id)
-                    if build_details.state in ["canceled"]:
-                        canceled_ids.append(build_id)
-                    if build_details.state in ["succeeded", "skipped",
-                                               "failed", "canceled"]:
-                        done.add(build_id)
-                    if build_details.state == "unknown":
-                        raise copr_exceptions.CoprBuildException(
-                            "Unknown status.")
+                    state = states.get(build_id)
+                    if state is None:
+                        # not found, let the server tell us why
+                        state = self.client.build_proxy.get(
+                            build_id=build_id).state
+                    _update(build_id, state)
 
                 if watched == done:
                     break
 
+                if use_events:
+                    # one connection, the state changes are pushed to us
+                    try:
+                        events = self.client.build_proxy.get_events(
+                            build_ids=watched - done)
+                        try:
+                            for event in events:
+                                if event.chroot is None and \
+                                        event.build_id in watched - done:
+                                    _update(event.build_id, event.state)
+                                if watched == done:
+                                    break
+                        finally:
+                            events.close()
+                        continue
+                    except (CoprRequestException, CoprNoResultException,
+                            CoprAuthException):
+                        # frontend without the events API, no free stream,
+                        # not authenticated, or the stream broke
+                        use_events = False
+
                 time.sleep(30)
 
             exception_message = ""
@@ -638,7 +674,7 @@ class Commands(object):
         print(build.state)
 
     def action_watch_build(self, args):
-        self._watch_builds(args.build_id)
+        self._watch_builds(args.build_id, events=args.events)
 
     def action_delete_build(self, args):
         result = self.client.build_proxy.delete_list(args.build_id)
@@ -1394,6 +1430,10 @@ def setup_parser():
                                               " specified by their ID")
     parser_watch.add_argument("build_id", nargs="+",
                               help="Build ID", type=int)
+    parser_watch.add_argument("--events", action="store_true", default=False,
+                              help="Let the server push the state changes over "
+                                   "one long-lived connection instead of "
+                                   "polling every 30 seconds")
     parser_watch.set_defaults(func="action_watch_build")
 
     # create the parser for the "delete-build" command
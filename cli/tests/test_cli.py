@@ -13,7 +13,7 @@ from copr.exceptions import (
     CoprConfigException,
     CoprUnknownResponseException,
 )
-from copr.v3.exceptions import CoprAuthException
+from copr.v3.exceptions import CoprAuthException, CoprNoResultException
 from cli_tests_lib import config as mock_config, mock, MagicMock
 from copr_cli import main
 from copr_cli.main import FrontendOutdatedCliException
@@ -26,6 +26,20 @@ def exit_wrap(value):
         return value.code
 
 
+@pytest.fixture(autouse=True)
+def build_proxy_get_states():
+    """
+    Ask the (mocked) BuildProxy.get() for the build states, one by one
+    """
+    def _get_states(proxy, build_ids):
+        return [Munch(id=build_id, state=proxy.get(build_id=build_id).state)
+                for build_id in build_ids]
+
+    with mock.patch("copr.v3.proxies.build.BuildProxy.get_states",
+                    _get_states):
+        yield
+
+
 # import logging
 #
 # logging.basicConfig(
@@ -677,6 +691,81 @@ def test_create_build_wait_keyboard_interrupt(config_from_file, build_proxy_get,
     assert "Watching build" in stdout
 
 
+@mock.patch('copr_cli.main.time')
+@mock.patch('copr.v3.proxies.build.BuildProxy.get')
+@mock.patch('copr_cli.main.config_from_file', return_value=mock_config)
+def test_watch_builds_states(config_from_file, build_proxy_get, mock_time, capsys):
+    states = iter([
+        [Munch(id=1, state="running"), Munch(id=2, state="succeeded")],
+        [Munch(id=1, state="succeeded")],
+    ])
+    with mock.patch("copr.v3.proxies.build.BuildProxy.get_states") as get_states, \
+            mock.patch("copr.v3.proxies.build.BuildProxy.get_events") as get_events:
+        get_states.side_effect = lambda build_ids: next(states)
+        build_proxy_get.return_value = Munch(state="succeeded")
+        main.main(argv=["watch-build", "1", "2", "3"])
+
+    # polling is the default
+    assert not get_events.called
+
+    # build 3 is not in the get_states() output, asked separately
+    assert build_proxy_get.call_args_list == [mock.call(build_id=3)]
+    assert [call[0][0] for call in get_states.call_args_list] == [{1, 2, 3}, {1}]
+    assert len(mock_time.sleep.call_args_list) == 1
+    stdout, _ = capsys.readouterr()
+    assert "Build 1: succeeded" in stdout
+
+
+@mock.patch('copr_cli.main.time')
+@mock.patch('copr.v3.proxies.build.BuildProxy.get')
+@mock.patch('copr_cli.main.config_from_file', return_value=mock_config)
+def test_watch_builds_events(config_from_file, build_proxy_get, mock_time, capsys):
+    events = [
+        Munch(build_id=1, chroot=None, state="running"),
+        Munch(build_id=1, chroot="fedora-rawhide-x86_64", state="failed"),
+        Munch(build_id=1, chroot=None, state="failed"),
+    ]
+    with mock.patch("copr.v3.proxies.build.BuildProxy.get_states") as get_states, \
+            mock.patch("copr.v3.proxies.build.BuildProxy.get_events") as get_events:
+        get_states.return_value = [Munch(id=1, state="pending"),
+                                   Munch(id=2, state="succeeded")]
+        get_events.side_effect = lambda build_ids: (e for e in events)
+        with pytest.raises(SystemExit):
+            main.main(argv=["watch-build", "--events", "1", "2"])
+
+    # one stream, no polling
+    assert get_states.call_count == 1
+    assert get_events.call_args_list == [mock.call(build_ids={1})]
+    assert not mock_time.sleep.called
+    assert not build_proxy_get.called
+    stdout, stderr = capsys.readouterr()
+    assert "Build 1: pending" in stdout
+    assert "Build 1: running" in stdout
+    assert "Build 1: failed" in stdout
+    assert "Build(s) 1 failed." in stderr
+
+
+@mock.patch('copr_cli.main.time')
+@mock.patch('copr.v3.proxies.build.BuildProxy.get')
+@mock.patch('copr_cli.main.config_from_file', return_value=mock_config)
+def test_watch_builds_events_fallback(config_from_file, build_proxy_get,
+                                      mock_time, capsys):
+    states = iter([[Munch(id=1, state="running")],
+                   [Munch(id=1, state="succeeded")]])
+    with mock.patch("copr.v3.proxies.build.BuildProxy.get_states") as get_states, \
+            mock.patch("copr.v3.proxies.build.BuildProxy.get_events") as get_events:
+        get_states.side_effect = lambda build_ids: next(states)
+        get_events.side_effect = CoprNoResultException("No /build/events/ API")
+        main.main(argv=["watch-build", "--events", "1"])
+
+    # the frontend doesn't support the events, we fall back to polling
+    assert get_events.call_count == 1
+    assert get_states.call_count == 2
+    assert len(mock_time.sleep.call_args_list) == 1
+    stdout, _ = capsys.readouterr()
+    assert "Build 1: succeeded" in stdout
+
+
 @mock.patch('copr_cli.main.time')
 @mock.patch('copr_cli.main.config_from_file', return_value=mock_config)
 class TestCreateBuild(object):
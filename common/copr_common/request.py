@@ -49,8 +49,9 @@ class SafeRequest:
         return self._send_request_repeatedly(url, method=method, data=data,
                                              **kwargs)
 
-    def _send_request(self, url, method, data=None, **kwargs):
-        headers = {"content-type": "application/json"}
+    def _send_request(self, url, method, data=None, headers=None, **kwargs):
+        headers = dict({"content-type": "application/json"},
+                       **(headers or {}))
         auth = ("user", self.auth) if self.auth else None
 
         try:
@@ -94,7 +94,6 @@ BuildRequires: python3-flask-cache
 BuildRequires: python3-flask-openid
 BuildRequires: python3-flask-restful
 BuildRequires: python3-flask-sqlalchemy
-BuildRequires: python3-flask-whooshee
 BuildRequires: python3-flask-wtf
 BuildRequires: python3-gobject
 BuildRequires: python3-html2text
@@ -115,7 +114,6 @@ BuildRequires: python3-redis
 BuildRequires: python3-requests
 BuildRequires: python3-sphinx
 BuildRequires: python3-sphinxcontrib-httpdomain
-BuildRequires: python3-whoosh
 BuildRequires: python3-wtforms >= 2.2.1
 BuildRequires: python3-yaml
 BuildRequires: redis
@@ -151,7 +149,6 @@ Requires: python3-flask-cache
 Requires: python3-flask-openid
 Requires: python3-flask-restful
 Requires: python3-flask-sqlalchemy
-Requires: python3-flask-whooshee
 Requires: python3-flask-wtf
 Requires: python3-flask-wtf
 Requires: python3-gobject
@@ -250,8 +247,6 @@ install -d %{buildroot}%{_sharedstatedir}/copr/data/openid_store
 install -d %{buildroot}%{_sharedstatedir}/copr/data/openid_store/associations
 install -d %{buildroot}%{_sharedstatedir}/copr/data/openid_store/nonces
 install -d %{buildroot}%{_sharedstatedir}/copr/data/openid_store/temp
-install -d %{buildroot}%{_sharedstatedir}/copr/data/whooshee
-install -d %{buildroot}%{_sharedstatedir}/copr/data/whooshee/copr_user_whoosheer
 install -d %{buildroot}%{_sharedstatedir}/copr/data/srpm_storage
 install -d %{buildroot}%{_sysconfdir}/cron.hourly
 install -d %{buildroot}%{_sysconfdir}/cron.daily
@@ -262,6 +257,7 @@ install -d %{buildroot}%{_libexecdir}
 install -p -m 755 conf/cron.hourly/copr-frontend* %{buildroot}%{_sysconfdir}/cron.hourly
 install -p -m 755 conf/cron.daily/copr-frontend* %{buildroot}%{_sysconfdir}/cron.daily
 install -p -m 755 coprs_frontend/run/copr_dump_db.sh %{buildroot}%{_libexecdir}
+install -p -m 644 conf/copr-frontend-search-indexer.service %{buildroot}%{_unitdir}
 
 cp -a coprs_frontend/* %{buildroot}%{_datadir}/copr/coprs_frontend
 rm -rf %{buildroot}%{_datadir}/copr/coprs_frontend/tests
@@ -315,15 +311,18 @@ usermod -L copr-fe
 %post
 /bin/systemctl condrestart httpd.service || :
 %systemd_post fm-consumer@copr_messaging.service
+%systemd_post copr-frontend-search-indexer.service
 
 
 %preun
 %systemd_preun fm-consumer@copr_messaging.service
+%systemd_preun copr-frontend-search-indexer.service
 
 
 %postun
 /bin/systemctl condrestart httpd.service || :
 %systemd_postun_with_restart fm-consumer@copr_messaging.service
+%systemd_postun_with_restart copr-frontend-search-indexer.service
 
 
 %files
@@ -340,8 +339,6 @@ usermod -L copr-fe
 %defattr(-, copr-fe, copr-fe, -)
 %dir %{_sharedstatedir}/copr/data
 %dir %{_sharedstatedir}/copr/data/openid_store
-%dir %{_sharedstatedir}/copr/data/whooshee
-%dir %{_sharedstatedir}/copr/data/whooshee/copr_user_whoosheer
 %dir %{_sharedstatedir}/copr/data/srpm_storage
 
 %ghost %{_sharedstatedir}/copr/data/copr.db
@@ -362,6 +359,7 @@ usermod -L copr-fe
 %config(noreplace) %{_sysconfdir}/cron.hourly/copr-frontend-optional
 %config(noreplace) %{_sysconfdir}/cron.daily/copr-frontend-optional
 %{_libexecdir}/copr_dump_db.sh
+%{_unitdir}/copr-frontend-search-indexer.service
 %exclude_files flavor
 %exclude_files devel
 
@@ -0,0 +1,46 @@
+"""
+Materialized pending build queue, the pending_queue table
+
+The table needs to be filled after the upgrade, run:
+$ copr-frontend check-pending-queue --fix
+
+Revision ID: 7d9f3b1c5a2e
+Revises: 484e28958b27
+Create Date: 2026-10-19 09:12:44.318604
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = '7d9f3b1c5a2e'
+down_revision = '484e28958b27'
+
+
+def upgrade():
+    op.create_table(
+        'pending_queue',
+        sa.Column('task_id', sa.String(length=100), nullable=False),
+        sa.Column('build_id', sa.Integer(), nullable=False),
+        sa.Column('batch_id', sa.Integer(), nullable=True),
+        sa.Column('mock_chroot_id', sa.Integer(), nullable=True),
+        sa.Column('srpm', sa.Boolean(), nullable=False),
+        sa.Column('background', sa.Boolean(), nullable=False),
+        sa.Column('project_owner', sa.Text(), nullable=False),
+        sa.Column('sandbox', sa.Text(), nullable=False),
+        sa.Column('chroot', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['batch_id'], ['batch.id'], ),
+        sa.ForeignKeyConstraint(['build_id'], ['build.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['mock_chroot_id'], ['mock_chroot.id'], ),
+        sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index(op.f('ix_pending_queue_build_id'), 'pending_queue',
+                    ['build_id'], unique=False)
+    op.create_index('pending_queue_order', 'pending_queue',
+                    ['srpm', 'background', 'build_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('pending_queue_order', table_name='pending_queue')
+    op.drop_index(op.f('ix_pending_queue_build_id'), table_name='pending_queue')
+    op.drop_table('pending_queue')
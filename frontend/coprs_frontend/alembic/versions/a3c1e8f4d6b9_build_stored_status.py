@@ -0,0 +1,31 @@
+"""
+Store the aggregated build status in build.stored_status
+
+The column needs to be filled after the upgrade, run:
+$ copr-frontend backfill-build-status
+
+Revision ID: a3c1e8f4d6b9
+Revises: 7d9f3b1c5a2e
+Create Date: 2026-10-19 11:40:12.581203
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = 'a3c1e8f4d6b9'
+down_revision = '7d9f3b1c5a2e'
+
+
+def upgrade():
+    op.add_column('build', sa.Column('stored_status', sa.Integer(), nullable=True))
+    op.create_index('build_copr_id_stored_status', 'build',
+                    ['copr_id', 'stored_status'], unique=False)
+    op.create_index('build_user_id_stored_status', 'build',
+                    ['user_id', 'stored_status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('build_user_id_stored_status', table_name='build')
+    op.drop_index('build_copr_id_stored_status', table_name='build')
+    op.drop_column('build', 'stored_status')
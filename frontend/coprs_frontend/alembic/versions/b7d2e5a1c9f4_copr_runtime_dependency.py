@@ -0,0 +1,41 @@
+"""
+Index the stored runtime dependency closures, the copr_runtime_dependency table
+
+The already stored closures have no rows in the new table, so they are dropped
+and re-resolved on demand.
+
+Revision ID: b7d2e5a1c9f4
+Revises: e1b6c4a9f2d3
+Create Date: 2026-10-19 23:41:12.508316
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = 'b7d2e5a1c9f4'
+down_revision = 'e1b6c4a9f2d3'
+
+
+def upgrade():
+    op.create_table(
+        'copr_runtime_dependency',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('copr_id', sa.Integer(), nullable=False),
+        sa.Column('dependency', sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(['copr_id'], ['copr.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_copr_runtime_dependency_copr_id'),
+                    'copr_runtime_dependency', ['copr_id'], unique=False)
+    op.create_index(op.f('ix_copr_runtime_dependency_dependency'),
+                    'copr_runtime_dependency', ['dependency'], unique=False)
+    op.execute("UPDATE copr SET runtime_deps_closure = NULL")
+
+
+def downgrade():
+    op.drop_index(op.f('ix_copr_runtime_dependency_dependency'),
+                  table_name='copr_runtime_dependency')
+    op.drop_index(op.f('ix_copr_runtime_dependency_copr_id'),
+                  table_name='copr_runtime_dependency')
+    op.drop_table('copr_runtime_dependency')
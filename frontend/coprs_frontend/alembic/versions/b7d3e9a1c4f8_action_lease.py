@@ -0,0 +1,23 @@
+"""
+Lease the actions claimed by Backend action processors
+
+Revision ID: b7d3e9a1c4f8
+Revises: f2a9c6e1d8b3
+Create Date: 2026-10-19 19:12:07.318406
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = 'b7d3e9a1c4f8'
+down_revision = 'f2a9c6e1d8b3'
+
+
+def upgrade():
+    op.add_column('action', sa.Column('lease_expires_on', sa.Integer(),
+                                      nullable=True))
+
+
+def downgrade():
+    op.drop_column('action', 'lease_expires_on')
@@ -0,0 +1,22 @@
+"""
+Store the resolved transitive runtime dependencies per project
+
+Revision ID: c5e2a7d9b4f1
+Revises: a3c1e8f4d6b9
+Create Date: 2026-10-19 14:05:37.102918
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = 'c5e2a7d9b4f1'
+down_revision = 'a3c1e8f4d6b9'
+
+
+def upgrade():
+    op.add_column('copr', sa.Column('runtime_deps_closure', sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('copr', 'runtime_deps_closure')
@@ -0,0 +1,38 @@
+"""
+Add the archive tables for the long-finished builds
+
+See the 'copr-frontend archive-builds' command.
+
+Revision ID: c9f4a2e7b1d5
+Revises: b7d3e9a1c4f8
+Create Date: 2026-10-19 20:31:45.902716
+"""
+
+from alembic import op
+
+
+revision = 'c9f4a2e7b1d5'
+down_revision = 'b7d3e9a1c4f8'
+
+# table -> columns to index
+ARCHIVES = {
+    "build": ["copr_id", "package_id"],
+    "build_chroot": ["build_id"],
+    "build_chroot_result": ["build_chroot_id"],
+}
+
+
+def upgrade():
+    for table, indexes in ARCHIVES.items():
+        archive = table + "_archive"
+        # The same columns, but no defaults, foreign keys or constraints
+        op.execute("CREATE TABLE {} (LIKE {})".format(archive, table))
+        op.create_primary_key(archive + "_pkey", archive, ["id"])
+        for column in indexes:
+            op.create_index("{}_{}".format(archive, column), archive,
+                            [column])
+
+
+def downgrade():
+    for table in ARCHIVES:
+        op.drop_table(table + "_archive")
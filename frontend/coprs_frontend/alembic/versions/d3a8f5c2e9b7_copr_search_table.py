@@ -0,0 +1,36 @@
+"""
+PostgreSQL full-text project search, the copr_search table
+
+The table needs to be filled after the upgrade, run:
+$ copr-frontend update-indexes
+
+Revision ID: d3a8f5c2e9b7
+Revises: c9f4a2e7b1d5
+Create Date: 2026-10-19 21:12:37.418205
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+revision = 'd3a8f5c2e9b7'
+down_revision = 'c9f4a2e7b1d5'
+
+
+def upgrade():
+    op.create_table(
+        'copr_search',
+        sa.Column('copr_id', sa.Integer(), nullable=False),
+        sa.Column('document', TSVECTOR(), nullable=False),
+        sa.Column('indexed_on', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['copr_id'], ['copr.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('copr_id')
+    )
+    op.create_index('copr_search_document', 'copr_search', ['document'],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('copr_search_document', table_name='copr_search')
+    op.drop_table('copr_search')
@@ -0,0 +1,30 @@
+"""
+Queue the project search document updates, the copr_search_queue table
+
+The queue is processed by the copr-frontend-search-indexer service.
+
+Revision ID: e1b6c4a9f2d3
+Revises: d3a8f5c2e9b7
+Create Date: 2026-10-19 22:03:51.206347
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = 'e1b6c4a9f2d3'
+down_revision = 'd3a8f5c2e9b7'
+
+
+def upgrade():
+    op.create_table(
+        'copr_search_queue',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('copr_id', sa.Integer(), nullable=False),
+        sa.Column('queued_on', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('copr_search_queue')
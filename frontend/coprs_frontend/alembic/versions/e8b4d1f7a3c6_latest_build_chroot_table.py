@@ -0,0 +1,46 @@
+"""
+Incrementally maintained project monitor, the latest_build_chroot table
+
+The table needs to be filled after the upgrade, run:
+$ copr-frontend rebuild-latest-build-chroots
+
+Revision ID: e8b4d1f7a3c6
+Revises: c5e2a7d9b4f1
+Create Date: 2026-10-19 16:41:09.527731
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = 'e8b4d1f7a3c6'
+down_revision = 'c5e2a7d9b4f1'
+
+
+def upgrade():
+    op.create_table(
+        'latest_build_chroot',
+        sa.Column('copr_dir_id', sa.Integer(), nullable=False),
+        sa.Column('package_id', sa.Integer(), nullable=False),
+        sa.Column('mock_chroot_id', sa.Integer(), nullable=False),
+        sa.Column('build_id', sa.Integer(), nullable=False),
+        sa.Column('build_chroot_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['build_chroot_id'], ['build_chroot.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['build_id'], ['build.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['copr_dir_id'], ['copr_dir.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['mock_chroot_id'], ['mock_chroot.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['package_id'], ['package.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('copr_dir_id', 'package_id', 'mock_chroot_id')
+    )
+    op.create_index(op.f('ix_latest_build_chroot_build_id'),
+                    'latest_build_chroot', ['build_id'], unique=False)
+    op.create_index(op.f('ix_latest_build_chroot_package_id'),
+                    'latest_build_chroot', ['package_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_latest_build_chroot_package_id'),
+                  table_name='latest_build_chroot')
+    op.drop_index(op.f('ix_latest_build_chroot_build_id'),
+                  table_name='latest_build_chroot')
+    op.drop_table('latest_build_chroot')
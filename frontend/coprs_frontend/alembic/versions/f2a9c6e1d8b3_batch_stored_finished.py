@@ -0,0 +1,26 @@
+"""
+Store the finished flag of build batches
+
+The column needs to be filled after the upgrade, run:
+$ copr-frontend backfill-build-status
+
+Revision ID: f2a9c6e1d8b3
+Revises: e8b4d1f7a3c6
+Create Date: 2026-10-19 18:02:51.664190
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = 'f2a9c6e1d8b3'
+down_revision = 'e8b4d1f7a3c6'
+
+
+def upgrade():
+    op.add_column('batch', sa.Column('stored_finished', sa.Boolean(),
+                                     server_default='false', nullable=False))
+
+
+def downgrade():
+    op.drop_column('batch', 'stored_finished')
@@ -0,0 +1,29 @@
+"""
+Unique copr_runtime_dependency edges, drop the duplicates
+
+Revision ID: f3c8a1d6e5b2
+Revises: b7d2e5a1c9f4
+Create Date: 2026-10-20 09:14:52.731904
+"""
+
+from alembic import op
+
+
+revision = 'f3c8a1d6e5b2'
+down_revision = 'b7d2e5a1c9f4'
+
+
+def upgrade():
+    op.execute("""
+        DELETE FROM copr_runtime_dependency WHERE id NOT IN (
+            SELECT min(id) FROM copr_runtime_dependency
+            GROUP BY copr_id, dependency)
+    """)
+    op.create_unique_constraint('copr_runtime_dependency_uniq',
+                                'copr_runtime_dependency',
+                                ['copr_id', 'dependency'])
+
+
+def downgrade():
+    op.drop_constraint('copr_runtime_dependency_uniq',
+                       'copr_runtime_dependency', type_='unique')
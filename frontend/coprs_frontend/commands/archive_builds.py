@@ -0,0 +1,31 @@
+"""
+Move the long-finished builds to the archive tables.
+"""
+
+import click
+from coprs import app
+from coprs.logic.archive_logic import ArchiveLogic
+
+
+@click.command()
+@click.option(
+    "--days", type=int, default=app.config["ARCHIVE_BUILDS_AFTER_DAYS"],
+    show_default=True,
+    help="Archive builds finished more than this number of days ago.",
+)
+@click.option(
+    "--chunk-size", type=int, default=1000, show_default=True,
+    help="Number of builds archived (and committed) at once.",
+)
+def archive_builds(days, chunk_size):
+    """
+    Move the builds finished long time ago from the build, build_chroot and
+    build_chroot_result tables to the corresponding *_archive tables.  The
+    archived builds are still available by ID (e.g. via API), but they are not
+    listed in projects anymore.
+    """
+    def _progress(done, total):
+        print("Archived {} of {} builds".format(done, total))
+
+    archived = ArchiveLogic.archive_builds(days, chunk_size, _progress)
+    print("Archived {} builds".format(archived))
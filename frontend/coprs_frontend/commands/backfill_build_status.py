@@ -0,0 +1,29 @@
+"""
+Fill the build.stored_status and batch.stored_finished columns.
+"""
+
+import click
+from coprs.logic.batches_logic import BatchesLogic
+from coprs.logic.builds_logic import BuildsLogic
+
+
+@click.command()
+@click.option(
+    "--all/--only-missing", "all_builds",
+    default=False,
+    help="Re-calculate the stored status for all the builds (and batches), "
+         "not only for those which have no stored status yet (or which are "
+         "not yet finished).",
+)
+def backfill_build_status(all_builds):
+    """
+    Calculate the Build.status for the existing builds, and the
+    Batch.finished_slow for the existing batches, and store them into the
+    database.  Needs to be run right after the build.stored_status (or
+    batch.stored_finished) column is created by database migration.
+    """
+    updated = BuildsLogic.backfill_stored_status(only_missing=not all_builds)
+    print("Updated {} builds".format(updated))
+    updated = BatchesLogic.backfill_stored_finished(
+        only_missing=not all_builds)
+    print("Updated {} batches".format(updated))
@@ -0,0 +1,31 @@
+"""
+Check the consistency of the materialized pending build queue.
+"""
+
+import click
+from coprs.logic.pending_queue_logic import PendingQueueLogic
+
+
+@click.command()
+@click.option(
+    "--fix/--no-fix",
+    default=False,
+    help="Make the pending_queue table consistent with the Build and "
+         "BuildChroot states.",
+)
+def check_pending_queue(fix):
+    """
+    Compare the pending_queue table with the pending builds, and print the
+    missing, unexpected and outdated tasks.  Needs to be run with --fix right
+    after the pending_queue table is created by database migration.
+    """
+    missing, unexpected, outdated = PendingQueueLogic.check(fix=fix)
+    for title, task_ids in [("Missing", missing),
+                            ("Unexpected", unexpected),
+                            ("Outdated", outdated)]:
+        for task_id in task_ids:
+            print("{} task: {}".format(title, task_id))
+
+    if not fix and (missing or unexpected or outdated):
+        return 1
+    return 0
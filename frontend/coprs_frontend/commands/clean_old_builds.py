@@ -1,15 +1,38 @@
+import time
+
 import click
 from . import deprioritize_actions
 from coprs import db_session_scope
 from coprs.logic.builds_logic import BuildsLogic
 
 
+def print_progress(done, total):
+    """
+    Report the progress of BuildsLogic.delete_builds_in_bulk()
+    """
+    print("Deleted {} of {} builds".format(done, total))
+
+
 @click.command()
+@click.option(
+    "--dry-run", is_flag=True, default=False,
+    help="Do all the work, but roll back the transactions at the end (so no "
+         "build is deleted), and print how long it took.",
+)
+@click.option(
+    "--chunk-size", type=int, default=1000, show_default=True,
+    help="Number of builds deleted (and committed) at once.",
+)
 @deprioritize_actions
-def clean_old_builds():
+def clean_old_builds(dry_run, chunk_size):
     """
     This garbage collects all builds which are "obsoleted" per user
     configuration, per models.Package.max_builds configuration.
     """
+    start = time.time()
     with db_session_scope():
-        BuildsLogic.clean_old_builds()
+        deleted = BuildsLogic.clean_old_builds(chunk_size, dry_run,
+                                               print_progress)
+    if dry_run:
+        print("Would delete {} builds, took {:.2f}s".format(
+            deleted, time.time() - start))
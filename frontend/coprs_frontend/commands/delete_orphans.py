@@ -1,12 +1,30 @@
+import time
+
 import click
 from coprs.logic.builds_logic import BuildsLogic
 from coprs.logic.packages_logic import PackagesLogic
+from .clean_old_builds import print_progress
 
 
 @click.command()
-def delete_orphans():
+@click.option(
+    "--dry-run", is_flag=True, default=False,
+    help="Do all the work for builds, but roll back the transactions at the "
+         "end (so nothing is deleted), and print how long it took.",
+)
+@click.option(
+    "--chunk-size", type=int, default=1000, show_default=True,
+    help="Number of builds deleted (and committed) at once.",
+)
+def delete_orphans(dry_run, chunk_size):
     """
     Deletes builds and packages associated to deleted coprs.
     """
-    BuildsLogic.delete_orphaned_builds()
+    start = time.time()
+    deleted = BuildsLogic.delete_orphaned_builds(chunk_size, dry_run,
+                                                 print_progress)
+    if dry_run:
+        print("Would delete {} builds, took {:.2f}s".format(
+            deleted, time.time() - start))
+        return
     PackagesLogic.delete_orphaned_packages()
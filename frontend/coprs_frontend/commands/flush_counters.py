@@ -0,0 +1,11 @@
+import click
+from coprs.logic.stat_logic import CounterStatLogic
+
+
+@click.command()
+def flush_counters():
+    """
+    Merge the download counters collected in Redis into the database.
+    """
+    updated = CounterStatLogic.flush_pending()
+    print("Updated {} counters".format(updated))
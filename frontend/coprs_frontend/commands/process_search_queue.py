@@ -0,0 +1,47 @@
+"""
+The background indexer, updates the queued project search documents.
+"""
+
+import time
+
+import click
+from sqlalchemy.exc import SQLAlchemyError
+from coprs import app
+from coprs import db
+from coprs.logic.search_logic import CoprSearchLogic
+
+
+@click.command()
+@click.option(
+    "--batch-size", type=int, default=1000, show_default=True,
+    help="Number of queued updates processed (and committed) at once.",
+)
+@click.option(
+    "--loop", is_flag=True, default=False,
+    help="Keep processing the queue until killed.",
+)
+@click.option(
+    "--sleep", type=int, default=5, show_default=True,
+    help="Seconds to wait for new updates when the queue is empty (--loop).",
+)
+def process_search_queue(batch_size, loop, sleep):
+    """
+    Update the full-text search documents of the projects queued by the
+    Copr, Package and CoprChroot changes.
+    """
+    while True:
+        try:
+            processed = CoprSearchLogic.process_queue(batch_size)
+        except SQLAlchemyError:
+            if not loop:
+                raise
+            # e.g. a serialization failure, the queue is retried later
+            db.session.rollback()
+            app.logger.exception("Failed to process the search queue")
+            processed = 0
+        db.session.remove()
+        if processed or not loop:
+            print("Processed {} queued search updates".format(processed))
+        if not loop:
+            return
+        time.sleep(sleep)
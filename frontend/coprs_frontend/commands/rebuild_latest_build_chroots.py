@@ -0,0 +1,17 @@
+"""
+Fill the latest_build_chroot table.
+"""
+
+import click
+from coprs.logic.builds_logic import BuildsMonitorLogic
+
+
+@click.command()
+def rebuild_latest_build_chroots():
+    """
+    Re-calculate the latest BuildChroots (used by the project monitor) for all
+    the packages in all the projects.  Needs to be run right after the
+    latest_build_chroot table is created by database migration.
+    """
+    processed = BuildsMonitorLogic.rebuild_latest_build_chroots()
+    print("Processed {} project directories".format(processed))
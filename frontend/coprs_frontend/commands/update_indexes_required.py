@@ -1,12 +1,12 @@
 import sys
 import click
-from coprs.whoosheers import WhoosheeStamp
+from coprs.logic.search_logic import CoprSearchLogic
 
 @click.command()
 def update_indexes_required():
     """
-    Is whooshee indexes rebuild required?
+    Is the full-text search documents rebuild required?
     """
-    valid = WhoosheeStamp.is_valid()
+    valid = CoprSearchLogic.is_complete()
     print("no" if valid else "yes")
     sys.exit(int(not valid))
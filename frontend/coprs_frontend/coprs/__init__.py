@@ -12,7 +12,6 @@ try:
 except ImportError:
     from flask_cache import Cache
 from flask_openid import OpenID
-from flask_whooshee import Whooshee
 from openid_teams.teams import TeamsResponse
 
 from coprs.redis_session import RedisSessionInterface
@@ -50,8 +49,6 @@ def db_session_scope():
         session.rollback()
         raise
 
-whooshee = Whooshee(app)
-
 profiler_enabled = bool(app.config.get('PROFILER', False))
 try:
     # needs to be installed using pip3
@@ -83,7 +80,6 @@ def setup_profiler(flask_app, enabled):
 import coprs.filters
 import coprs.log
 from coprs.log import setup_log
-import coprs.whoosheers
 
 from coprs.helpers import RedisConnectionProvider
 rcp = RedisConnectionProvider(config=app.config)
@@ -191,9 +187,6 @@ app.register_blueprint(rest_api_bp, url_prefix=URL_PREFIX)
 # register_api(app, db)
 setup_profiler(app, profiler_enabled)
 
-from flask_sqlalchemy import models_committed
-models_committed.connect(coprs.whoosheers.CoprWhoosheer.on_commit, sender=app)
-
 # Serve static files from system-wide RPM files
 @app.route('/system_static/<component>/<path:filename>')
 @app.route('/system_static/<path:filename>')
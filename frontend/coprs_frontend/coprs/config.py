@@ -7,7 +7,6 @@ class Config(object):
     DATA_DIR = os.path.join(os.path.dirname(__file__), "../../data")
     DATABASE = os.path.join(DATA_DIR, "copr.db")
     OPENID_STORE = os.path.join(DATA_DIR, "openid_store")
-    WHOOSHEE_DIR = os.path.join(DATA_DIR, "whooshee")
     SECRET_KEY = "THISISNOTASECRETATALL"
     BACKEND_PASSWORD = "thisisbackend"
     BACKEND_BASE_URL = "http://copr-be-dev.cloud.fedoraproject.org"
@@ -138,9 +137,42 @@ class Config(object):
     CACHE_REDIS_DB = 1  # we use 0 for sessions
     CACHE_KEY_PREFIX = "copr_cache_"
 
+    # For how long (in seconds) the actions claimed by the Backend action
+    # processor are not offered to other processors, see
+    # ActionsLogic.claim_waiting()
+    ACTION_LEASE_SECONDS = 3600
+
+    # The finished builds are moved to the archive tables after this time, see
+    # the 'archive-builds' command
+    ARCHIVE_BUILDS_AFTER_DAYS = 2 * 365
+
     # Default value for temporary projects
     DELETE_AFTER_DAYS = 60
 
+    # How many builds can be queried by one /api_3/build/states/ request
+    BUILD_STATES_MAX_IDS = 500
+
+    # How many builds can be submitted by one /api_3/build/create/bulk request
+    BUILD_CREATE_BULK_MAX = 10000
+
+    # How many builds can be watched by one /api_3/build/events/ stream
+    BUILD_EVENTS_MAX_IDS = 10000
+
+    # The /api_3/build/events/ stream sends a keep-alive comment if there was
+    # no event for this long (seconds), and it is closed after
+    # BUILD_EVENTS_MAX_SECONDS (the clients re-connect), so the long-lived
+    # connections don't occupy the frontend processes forever
+    BUILD_EVENTS_KEEPALIVE = 15
+    BUILD_EVENTS_MAX_SECONDS = 3600
+
+    # Each open /api_3/build/events/ stream occupies one frontend worker
+    # (thread), so only this many streams may be open at the same time, and
+    # only BUILD_EVENTS_MAX_STREAMS_PER_USER by one (authenticated) user.  The
+    # other clients get 503 and poll the /api_3/build/states/ instead.  Raise
+    # the total only if the route is served by a dedicated WSGI process group.
+    BUILD_EVENTS_MAX_STREAMS = 2
+    BUILD_EVENTS_MAX_STREAMS_PER_USER = 1
+
     # Turn-on the in-code checkpoints (additional logging info output).  See the
     # 'measure.py' module for more info.
     DEBUG_CHECKPOINTS = False
@@ -168,7 +200,6 @@ class UnitTestConfig(Config):
     CSRF_ENABLED = False
     DATABASE = os.path.abspath("tests/data/copr.db")
     OPENID_STORE = os.path.abspath("tests/data/openid_store")
-    WHOOSHEE_DIR = os.path.abspath("tests/data/whooshee")
 
     # SQLAlchemy
     SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.abspath(DATABASE)
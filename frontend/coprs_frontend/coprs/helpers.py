@@ -16,6 +16,7 @@ import html5_parser
 import flask
 from flask import url_for
 from redis import StrictRedis
+from sqlalchemy import inspect
 from sqlalchemy.types import TypeDecorator, VARCHAR
 from sqlalchemy.engine.default import DefaultDialect
 from sqlalchemy.sql.sqltypes import String, DateTime, NullType
@@ -793,6 +794,38 @@ def clone_sqlalchemy_instance(instance, ignored=None):
     return new_instance
 
 
+def changed(obj, attributes):
+    """
+    True if any of the (column or relationship) attributes of the ORM object
+    has been changed in its session, and not yet flushed
+    """
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def flushed_objects(session, flush_context, model):
+    """
+    Return the (new, dirty, deleted) lists of the model instances in the
+    flushed session, for the after_flush listeners.  The session is scanned
+    only once per flush, the result is shared by all the listeners.
+    """
+    index = flush_context.attributes.get("flushed_objects")
+    if index is None:
+        index = {}
+        for position, objects in enumerate([session.new, session.dirty,
+                                            session.deleted]):
+            for obj in objects:
+                index.setdefault(type(obj), ([], [], []))[position].append(obj)
+        flush_context.attributes["flushed_objects"] = index
+
+    result = ([], [], [])
+    for cls, lists in index.items():
+        if issubclass(cls, model):
+            for position, objects in enumerate(lists):
+                result[position].extend(objects)
+    return result
+
+
 def current_url(**kwargs):
     """
     Generate the same url as is currently processed, but define (or replace) the
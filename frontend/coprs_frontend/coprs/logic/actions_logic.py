@@ -1,15 +1,25 @@
 import json
 import time
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, case, or_
+from sqlalchemy.sql import text
 from sqlalchemy.exc import IntegrityError
 
-from copr_common.enums import ActionTypeEnum, BackendResultEnum
+from copr_common.enums import (
+    ActionTypeEnum,
+    BackendResultEnum,
+    DefaultActionPriorityEnum,
+)
+from coprs import app
 from coprs import db
 from coprs import models
 from coprs import helpers
 from coprs import exceptions
-from .helpers import get_graph_parameters
+from .helpers import (
+    get_graph_buckets_sql,
+    get_graph_parameters,
+    missing_graph_steps,
+)
 
 class ActionsLogic(object):
 
@@ -49,6 +59,77 @@ class ActionsLogic(object):
 
         return query
 
+    @classmethod
+    def priority_expression(cls):
+        """
+        SQL variant of the Action.priority-or-Action.default_priority logic, so
+        the actions can be ordered by their effective priority in the database
+        """
+        action = models.Action
+        default_priority = case(
+            {ActionTypeEnum(name): value for name, value
+             in DefaultActionPriorityEnum.vals.items()},
+            value=action.action_type,
+            else_=0,
+        )
+        return case(
+            (action.priority.isnot(None) & (action.priority != 0),
+             action.priority),
+            else_=default_priority,
+        )
+
+    @classmethod
+    def claim_waiting(cls, limit, lease_seconds=None):
+        """
+        Lease up to `limit` waiting actions (not leased yet, or with an expired
+        lease) for `lease_seconds`, and return the list of the claimed actions
+        ordered by priority.  Concurrent callers never claim the same action,
+        PostgreSQL skips the rows locked by other transactions (FOR UPDATE SKIP
+        LOCKED), other databases update the lease conditionally row by row.
+        """
+        if lease_seconds is None:
+            lease_seconds = app.config["ACTION_LEASE_SECONDS"]
+
+        action = models.Action
+        table = action.__table__
+        now = int(time.time())
+        available = or_(action.lease_expires_on.is_(None),
+                        action.lease_expires_on < now)
+        order = [cls.priority_expression().asc(), action.created_on.asc(),
+                 action.id.asc()]
+        query = (cls.get_waiting()
+                 .filter(available)
+                 .with_entities(action.id)
+                 .order_by(None)
+                 .order_by(*order)
+                 .limit(limit))
+        lease = {"lease_expires_on": now + lease_seconds}
+
+        if db.engine.dialect.name == "postgresql":
+            claimed = [row.id for row in
+                       query.with_for_update(skip_locked=True)]
+            if claimed:
+                db.session.execute(
+                    table.update()
+                    .where(table.c.id.in_(claimed))
+                    .values(**lease))
+        else:
+            claimed = []
+            for row in query.all():
+                result = db.session.execute(
+                    table.update()
+                    .where(table.c.id == row.id)
+                    .where(or_(table.c.lease_expires_on.is_(None),
+                               table.c.lease_expires_on < now))
+                    .values(**lease))
+                if result.rowcount:
+                    claimed.append(row.id)
+
+        db.session.commit()
+        if not claimed:
+            return []
+        return cls.get_by_ids(claimed).order_by(*order).all()
+
     @classmethod
     def get_by_ids(cls, ids):
         """
@@ -392,22 +473,27 @@ class ActionsLogic(object):
         return action
 
     @classmethod
-    def cache_action_graph_data(cls, type, time, waiting, success, failure):
-        result = models.ActionsStatistics.query\
-                .filter(models.ActionsStatistics.stat_type == type)\
-                .filter(models.ActionsStatistics.time == time).first()
-        if result:
-            return
+    def cache_action_graph_data(cls, type, buckets):
+        """
+        Store the not-yet cached (start, waiting, success, failure) BUCKETS, in
+        one transaction.
+        """
+        cached = {
+            row.time for row in
+            models.ActionsStatistics.query
+            .filter(models.ActionsStatistics.stat_type == type)
+            .filter(models.ActionsStatistics.time.in_(
+                [bucket[0] for bucket in buckets]))
+            .with_entities(models.ActionsStatistics.time)
+        }
 
         try:
-            cached_data = models.ActionsStatistics(
-                time = time,
-                stat_type = type,
-                waiting = waiting,
-                success = success,
-                failed = failure
-            )
-            db.session.add(cached_data)
+            db.session.bulk_insert_mappings(models.ActionsStatistics, [
+                {"time": start, "stat_type": type, "waiting": waiting,
+                 "success": success, "failed": failure}
+                for start, waiting, success, failure in buckets
+                if start not in cached
+            ])
             db.session.commit()  # @FIXME We should not commit here
         except IntegrityError: # other process already calculated the graph data and cached it
             db.session.rollback()
@@ -435,6 +521,50 @@ class ActionsLogic(object):
                 .count()
             return result
 
+    @classmethod
+    def get_actions_buckets(cls, first, last, step):
+        """
+        Calculate the get_actions_bucket() numbers for all the graph buckets
+        from the FIRST to the LAST bucket start (by STEP seconds) by a single
+        query.  Return the list of (start, waiting, success, failure) tuples.
+        """
+        query = text(get_graph_buckets_sql() + """
+            SELECT
+                buckets.start AS start,
+                COALESCE(processed.actions, 0) AS waiting,
+                COALESCE(ended.success, 0) AS success,
+                COALESCE(ended.failure, 0) AS failure
+            FROM buckets
+            LEFT JOIN (
+                SELECT buckets.start AS start, COUNT(*) AS actions
+                FROM buckets
+                JOIN action ON (
+                    action.created_on <= buckets.stop
+                    AND (action.ended_on > buckets.start OR action.ended_on IS NULL)
+                )
+                GROUP BY buckets.start
+            ) processed ON processed.start = buckets.start
+            LEFT JOIN (
+                SELECT
+                    buckets.start AS start,
+                    COUNT(CASE WHEN action.result = :success THEN 1 END) AS success,
+                    COUNT(CASE WHEN action.result = :failure THEN 1 END) AS failure
+                FROM buckets
+                JOIN action ON (
+                    action.ended_on <= buckets.stop
+                    AND action.ended_on > buckets.start
+                )
+                GROUP BY buckets.start
+            ) ended ON ended.start = buckets.start
+            ORDER BY buckets.start
+        """)
+
+        res = db.engine.execute(query, first=first, last=last, step=step,
+                                success=BackendResultEnum("success"),
+                                failure=BackendResultEnum("failure"))
+        return [(row.start, row.waiting, row.success, row.failure)
+                for row in res]
+
     @classmethod
     def get_cached_action_data(cls, params):
         data = {
@@ -461,16 +591,14 @@ class ActionsLogic(object):
         cached_data = cls.get_cached_action_data(params)
         for actionType in ["waiting", "success", "failure"]:
             data[BackendResultEnum(actionType)].extend(cached_data[actionType])
-        for i in range(len(data[0]) - 1, params["steps"]):
-            step_start = params["start"] + i * params["step"]
-            step_end = step_start + params["step"]
-            waiting = cls.get_actions_bucket(step_start, step_end, BackendResultEnum("waiting"))
-            success = cls.get_actions_bucket(step_start, step_end, BackendResultEnum("success"))
-            failure = cls.get_actions_bucket(step_start, step_end, BackendResultEnum("failure"))
-            data[0].append(waiting)
-            data[1].append(success)
-            data[2].append(failure)
-            cls.cache_action_graph_data(type, time=step_start, waiting=waiting, success=success, failure=failure)
+        missing = missing_graph_steps(params, len(data[0]) - 1)
+        if missing:
+            buckets = cls.get_actions_buckets(*missing, params["step"])
+            for _, waiting, success, failure in buckets:
+                data[0].append(waiting)
+                data[1].append(success)
+                data[2].append(failure)
+            cls.cache_action_graph_data(type, buckets)
 
         for i in range(params["start"], params["end"], params["step"]):
             data[3].append(time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(i)))
@@ -0,0 +1,230 @@
+"""
+Move the long-finished builds from the build, build_chroot and
+build_chroot_result tables to the *_archive tables, so the hot queries don't
+have to fight with millions of historical rows.  The archived builds can still
+be read by ID, see ArchiveLogic.get_build(), and they are still listed in
+the build lists, see ArchiveLogic.all_builds().
+"""
+
+import time
+
+from sqlalchemy import inspect, select, union_all
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
+
+from coprs import app
+from coprs import db
+from coprs import models
+from coprs.logic.builds_logic import BuildsLogic
+
+
+class ArchiveLogic:
+    """
+    Archived builds are read-only.  They are still listed in the project and
+    package build lists (see all_builds() and load_builds()), but they are not
+    considered by the project monitor.  They still count into the
+    Package.max_builds limit, and they can be deleted (see
+    BuildsLogic.delete_build() and BuildsLogic.clean_old_builds()).
+    """
+
+    # (live table, archive table, the condition for the archived build IDs)
+    TABLES = [
+        (models.BuildChrootResult.__table__,
+         models.build_chroot_result_archive,
+         lambda table, ids: table.c.build_chroot_id.in_(
+             select(models.BuildChroot.__table__.c.id)
+             .where(models.BuildChroot.__table__.c.build_id.in_(ids)))),
+        (models.BuildChroot.__table__,
+         models.build_chroot_archive,
+         lambda table, ids: table.c.build_id.in_(ids)),
+        (models.Build.__table__,
+         models.build_archive,
+         lambda table, ids: table.c.id.in_(ids)),
+    ]
+
+    # (archive table, the condition for the archived build IDs)
+    ARCHIVE_TABLES = [
+        (models.build_chroot_result_archive,
+         lambda table, ids: table.c.build_chroot_id.in_(
+             select(models.build_chroot_archive.c.id)
+             .where(models.build_chroot_archive.c.build_id.in_(ids)))),
+        (models.build_chroot_archive,
+         lambda table, ids: table.c.build_id.in_(ids)),
+        (models.build_archive,
+         lambda table, ids: table.c.id.in_(ids)),
+    ]
+
+    @classmethod
+    def archivable_builds_query(cls, days):
+        """
+        Return the query for IDs of the builds which finished more than `days`
+        ago.  The latest builds of packages (see LatestBuildChroot) are kept.
+        """
+        cutoff = int(time.time()) - days * 24 * 3600
+        build = models.Build
+        build_chroot = models.BuildChroot
+        latest = models.LatestBuildChroot
+        return (
+            db.session.query(build.id)
+            .filter(build.submitted_on < cutoff)
+            .filter(BuildsLogic.finished_condition())
+            .filter(~select(build_chroot.id)
+                    .where(build_chroot.build_id == build.id)
+                    .where(build_chroot.ended_on >= cutoff)
+                    .exists())
+            .filter(~select(latest.build_id)
+                    .where(latest.build_id == build.id)
+                    .exists())
+            .order_by(build.id.asc())
+        )
+
+    @classmethod
+    def archive_builds(cls, days=None, chunk_size=1000, progress=None):
+        """
+        Move the builds finished more than `days` (ARCHIVE_BUILDS_AFTER_DAYS by
+        default) ago to the archive tables, commit after each chunk_size
+        builds.  The optional progress(done, total) callback is called after
+        each chunk.  Return the number of archived builds.
+        """
+        if days is None:
+            days = app.config["ARCHIVE_BUILDS_AFTER_DAYS"]
+        build_ids = [build_id for (build_id,)
+                     in cls.archivable_builds_query(days)]
+        total = len(build_ids)
+        for start in range(0, total, chunk_size):
+            chunk = build_ids[start:start + chunk_size]
+            for table, archive, condition in cls.TABLES:
+                db.session.execute(archive.insert().from_select(
+                    [column.name for column in table.columns],
+                    select(table).where(condition(table, chunk))))
+            for table, _, condition in cls.TABLES:
+                db.session.execute(table.delete().where(
+                    condition(table, chunk)))
+            db.session.commit()
+            if progress:
+                progress(min(start + chunk_size, total), total)
+        return total
+
+    @staticmethod
+    def _load(model, row):
+        """
+        Create a model instance from the archived row, as if it was loaded from
+        the database, but not attached to the session.  Many-to-one relations
+        (e.g. Build.copr or BuildChroot.mock_chroot) can still be loaded.
+        """
+        obj = inspect(model).class_manager.new_instance()
+        for name, value in row._mapping.items():
+            set_committed_value(obj, name, value)
+        db.session().enable_relationship_loading(obj)
+        return obj
+
+    @classmethod
+    def get_build(cls, build_id):
+        """
+        Return the read-only models.Build instance (including the BuildChroots
+        and their results) for the archived build, or None.
+        """
+        builds = cls.get_builds([build_id])
+        return builds[0] if builds else None
+
+    @classmethod
+    def get_builds(cls, build_ids):
+        """
+        Return the list of read-only models.Build instances, see get_build(),
+        for the archived builds from the build_ids list, ordered by ID.  The
+        non-archived IDs are ignored.
+        """
+        if not build_ids:
+            return []
+
+        archive = models.build_archive
+        builds = [cls._load(models.Build, row) for row in db.session.execute(
+            select(archive).where(archive.c.id.in_(build_ids))
+            .order_by(archive.c.id))]
+        if not builds:
+            return []
+
+        chroot_archive = models.build_chroot_archive
+        result_archive = models.build_chroot_result_archive
+        build_chroots = [cls._load(models.BuildChroot, row) for row in
+                         db.session.execute(
+                             select(chroot_archive)
+                             .where(chroot_archive.c.build_id.in_(
+                                 [build.id for build in builds]))
+                             .order_by(chroot_archive.c.id))]
+        results = {}
+        if build_chroots:
+            for row in db.session.execute(
+                    select(result_archive)
+                    .where(result_archive.c.build_chroot_id.in_(
+                        [build_chroot.id for build_chroot in build_chroots]))
+                    .order_by(result_archive.c.id)):
+                results.setdefault(row.build_chroot_id, []).append(
+                    cls._load(models.BuildChrootResult, row))
+
+        build_map = {build.id: build for build in builds}
+        chroots_by_build = {}
+        for build_chroot in build_chroots:
+            build = build_map[build_chroot.build_id]
+            set_committed_value(build_chroot, "build", build)
+            set_committed_value(build_chroot, "results",
+                                results.get(build_chroot.id, []))
+            chroots_by_build.setdefault(build.id, []).append(build_chroot)
+
+        for build in builds:
+            build.archived = True
+            set_committed_value(build, "build_chroots",
+                                chroots_by_build.get(build.id, []))
+        return builds
+
+    @staticmethod
+    def all_builds():
+        """
+        Return the models.Build alias for the union of the build and
+        build_archive tables, to filter, order and paginate the IDs of both the
+        live and the archived builds at once.  Don't load the builds through
+        it, use load_builds() for the IDs.
+        """
+        union = union_all(select(models.Build.__table__),
+                          select(models.build_archive))
+        return aliased(models.Build, union.subquery("all_builds"))
+
+    @classmethod
+    def load_builds(cls, build_ids, query=None):
+        """
+        Return the live builds (loaded by the Build `query`, e.g. with some
+        eager loading options) and the archived builds for the build_ids list,
+        in the same order.  The non-existing IDs are ignored.
+        """
+        if query is None:
+            query = models.Build.query
+        builds = {build.id: build for build in
+                  query.filter(models.Build.id.in_(build_ids))}
+        missing = [build_id for build_id in build_ids
+                   if build_id not in builds]
+        builds.update({build.id: build for build in cls.get_builds(missing)})
+        return [builds[build_id] for build_id in build_ids
+                if build_id in builds]
+
+    @staticmethod
+    def get_build_ids(**columns):
+        """
+        Return the list of IDs of the archived builds matching all the given
+        build_archive column values, e.g. get_build_ids(package_id=1).
+        """
+        archive = models.build_archive
+        query = select(archive.c.id).where(
+            *[archive.c[name] == value for name, value in columns.items()])
+        return [build_id for (build_id,) in db.session.execute(query)]
+
+    @classmethod
+    def delete_builds(cls, build_ids):
+        """
+        Drop the archived builds from the archive tables.  The Backend delete
+        action (for the result directories) needs to be sent separately.
+        """
+        if not build_ids:
+            return
+        for table, condition in cls.ARCHIVE_TABLES:
+            db.session.execute(table.delete().where(
+                condition(table, build_ids)))
@@ -3,12 +3,15 @@ Methods for working with build Batches.
 """
 
 import anytree
+from sqlalchemy import inspect, literal, select
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from coprs import db, cache
-from coprs.helpers import WorkList
-from coprs.models import Batch, Build
+from coprs.helpers import changed, flushed_objects
+from coprs.models import Batch, Build, BuildChroot
 from coprs.exceptions import BadRequest
-import coprs.logic.builds_logic as bl
 
 
 class BatchesLogic:
@@ -51,23 +54,59 @@ class BatchesLogic:
         """
         Query for all still not-finished batches, order by id ASC
         """
-        batches = set()
-        query = bl.BuildsLogic.processing_builds().filter(Build.batch_id.isnot(None))
-        for build in query.all():
-            if build.batch:
-                batches.add(build.batch)
-        return batches
+        return (
+            Batch.query
+            .filter(Batch.stored_finished.is_(False))
+            .filter(Batch.builds.any())
+            .order_by(Batch.id.asc())
+        )
 
     @classmethod
     @cache.memoize(timeout=60)
     def pending_batch_count_cached(cls):
         """
         Return the number of currently processed Batch instances (where at least
-        one build is not yet fully finished).  This is a pretty expensive number
-        and yet we show it on every /stats/ page (and on many others) — that's
-        why we cache it.
+        one build is not yet fully finished).  We show this number on every
+        /stats/ page (and on many others) — that's why we cache it.
         """
-        return len(cls.pending_batches())
+        return cls.pending_batches().count()
+
+    @staticmethod
+    def _chain_cte(batch_ids):
+        """
+        Recursive CTE with (batch_id, id, level) rows, for each of the batch_ids
+        (list or subquery) the batch itself (level 0), and all the transitively
+        blocking batches.
+        """
+        table = Batch.__table__
+        chain = (
+            select(table.c.id.label("batch_id"), table.c.id,
+                   table.c.blocked_by_id, literal(0).label("level"))
+            .where(table.c.id.in_(batch_ids))
+            .cte("batch_chain", recursive=True)
+        )
+        return chain.union_all(
+            select(chain.c.batch_id, table.c.id, table.c.blocked_by_id,
+                   chain.c.level + 1)
+            .where(table.c.id == chain.c.blocked_by_id)
+        )
+
+    @classmethod
+    def blocked_batch_ids(cls, batch_ids):
+        """
+        Return the set of blocked batches (those transitively blocked by any
+        unfinished batch) among the batch_ids (list or subquery), by a single
+        query.
+        """
+        table = Batch.__table__
+        chain = cls._chain_cte(batch_ids)
+        query = (
+            select(chain.c.batch_id).distinct()
+            .where(chain.c.level > 0)
+            .where(table.c.id == chain.c.id)
+            .where(table.c.stored_finished.is_(False))
+        )
+        return {batch_id for (batch_id,) in db.session.execute(query)}
 
     @classmethod
     def pending_batch_trees(cls):
@@ -76,24 +115,21 @@ class BatchesLogic:
         dependency batches which are already finished -- and keep them ordered
         in list based on theirs ID and dependencies.
         """
+        chain = cls._chain_cte(
+            cls.pending_batches().with_entities(Batch.id).statement)
+        batches = (
+            Batch.query
+            .filter(Batch.id.in_(select(chain.c.id)))
+            .order_by(Batch.id.asc())
+            .all()
+        )
+
         roots = []
-        node_map = {}
-        def get_mapped_node(batch):
-            if batch.id in node_map:
-                return node_map[batch.id]
-            node_map[batch.id] = anytree.Node(batch)
-            return node_map[batch.id]
-
-        # go through all the batches transitively
-        pending_batches = cls.pending_batches()
-        wl = WorkList(pending_batches)
-        while not wl.empty:
-            batch = wl.pop()
-            node = get_mapped_node(batch)
+        node_map = {batch.id: anytree.Node(batch) for batch in batches}
+        for batch in batches:
+            node = node_map[batch.id]
             if batch.blocked_by_id:
-                parent_node = get_mapped_node(batch.blocked_by)
-                node.parent = parent_node
-                wl.schedule(batch.blocked_by)
+                node.parent = node_map[batch.blocked_by_id]
             else:
                 roots.append(node)
         return roots
@@ -104,12 +140,32 @@ class BatchesLogic:
         Return the batch_with batch_id, and all the transitively blocking
         batches in one list.
         """
-        chain = []
-        batch = Batch.query.get(batch_id)
-        while batch:
-            chain.append(batch)
-            batch = batch.blocked_by
-        return chain
+        chain = cls._chain_cte([batch_id])
+        return (
+            Batch.query
+            .join(chain, chain.c.id == Batch.id)
+            .order_by(chain.c.level.asc())
+            .all()
+        )
+
+    @staticmethod
+    def backfill_stored_finished(only_missing=True):
+        """
+        Re-calculate the Batch.stored_finished column for the not-yet finished
+        batches (or for all of them with only_missing=False).  Return the
+        number of updated batches.
+        """
+        query = Batch.query
+        if only_missing:
+            query = query.filter(Batch.stored_finished.is_(False))
+        updated = 0
+        for batch in query.all():
+            finished = batch.finished_slow
+            if batch.stored_finished != finished:
+                batch.stored_finished = finished
+                updated += 1
+        db.session.commit()
+        return updated
 
     # STILL PENDING
     # =============
@@ -129,3 +185,56 @@ class BatchesLogic:
     # ======
     # => some builds failed
     # => timeout is out
+
+
+# Changes in these attributes may change the Batch.finished_slow value
+BATCH_BUILD_ATTRIBUTES = ["source_status", "canceled", "build_chroots",
+                          "batch", "batch_id"]
+
+
+@listens_for(Session, "after_flush")
+def update_stored_finished(session, flush_context):
+    """
+    Keep the Batch.stored_finished column in sync whenever any of the Builds
+    (or their BuildChroots) in the Batch changes the state, or when the Build
+    is added to (removed from) the Batch.
+    """
+    batches = set()
+    new, dirty, deleted = flushed_objects(session, flush_context, Build)
+    for obj in dirty:
+        if not changed(obj, BATCH_BUILD_ATTRIBUTES):
+            continue
+        # the Build was moved from the old Batch
+        state = inspect(obj)
+        batches.update(state.attrs.batch.history.deleted or [])
+        batches.update(session.get(Batch, batch_id) for batch_id
+                       in state.attrs.batch_id.history.deleted or []
+                       if batch_id)
+        if obj.batch_id:
+            batches.add(obj.batch)
+    for obj in new + deleted:
+        if obj.batch_id:
+            batches.add(obj.batch)
+
+    new, dirty, deleted = flushed_objects(session, flush_context, BuildChroot)
+    for obj in new + [obj for obj in dirty if changed(obj, ["status"])] + \
+            deleted:
+        # BuildChroots may be created with the foreign keys only
+        build = obj.build or session.get(Build, obj.build_id)
+        if build is not None and build.batch_id:
+            batches.add(build.batch)
+
+    table = Batch.__table__
+    for batch in batches:
+        if batch is None or batch in session.deleted:
+            continue
+        if batch not in session.new:
+            # the Builds might be added or removed
+            session.expire(batch, ["builds"])
+        finished = batch.finished_slow
+        if finished == batch.stored_finished:
+            continue
+        session.connection().execute(
+            table.update().where(table.c.id == batch.id)
+            .values(stored_finished=finished))
+        set_committed_value(batch, "stored_finished", finished)
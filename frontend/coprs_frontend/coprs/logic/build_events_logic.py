@@ -0,0 +1,207 @@
+"""
+Publish the Build and BuildChroot state changes to the Redis pub/sub channels,
+so the API clients can watch the builds without polling, see the
+/api_3/build/events/ route.
+"""
+
+import json
+import time
+import uuid
+
+from redis.exceptions import RedisError
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session
+
+from copr_common.enums import StatusEnum
+from coprs import app
+from coprs import models
+from coprs import rcp
+from coprs.helpers import changed, flushed_objects
+
+
+# All the channel names start with this prefix
+CHANNEL_PREFIX = "build_events:"
+
+# Sorted set of the open streams, scored by their deadlines, and the same
+# per-user sets with this prefix
+STREAMS_KEY = "build_events_streams"
+
+
+class BuildEventsLogic:
+    """
+    Every state change is published (after the database commit) as a JSON
+    event {"build_id": ..., "chroot": ..., "state": ...} into three channels,
+    one for the build, one for its project and one for its submitter.  The
+    "chroot" is None for the Build state changes.
+    """
+
+    @staticmethod
+    def channels(build_ids=None, ownername=None, projectname=None,
+                 username=None):
+        """
+        Return the list of channel names to subscribe to
+        """
+        channels = [CHANNEL_PREFIX + "build:{}".format(build_id)
+                    for build_id in build_ids or []]
+        if ownername and projectname:
+            channels.append(CHANNEL_PREFIX + "project:{}/{}".format(
+                ownername, projectname))
+        if username:
+            channels.append(CHANNEL_PREFIX + "user:{}".format(username))
+        return channels
+
+    @classmethod
+    def event(cls, build_id, chroot_name, status, copr, user):
+        """
+        Return the (channels, event) pair describing the new state of the Build
+        (chroot_name=None) or of its BuildChroot.  The copr and user (the
+        submitter, may be None) are the build's models.Copr and models.User.
+        """
+        event = {
+            "build_id": build_id,
+            "chroot": chroot_name,
+            "state": StatusEnum(status),
+        }
+        channels = cls.channels(
+            build_ids=[build_id],
+            ownername=copr.owner_name,
+            projectname=copr.name,
+            username=user.name if user else None)
+        return channels, event
+
+    @staticmethod
+    def add(session, events):
+        """
+        Publish the (channels, event) pairs once the session commits
+        """
+        session.info.setdefault("build_events", []).extend(events)
+
+    @staticmethod
+    def publish(events):
+        """
+        Publish the (channels, event) pairs right now
+        """
+        pipeline = rcp.get_connection().pipeline(transaction=False)
+        for channels, event in events:
+            message = json.dumps(event)
+            for channel in channels:
+                pipeline.publish(channel, message)
+        pipeline.execute()
+
+    @staticmethod
+    def subscribe(channels):
+        """
+        Return the Redis PubSub object subscribed to the given channels
+        """
+        pubsub = rcp.get_connection().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(*channels)
+        return pubsub
+
+    @staticmethod
+    def open_stream(deadline, limit, user_limit, username):
+        """
+        Register a new stream which is closed at the latest at the deadline
+        (timestamp).  Return the stream ID, or None if there are already limit
+        streams open in total, or user_limit streams open by the user.
+        Streams of the killed processes are forgotten after their deadline.
+        """
+        connection = rcp.get_connection()
+        stream_id = str(uuid.uuid4())
+        keys = [STREAMS_KEY, _user_streams_key(username)]
+        pipeline = connection.pipeline()
+        for key in keys:
+            pipeline.zremrangebyscore(key, "-inf", time.time())
+            pipeline.zadd(key, {stream_id: deadline})
+            pipeline.zcard(key)
+        pipeline.expireat(keys[1], int(deadline) + 1)
+        result = pipeline.execute()
+        if result[2] <= limit and result[5] <= user_limit:
+            return stream_id
+        for key in keys:
+            connection.zrem(key, stream_id)
+        return None
+
+    @staticmethod
+    def close_stream(stream_id, username):
+        """
+        The stream opened by open_stream() is closed
+        """
+        connection = rcp.get_connection()
+        connection.zrem(STREAMS_KEY, stream_id)
+        connection.zrem(_user_streams_key(username), stream_id)
+
+
+def _user_streams_key(username):
+    return STREAMS_KEY + ":user:" + username
+
+
+def _related(session, obj, relationship, model):
+    """
+    The objects may be created with the foreign keys only (e.g. when forking),
+    so load the related object by its ID if needed
+    """
+    related = getattr(obj, relationship)
+    foreign_key = getattr(obj, relationship + "_id")
+    if related is None and foreign_key is not None:
+        related = session.get(model, foreign_key)
+    return related
+
+
+def _build_event(session, build, chroot_name, status):
+    return BuildEventsLogic.event(
+        build.id, chroot_name, status,
+        _related(session, build, "copr", models.Copr),
+        _related(session, build, "user", models.User))
+
+
+@listens_for(Session, "after_flush")
+def collect_build_events(session, flush_context):
+    """
+    Remember the flushed Build and BuildChroot state changes
+    """
+    events = []
+    new, dirty, _ = flushed_objects(session, flush_context, models.Build)
+    for obj in new + [obj for obj in dirty if changed(obj, ["stored_status"])]:
+        if obj.stored_status is None:
+            continue
+        events.append(_build_event(session, obj, None, obj.stored_status))
+
+    new, dirty, _ = flushed_objects(session, flush_context, models.BuildChroot)
+    for obj in new + [obj for obj in dirty if changed(obj, ["status"])]:
+        if obj.status is None:
+            continue
+        build = _related(session, obj, "build", models.Build)
+        mock_chroot = _related(session, obj, "mock_chroot", models.MockChroot)
+        events.append(_build_event(session, build, mock_chroot.name,
+                                   obj.status))
+    if events:
+        # session.new and session.dirty are unordered sets, publish the build
+        # state before its chroot states
+        events.sort(key=lambda item: (item[1]["build_id"],
+                                      item[1]["chroot"] is not None,
+                                      item[1]["chroot"] or ""))
+        BuildEventsLogic.add(session, events)
+
+
+@listens_for(Session, "after_commit")
+def publish_build_events(session):
+    """
+    Publish the events only after the change is visible to others
+    """
+    events = session.info.pop("build_events", None)
+    if not events:
+        return
+    try:
+        BuildEventsLogic.publish(events)
+    except RedisError:
+        # The change is committed already, don't fail the request.  The
+        # streaming clients get the current states when they re-connect.
+        app.logger.exception("Can't publish %s build events", len(events))
+
+
+@listens_for(Session, "after_rollback")
+def forget_build_events(session):
+    """
+    Nothing happened after all
+    """
+    session.info.pop("build_events", None)
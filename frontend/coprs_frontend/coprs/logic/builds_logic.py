@@ -5,11 +5,18 @@ import os
 import pprint
 import time
 import requests
+from itertools import groupby
 
 from sqlalchemy.sql import text
 from sqlalchemy.sql.expression import not_
-from sqlalchemy.orm import joinedload, selectinload, load_only, contains_eager
-from sqlalchemy import func, desc, or_, and_
+from sqlalchemy.orm import (
+    Session, joinedload, selectinload, load_only, contains_eager,
+)
+from sqlalchemy.event import listens_for
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy import (
+    func, desc, or_, and_, select, literal_column, null, union_all,
+)
 from sqlalchemy.sql import false,true
 from werkzeug.utils import secure_filename
 from sqlalchemy import bindparam, Integer, String
@@ -42,7 +49,11 @@ from coprs.logic.packages_logic import PackagesLogic
 from coprs.logic.batches_logic import BatchesLogic
 from coprs.measure import checkpoint
 
-from .helpers import get_graph_parameters
+from .helpers import (
+    get_graph_buckets_sql,
+    get_graph_parameters,
+    missing_graph_steps,
+)
 log = app.logger
 
 
@@ -200,6 +211,58 @@ class BuildsLogic(object):
 
         return data
 
+    @classmethod
+    def get_jobs_buckets(cls, first, last, step, with_pending=True):
+        """
+        Calculate the get_pending_jobs_bucket() and get_running_jobs_bucket()
+        numbers for all the graph buckets from the FIRST to the LAST bucket
+        start (by STEP seconds), by a single query.  Return the list of
+        (start, pending, running) tuples.  The pending numbers are not
+        calculated (zero) with with_pending=False.
+        """
+        pending_query = """
+            SELECT buckets.start AS start, COUNT(*) AS jobs
+            FROM buckets
+            JOIN build_chroot ON (
+                build_chroot.started_on > buckets.start
+                OR (build_chroot.started_on is NULL AND build_chroot.status = :pending)
+            )
+            JOIN build ON build.id = build_chroot.build_id
+            WHERE
+                build.submitted_on < buckets.stop
+                AND NOT build.canceled
+            GROUP BY buckets.start
+        """
+        if not with_pending:
+            pending_query = "SELECT NULL AS start, 0 AS jobs"
+
+        query = text(get_graph_buckets_sql() + """
+            SELECT
+                buckets.start AS start,
+                COALESCE(pending.jobs, 0) AS pending,
+                COALESCE(running.jobs, 0) AS running
+            FROM buckets
+            LEFT JOIN ({pending_query}) pending ON pending.start = buckets.start
+            LEFT JOIN (
+                SELECT buckets.start AS start, COUNT(*) AS jobs
+                FROM buckets
+                JOIN build_chroot ON (
+                    build_chroot.started_on < buckets.stop
+                    AND (
+                        build_chroot.ended_on > buckets.start
+                        OR (build_chroot.ended_on is NULL AND build_chroot.status = :running)
+                    )
+                )
+                GROUP BY buckets.start
+            ) running ON running.start = buckets.start
+            ORDER BY buckets.start
+        """.format(pending_query=pending_query))
+
+        res = db.engine.execute(query, first=first, last=last, step=step,
+                                pending=StatusEnum("pending"),
+                                running=StatusEnum("running"))
+        return [(row.start, row.pending, row.running) for row in res]
+
     @classmethod
     def get_task_graph_data(cls, type):
         data = [["pending"], ["running"], ["avg running"], ["time"]]
@@ -208,14 +271,13 @@ class BuildsLogic(object):
         data[0].extend(cached_data["pending"])
         data[1].extend(cached_data["running"])
 
-        for i in range(len(data[0]) - 1, params["steps"]):
-            step_start = params["start"] + i * params["step"]
-            step_end = step_start + params["step"]
-            pending = cls.get_pending_jobs_bucket(step_start, step_end)
-            running = cls.get_running_jobs_bucket(step_start, step_end)
-            data[0].append(pending)
-            data[1].append(running)
-            cls.cache_graph_data(type, time=step_start, pending=pending, running=running)
+        missing = missing_graph_steps(params, len(cached_data["running"]))
+        if missing:
+            buckets = cls.get_jobs_buckets(*missing, params["step"])
+            for _, pending, running in buckets:
+                data[0].append(pending)
+                data[1].append(running)
+            cls.cache_graph_data(type, buckets)
 
         running_total = 0
         for i in range(1, params["steps"] + 1):
@@ -235,31 +297,37 @@ class BuildsLogic(object):
         cached_data = cls.get_cached_graph_data(params)
         data[0].extend(cached_data["running"])
 
-        for i in range(len(data[0]) - 1, params["steps"]):
-            step_start = params["start"] + i * params["step"]
-            step_end = step_start + params["step"]
-            running = cls.get_running_jobs_bucket(step_start, step_end)
-            data[0].append(running)
-            cls.cache_graph_data(type, time=step_start, running=running)
+        missing = missing_graph_steps(params, len(cached_data["running"]))
+        if missing:
+            buckets = cls.get_jobs_buckets(*missing, params["step"],
+                                           with_pending=False)
+            data[0].extend(running for _, _, running in buckets)
+            cls.cache_graph_data(type, buckets)
 
         return data
 
     @classmethod
-    def cache_graph_data(cls, type, time, pending=0, running=0):
-        result = models.BuildsStatistics.query\
-                .filter(models.BuildsStatistics.stat_type == type)\
-                .filter(models.BuildsStatistics.time == time).first()
-        if result:
-            return
+    def cache_graph_data(cls, type, buckets):
+        """
+        Store the not-yet cached (start, pending, running) BUCKETS, in one
+        transaction.
+        """
+        cached = {
+            row.time for row in
+            models.BuildsStatistics.query
+            .filter(models.BuildsStatistics.stat_type == type)
+            .filter(models.BuildsStatistics.time.in_(
+                [start for start, _, _ in buckets]))
+            .with_entities(models.BuildsStatistics.time)
+        }
 
         try:
-            cached_data = models.BuildsStatistics(
-                time = time,
-                stat_type = type,
-                running = running,
-                pending = pending
-            )
-            db.session.add(cached_data)
+            db.session.bulk_insert_mappings(models.BuildsStatistics, [
+                {"time": start, "stat_type": type, "pending": pending,
+                 "running": running}
+                for start, pending, running in buckets
+                if start not in cached
+            ])
             db.session.commit()
         except IntegrityError: # other process already calculated the graph data and cached it
             db.session.rollback()
@@ -378,6 +446,117 @@ class BuildsLogic(object):
             query = query.filter(models.Build.is_background == (true() if background else false()))
         return query
 
+    @classmethod
+    def get_status_tasks(cls, state, background=None):
+        """
+        Return the (sub)query of the tasks in the given state ("importing",
+        "pending", "starting" or "running") for the /status/ pages, both the
+        RPM (BuildChroot) and SRPM (Build) tasks.  The rows are just
+        (task_type, build_chroot_id, build_id, time), use load_status_tasks()
+        to get the objects.  The background tasks are selected by the
+        background argument (None means both).
+        """
+        rpm_query = None
+        rpm_time = models.Build.submitted_on
+        if state == "importing":
+            srpm_query = cls.get_build_importing_queue(background=background)
+        elif state == "pending":
+            rpm_query = cls.get_pending_build_tasks(background=background)
+            srpm_query = cls.get_pending_srpm_build_tasks(background=background)
+        else:
+            status = StatusEnum(state)
+            rpm_query = cls.get_build_tasks(status, background=background)
+            srpm_query = cls.get_srpm_build_tasks(status, background=background)
+            if state == "running":
+                rpm_time = models.BuildChroot.started_on
+
+        queries = [srpm_query.order_by(None).with_entities(
+            literal_column("'srpm'").label("task_type"),
+            null().label("build_chroot_id"),
+            models.Build.id.label("build_id"),
+            models.Build.submitted_on.label("time"),
+        )]
+        if rpm_query is not None:
+            queries.append(rpm_query.order_by(None).with_entities(
+                literal_column("'rpm'").label("task_type"),
+                models.BuildChroot.id.label("build_chroot_id"),
+                models.Build.id.label("build_id"),
+                rpm_time.label("time"),
+            ))
+        return union_all(*[query.statement for query in queries]).subquery()
+
+    @staticmethod
+    def status_tasks_order(tasks):
+        """
+        The newest tasks first, for get_status_tasks() output.
+        """
+        return (tasks.c.time.desc(), tasks.c.build_id.desc(),
+                tasks.c.build_chroot_id.desc())
+
+    @staticmethod
+    def load_status_tasks(rows):
+        """
+        Load the objects for the get_status_tasks() rows (by two queries), and
+        return the list of (task_type, time, task) tuples, where task is either
+        BuildChroot or Build.
+        """
+        bch_ids = [row.build_chroot_id for row in rows if row.task_type == "rpm"]
+        build_ids = [row.build_id for row in rows if row.task_type == "srpm"]
+
+        build_options = [
+            joinedload("copr").options(joinedload("user"), joinedload("group")),
+            joinedload("package"),
+        ]
+
+        objects = {}
+        if bch_ids:
+            query = models.BuildChroot.query.filter(
+                models.BuildChroot.id.in_(bch_ids)).options(
+                    joinedload("mock_chroot"),
+                    joinedload("build").options(*build_options))
+            objects.update((("rpm", bch.id), bch) for bch in query)
+        if build_ids:
+            query = models.Build.query.filter(
+                models.Build.id.in_(build_ids)).options(*build_options)
+            objects.update((("srpm", build.id), build) for build in query)
+
+        return [
+            (row.task_type, row.time, objects[(
+                row.task_type,
+                row.build_chroot_id if row.task_type == "rpm" else row.build_id,
+            )])
+            for row in rows
+        ]
+
+    @classmethod
+    def get_pending_overview(cls):
+        """
+        Count the pending tasks (both the foreground and background ones), per
+        project, mock chroot, and priority.  Return the list of (copr_id,
+        mock_chroot_id, is_background, count) rows, mock_chroot_id is None for
+        the SRPM tasks.
+        """
+        pending = StatusEnum("pending")
+        rpm_query = (
+            db.session.query(models.Build.copr_id,
+                             models.BuildChroot.mock_chroot_id,
+                             models.Build.is_background, func.count())
+            .select_from(models.BuildChroot)
+            .join(models.Build)
+            .filter(models.Build.canceled == false())
+            .filter(models.BuildChroot.status == pending)
+            .group_by(models.Build.copr_id, models.BuildChroot.mock_chroot_id,
+                      models.Build.is_background)
+        )
+        srpm_query = (
+            db.session.query(models.Build.copr_id, null(),
+                             models.Build.is_background, func.count())
+            .filter(models.Build.canceled == false())
+            .filter(models.Build.source_status == pending)
+            .group_by(models.Build.copr_id, models.Build.is_background)
+        )
+        return rpm_query.all() + srpm_query.all()
+
     @classmethod
     def get_build_task(cls, task_id):
         try:
@@ -419,6 +598,36 @@ class BuildsLogic(object):
         query = query.options(selectinload('build_chroots'), selectinload('package'))
         return query
 
+    @classmethod
+    def get_copr_build_ids(cls, copr, dirname=None):
+        """
+        Return the query for IDs of both the live and the archived builds in
+        the project (directory), the newest first.  See get_copr_builds_list()
+        and ArchiveLogic.load_builds().
+        """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from coprs.logic.archive_logic import ArchiveLogic
+        build = ArchiveLogic.all_builds()
+        query = db.session.query(build.id).filter(build.copr_id == copr.id)
+        if dirname:
+            copr_dir = coprs_logic.CoprDirsLogic.get_by_copr(copr, dirname)
+            query = query.filter(build.copr_dir_id == copr_dir.id)
+        return query.order_by(build.id.desc())
+
+    @classmethod
+    def get_copr_archived_builds(cls, copr, dirname=None):
+        """
+        Return the read-only archived builds in the project (directory), which
+        are not listed by get_copr_builds_list()
+        """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from coprs.logic.archive_logic import ArchiveLogic
+        columns = {"copr_id": copr.id}
+        if dirname:
+            copr_dir = coprs_logic.CoprDirsLogic.get_by_copr(copr, dirname)
+            columns["copr_dir_id"] = copr_dir.id
+        return ArchiveLogic.get_builds(ArchiveLogic.get_build_ids(**columns))
+
     @classmethod
     def join_group(cls, query):
         return query.join(models.Copr).outerjoin(models.Group)
@@ -432,6 +641,77 @@ class BuildsLogic(object):
                 .filter(models.Copr.name == coprname)
                 .filter(models.User.username == username))
 
+    @classmethod
+    def fingerprint(cls, build_id):
+        """
+        Return a cheap fingerprint of the Build state (the build row and its
+        build_chroot rows) for the conditional GET requests, or None if the
+        build doesn't exist (or is archived).
+        """
+        build = models.Build.__table__
+        build_chroot = models.BuildChroot.__table__
+        row = db.session.execute(
+            select(build).where(build.c.id == build_id)).first()
+        if row is None:
+            return None
+        chroots = db.session.execute(
+            select(build_chroot)
+            .where(build_chroot.c.build_id == build_id)
+            .order_by(build_chroot.c.id))
+        return [list(row), [list(chroot) for chroot in chroots]]
+
+    @classmethod
+    def get_states(cls, build_ids, with_chroots=False):
+        """
+        Return the list of {"id": ..., "state": ...} dicts (optionally with
+        the {chroot_name: state} "chroots" dict) for the existing (and
+        archived) builds from the build_ids list, ordered by ID.  This is one
+        primary-key lookup in the build tables, not the models.Build
+        instances.
+        """
+        mock_chroot = models.MockChroot.__table__
+        selects = []
+        for build, build_chroot in [
+                (models.Build.__table__, models.BuildChroot.__table__),
+                (models.build_archive, models.build_chroot_archive)]:
+            columns = [build.c.id, build.c.stored_status]
+            source = build
+            if with_chroots:
+                columns += [mock_chroot.c.os_release, mock_chroot.c.os_version,
+                            mock_chroot.c.arch, build_chroot.c.status]
+                source = build.outerjoin(
+                    build_chroot, build_chroot.c.build_id == build.c.id) \
+                    .outerjoin(mock_chroot, mock_chroot.c.id ==
+                               build_chroot.c.mock_chroot_id)
+            selects.append(select(*columns).select_from(source)
+                           .where(build.c.id.in_(build_ids)))
+
+        def _state(status):
+            return "unknown" if status is None else StatusEnum(status)
+
+        builds = {}
+        not_backfilled = []
+        for row in db.session.execute(union_all(*selects)):
+            if row.id not in builds:
+                builds[row.id] = {"id": row.id,
+                                  "state": _state(row.stored_status)}
+                if row.stored_status is None:
+                    not_backfilled.append(row.id)
+                if with_chroots:
+                    builds[row.id]["chroots"] = {}
+            if with_chroots and row.arch:
+                name = "{}-{}-{}".format(row.os_release, row.os_version,
+                                         row.arch)
+                builds[row.id]["chroots"][name] = _state(row.status)
+
+        # The stored_status is not yet filled by 'backfill-build-status'
+        if not_backfilled:
+            for build in (models.Build.query
+                          .filter(models.Build.id.in_(not_backfilled))
+                          .options(selectinload("build_chroots"))):
+                builds[build.id]["state"] = build.state
+        return [builds[build_id] for build_id in sorted(builds)]
+
     @classmethod
     def get_by_ids(cls, ids):
         return models.Build.query.filter(models.Build.id.in_(ids))
@@ -474,11 +754,22 @@ class BuildsLogic(object):
 
         :rtype: models.Build
         """
-        source_type = helpers.BuildSourceEnum("link")
-        source_json = json.dumps({"url": url})
-        srpm_url = None if url.endswith('.spec') else url
-        return cls.create_new(user, copr, source_type, source_json, chroot_names,
-                              pkgs=url, srpm_url=srpm_url, copr_dirname=copr_dirname, **build_options)
+        return cls.create_new(user, copr, chroot_names=chroot_names,
+                              copr_dirname=copr_dirname,
+                              **cls.url_source(url), **build_options)
+
+    @staticmethod
+    def url_source(url):
+        """
+        Return the dict with source_type, source_json, pkgs and srpm_url for
+        the build from URL, see create_new()
+        """
+        return {
+            "source_type": helpers.BuildSourceEnum("link"),
+            "source_json": json.dumps({"url": url}),
+            "pkgs": url,
+            "srpm_url": None if url.endswith('.spec') else url,
+        }
 
     @classmethod
     def create_new_from_scm(cls, user, copr, scm_type, clone_url,
@@ -492,14 +783,28 @@ class BuildsLogic(object):
 
         :rtype: models.Build
         """
-        source_type = helpers.BuildSourceEnum("scm")
-        source_json = json.dumps({"type": scm_type,
-                                  "clone_url": clone_url,
-                                  "committish": committish,
-                                  "subdirectory": subdirectory,
-                                  "spec": spec,
-                                  "srpm_build_method": srpm_build_method})
-        return cls.create_new(user, copr, source_type, source_json, chroot_names, copr_dirname=copr_dirname, **build_options)
+        source = cls.scm_source(scm_type, clone_url, committish, subdirectory,
+                                spec, srpm_build_method)
+        return cls.create_new(user, copr, chroot_names=chroot_names,
+                              copr_dirname=copr_dirname, **source,
+                              **build_options)
+
+    @staticmethod
+    def scm_source(scm_type, clone_url, committish='', subdirectory='',
+                   spec='', srpm_build_method='rpkg'):
+        """
+        Return the source_type and source_json dict for the SCM build
+        """
+        # pylint: disable=too-many-arguments
+        return {
+            "source_type": helpers.BuildSourceEnum("scm"),
+            "source_json": json.dumps({"type": scm_type,
+                                       "clone_url": clone_url,
+                                       "committish": committish,
+                                       "subdirectory": subdirectory,
+                                       "spec": spec,
+                                       "srpm_build_method": srpm_build_method}),
+        }
 
     @classmethod
     def create_new_from_pypi(cls, user, copr, pypi_package_name, pypi_package_version, spec_template,
@@ -515,12 +820,26 @@ class BuildsLogic(object):
 
         :rtype: models.Build
         """
-        source_type = helpers.BuildSourceEnum("pypi")
-        source_json = json.dumps({"pypi_package_name": pypi_package_name,
-                                  "pypi_package_version": pypi_package_version,
-                                  "spec_template": spec_template,
-                                  "python_versions": python_versions})
-        return cls.create_new(user, copr, source_type, source_json, chroot_names, copr_dirname=copr_dirname, **build_options)
+        source = cls.pypi_source(pypi_package_name, pypi_package_version,
+                                 spec_template, python_versions)
+        return cls.create_new(user, copr, chroot_names=chroot_names,
+                              copr_dirname=copr_dirname, **source,
+                              **build_options)
+
+    @staticmethod
+    def pypi_source(pypi_package_name, pypi_package_version, spec_template,
+                    python_versions):
+        """
+        Return the source_type and source_json dict for the PyPI build
+        """
+        return {
+            "source_type": helpers.BuildSourceEnum("pypi"),
+            "source_json": json.dumps({
+                "pypi_package_name": pypi_package_name,
+                "pypi_package_version": pypi_package_version,
+                "spec_template": spec_template,
+                "python_versions": python_versions}),
+        }
 
     @classmethod
     def create_new_from_rubygems(cls, user, copr, gem_name, chroot_names=None,
@@ -532,9 +851,19 @@ class BuildsLogic(object):
         :type chroot_names: List[str]
         :rtype: models.Build
         """
-        source_type = helpers.BuildSourceEnum("rubygems")
-        source_json = json.dumps({"gem_name": gem_name})
-        return cls.create_new(user, copr, source_type, source_json, chroot_names, copr_dirname=copr_dirname, **build_options)
+        return cls.create_new(user, copr, chroot_names=chroot_names,
+                              copr_dirname=copr_dirname,
+                              **cls.rubygems_source(gem_name), **build_options)
+
+    @staticmethod
+    def rubygems_source(gem_name):
+        """
+        Return the source_type and source_json dict for the RubyGems build
+        """
+        return {
+            "source_type": helpers.BuildSourceEnum("rubygems"),
+            "source_json": json.dumps({"gem_name": gem_name}),
+        }
 
     @classmethod
     def create_new_from_custom(cls, user, copr, script, script_chroot=None, script_builddeps=None,
@@ -549,16 +878,26 @@ class BuildsLogic(object):
         :type chroot_names: List[str]
         :rtype: models.Build
         """
-        source_type = helpers.BuildSourceEnum("custom")
-        source_dict = {
-            'script': script,
-            'chroot': script_chroot,
-            'builddeps': script_builddeps,
-            'resultdir': script_resultdir,
-        }
+        source = cls.custom_source(script, script_chroot, script_builddeps,
+                                   script_resultdir)
+        return cls.create_new(user, copr, chroot_names=chroot_names,
+                              copr_dirname=copr_dirname, **source, **kwargs)
 
-        return cls.create_new(user, copr, source_type, json.dumps(source_dict),
-                              chroot_names, copr_dirname=copr_dirname, **kwargs)
+    @staticmethod
+    def custom_source(script, script_chroot=None, script_builddeps=None,
+                      script_resultdir=None):
+        """
+        Return the source_type and source_json dict for the custom build
+        """
+        return {
+            "source_type": helpers.BuildSourceEnum("custom"),
+            "source_json": json.dumps({
+                'script': script,
+                'chroot': script_chroot,
+                'builddeps': script_builddeps,
+                'resultdir': script_resultdir,
+            }),
+        }
 
     @classmethod
     def create_new_from_distgit(cls, user, copr, package_name,
@@ -566,15 +905,26 @@ class BuildsLogic(object):
                                 committish=None, chroot_names=None,
                                 copr_dirname=None, **build_options):
         """ Request build of package from DistGit repository """
-        source_type = helpers.BuildSourceEnum("distgit")
+        source = cls.distgit_source(package_name, distgit_name,
+                                    distgit_namespace, committish,
+                                    build_options.get("clone_url"))
+        return cls.create_new(
+            user, copr, chroot_names=chroot_names, copr_dirname=copr_dirname,
+            **source, **build_options)
 
+    @staticmethod
+    def distgit_source(package_name, distgit_name=None, distgit_namespace=None,
+                       committish=None, clone_url=None):
+        """
+        Return the source_type and source_json dict for the DistGit build
+        """
         source_dict = {}
 
-        if "clone_url" in build_options:
+        if clone_url:
             # Even though the DistGit instance is (probably) chosen, use a
             # different clone URL.  If the pattern for this URL isn't configured
             # on the builder side, the build may fail.
-            source_dict["clone_url"] = build_options["clone_url"]
+            source_dict["clone_url"] = clone_url
         else:
             source_dict["clone_url"] = DistGitLogic.get_clone_url(
                     distgit_name, package_name, distgit_namespace)
@@ -582,9 +932,10 @@ class BuildsLogic(object):
         if committish:
             source_dict["committish"] = committish
 
-        return cls.create_new(
-            user, copr, source_type, json.dumps(source_dict), chroot_names,
-            copr_dirname=copr_dirname, **build_options)
+        return {
+            "source_type": helpers.BuildSourceEnum("distgit"),
+            "source_json": json.dumps(source_dict),
+        }
 
     @classmethod
     def create_new_from_upload(cls, user, copr, f_uploader, orig_filename,
@@ -701,6 +1052,136 @@ class BuildsLogic(object):
 
         return build
 
+    @classmethod
+    def create_new_bulk(cls, user, copr, sources, chroot_names=None,
+                        copr_dirname=None, background=False, timeout=None,
+                        **build_options):
+        """
+        Submit many builds into one project at once, the bulk variant of
+        create_new().  The sources are dicts returned by the *_source()
+        methods, e.g. scm_source().  The permissions and chroots are checked
+        only once, and the builds are created by a few bulk INSERT statements
+        (the ORM and its flush listeners are bypassed, so everything they
+        would do has to be done here).  Return the list of new build IDs.
+
+        :type user: models.User
+        :type copr: models.Copr
+        :type chroot_names: List[str]
+        :rtype: List[int]
+        """
+        if not copr.active_copr_chroots:
+            raise BadRequest("Can't create build - project {} has no active chroots".format(copr.full_name))
+        coprs_logic.CoprsLogic.raise_if_unfinished_blocking_action(
+            copr, "Can't build while there is an operation in progress: {action}")
+        users_logic.UsersLogic.raise_if_cant_build_in_copr(
+            user, copr,
+            "You don't have permissions to build in this copr.")
+
+        copr_dir = copr.main_dir
+        if copr_dirname:
+            copr_dir = coprs_logic.CoprDirsLogic.get_or_create(copr, copr_dirname)
+            db.session.flush()
+
+        copr_chroots = [copr_chroot for copr_chroot in copr.active_copr_chroots
+                        if copr_chroot.name in (chroot_names or [])]
+
+        enable_net = build_options.get("enable_net")
+        if enable_net is None:
+            enable_net = copr.build_enable_net
+
+        for source in sources:
+            cls._check_pkgs(source.get("pkgs"))
+
+        now = int(time.time())
+        builds = []
+        for source in sources:
+            source_json = source["source_json"]
+            if source["source_type"] == helpers.BuildSourceEnum("custom"):
+                source_json = models.Build.resolve_custom_chroot(source_json)
+            if copr.fedora_review:
+                source_dict = json.loads(source_json)
+                source_dict["fedora_review"] = True
+                source_json = json.dumps(source_dict)
+
+            builds.append({
+                "user_id": user.id,
+                "copr_id": copr.id,
+                "copr_dir_id": copr_dir.id,
+                "pkgs": source.get("pkgs", ""),
+                "repos": copr.repos,
+                "source_type": source["source_type"],
+                "source_json": source_json,
+                "source_status": StatusEnum("pending"),
+                "stored_status": StatusEnum("pending"),
+                "submitted_on": now,
+                "enable_net": bool(enable_net),
+                "is_background": bool(background),
+                "srpm_url": source.get("srpm_url"),
+                "bootstrap": build_options.get("bootstrap"),
+                "isolation": build_options.get("isolation"),
+                "timeout": timeout or app.config["DEFAULT_BUILD_TIMEOUT"],
+            })
+
+        build_ids = cls._insert_builds(builds)
+        build_chroots = [
+            {"build_id": build_id,
+             "mock_chroot_id": copr_chroot.mock_chroot_id,
+             "copr_chroot_id": copr_chroot.id,
+             "status": StatusEnum("waiting")}
+            for build_id in build_ids for copr_chroot in copr_chroots
+        ]
+
+        if build_chroots:
+            db.session.execute(models.BuildChroot.__table__.insert(),
+                               build_chroots)
+
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from coprs.logic.pending_queue_logic import PendingQueueLogic
+        from coprs.logic.build_events_logic import BuildEventsLogic
+        PendingQueueLogic.add_tasks(build_ids)
+
+        events = []
+        for build_id in build_ids:
+            events.append(BuildEventsLogic.event(
+                build_id, None, StatusEnum("pending"), copr, user))
+            events.extend(
+                BuildEventsLogic.event(build_id, copr_chroot.name,
+                                       StatusEnum("waiting"), copr, user)
+                for copr_chroot in copr_chroots)
+        BuildEventsLogic.add(db.session(), events)
+        return build_ids
+
+    @staticmethod
+    def _insert_builds(builds):
+        """
+        INSERT the build rows (dicts) and return their new IDs, in order
+        """
+        if not builds:
+            return []
+        table = models.Build.__table__
+        if db.engine.dialect.name == "postgresql":
+            # One statement, the IDs are taken from the sequence.  RETURNING
+            # doesn't guarantee the order of rows, so set the IDs explicitly.
+            build_ids = [build_id for (build_id,) in db.session.execute(
+                text("SELECT nextval(pg_get_serial_sequence('build', 'id')) "
+                     "FROM generate_series(1, :count)"),
+                {"count": len(builds)})]
+            db.session.execute(table.insert(), [
+                dict(build, id=build_id)
+                for build_id, build in zip(build_ids, builds)])
+            return build_ids
+        # No sequences (SQLite in the test-suite), let the database assign
+        # the IDs one row at a time
+        return [db.session.execute(table.insert(), build).inserted_primary_key[0]
+                for build in builds]
+
+    @staticmethod
+    def _check_pkgs(pkgs):
+        # todo: eliminate pkgs and this check
+        if pkgs and (" " in pkgs or "\n" in pkgs or "\t" in pkgs or pkgs.strip() != pkgs):
+            raise MalformedArgumentException("Trying to create a build using src_pkg "
+                                                        "with bad characters. Forgot to split?")
+
     @classmethod
     def _setup_batch(cls, batch, after_build_id, with_build_id, user):
         # those three are exclusive!
@@ -805,10 +1286,7 @@ class BuildsLogic(object):
         if not repos:
             repos = copr.repos
 
-        # todo: eliminate pkgs and this check
-        if pkgs and (" " in pkgs or "\n" in pkgs or "\t" in pkgs or pkgs.strip() != pkgs):
-            raise MalformedArgumentException("Trying to create a build using src_pkg "
-                                                        "with bad characters. Forgot to split?")
+        cls._check_pkgs(pkgs)
 
         # just temporary to keep compatibility
         if not source_type or not source_json:
@@ -1162,6 +1640,12 @@ class BuildsLogic(object):
         if send_delete_action:
             ActionsLogic.send_delete_build(build)
 
+        if build.archived:
+            # pylint: disable=import-outside-toplevel,cyclic-import
+            from coprs.logic.archive_logic import ArchiveLogic
+            ArchiveLogic.delete_builds([build.id])
+            return
+
         db.session.delete(build)
 
     @classmethod
@@ -1172,12 +1656,17 @@ class BuildsLogic(object):
         :type user: models.User
         :type build_ids: list of Int
         """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from coprs.logic.archive_logic import ArchiveLogic
+
         to_delete = []
         no_permission = []
         still_running = []
 
         build_ids = set(build_ids)
-        builds = cls.get_by_ids(build_ids)
+        builds = cls.get_by_ids(build_ids).all()
+        builds += ArchiveLogic.get_builds(
+            sorted(build_ids - {build.id for build in builds}))
         for build in builds:
             try:
                 cls.check_build_to_delete(user, build)
@@ -1206,7 +1695,11 @@ class BuildsLogic(object):
         if to_delete:
             ActionsLogic.send_delete_multiple_builds(to_delete)
 
+        ArchiveLogic.delete_builds(
+            [build.id for build in to_delete if build.archived])
         for build in to_delete:
+            if build.archived:
+                continue
             for build_chroot in build.build_chroots:
                 db.session.delete(build_chroot)
 
@@ -1260,58 +1753,258 @@ class BuildsLogic(object):
         return query.filter(models.Group.name == group_name)
 
     @classmethod
-    def filter_by_package_name(cls, query, package_name):
-        return query.join(models.Package).filter(models.Package.name == package_name)
+    def filter_by_package_name(cls, query, package_name, build=models.Build):
+        """
+        Filter the `build` entity (models.Build or its alias, e.g.
+        ArchiveLogic.all_builds()) by the package name
+        """
+        return query.join(build.package).filter(models.Package.name == package_name)
+
+    @classmethod
+    def filter_by_status(cls, query, status, build=models.Build):
+        """
+        Filter the builds by the textual Build.state, using the stored status.
+        The builds not yet processed by 'backfill-build-status' (NULL stored
+        status) match no status.
+        """
+        if status not in StatusEnum.vals:
+            raise BadRequest("Unknown build status '{}'".format(status))
+        return query.filter(build.stored_status == StatusEnum(status))
+
+    @classmethod
+    def finished_condition(cls):
+        """
+        Return the SQL variant of the models.Build.finished property
+        """
+        build = models.Build
+        build_chroot = models.BuildChroot
+        has_chroots = (select(build_chroot.id)
+                       .where(build_chroot.build_id == build.id)
+                       .exists())
+        has_unfinished_chroots = (
+            select(build_chroot.id)
+            .where(build_chroot.build_id == build.id)
+            .where(or_(build_chroot.status.is_(None),
+                       build_chroot.status.notin_(helpers.FINISHED_STATUSES)))
+            .exists()
+        )
+        return or_(
+            build.canceled == true(),
+            build.source_status.in_([StatusEnum("failed"),
+                                     StatusEnum("canceled")]),
+            and_(~has_chroots,
+                 build.source_status.in_(helpers.FINISHED_STATUSES)),
+            and_(has_chroots, ~has_unfinished_chroots),
+        )
 
     @classmethod
-    def clean_old_builds(cls):
-        dirs = (
+    def old_builds_query(cls, archived=False):
+        """
+        Return the query for IDs of the finished builds which are "obsoleted"
+        per the models.Package.max_builds configuration, i.e. the builds over
+        the limit in the given CoprDir (the newest builds are kept).  Builds in
+        persistent projects are never obsoleted.  The archived builds count
+        into the limit too, with archived=True the query returns the IDs of
+        the obsoleted archived builds.
+        """
+        live = models.Build.__table__
+        archive = models.build_archive
+        builds = union_all(
+            select(live.c.id, live.c.copr_dir_id, live.c.package_id),
+            select(archive.c.id, archive.c.copr_dir_id, archive.c.package_id),
+        ).subquery()
+        ranked = (
             db.session.query(
-                models.CoprDir.id,
-                models.Package.id,
-                models.Package.max_builds)
-            .join(models.Build, models.Build.copr_dir_id==models.CoprDir.id)
-            .join(models.Package)
-            .filter(models.Package.max_builds > 0)
-            .group_by(
-                models.CoprDir.id,
+                builds.c.id,
                 models.Package.max_builds,
-                models.Package.id)
-            .having(func.count(models.Build.id) > models.Package.max_builds)
+                func.row_number().over(
+                    partition_by=(builds.c.copr_dir_id, builds.c.package_id),
+                    order_by=builds.c.id.desc(),
+                ).label("rank"))
+            .join(models.Package, builds.c.package_id == models.Package.id)
+            .filter(models.Package.max_builds > 0)
+            .filter(builds.c.copr_dir_id.isnot(None))
+            .subquery()
+        )
+        table = archive if archived else live
+        query = (
+            db.session.query(table.c.id)
+            .join(ranked, ranked.c.id == table.c.id)
+            .join(models.Copr, models.Copr.id == table.c.copr_id)
+            .filter(ranked.c.rank > ranked.c.max_builds)
+            .filter(models.Copr.persistent == false())
+            .order_by(table.c.id.asc())
         )
+        if not archived:
+            # unfinished builds are postponed to the next run
+            query = query.filter(cls.finished_condition())
+        return query
 
-        for dir_id, package_id, limit in dirs.all():
-            delete_builds = (
-                models.Build.query.filter(
-                    models.Build.copr_dir_id==dir_id,
-                    models.Build.package_id==package_id)
-                .order_by(desc(models.Build.id))
-                .offset(limit)
-                .all()
-            )
+    @classmethod
+    def orphaned_builds_query(cls, archived=False):
+        """
+        Return the query for IDs of the finished builds in deleted projects
+        (or of the archived ones, with archived=True)
+        """
+        table = models.build_archive if archived else models.Build.__table__
+        query = (
+            db.session.query(table.c.id)
+            .join(models.Copr, table.c.copr_id == models.Copr.id)
+            .filter(models.Copr.deleted == true())
+            .order_by(table.c.id.asc())
+        )
+        if not archived:
+            query = query.filter(cls.finished_condition())
+        return query
 
-            for build in delete_builds:
-                try:
-                    cls.delete_build(build.copr.user, build)
-                except ActionInProgressException:
-                    # postpone this one to next day run
-                    log.error("Build(id={}) delete failed, unfinished action.".format(build.id))
-
-    @classmethod
-    def delete_orphaned_builds(cls):
-        builds_to_delete = models.Build.query\
-            .join(models.Copr, models.Build.copr_id == models.Copr.id)\
-            .filter(models.Copr.deleted == True)
-
-        counter = 0
-        for build in builds_to_delete:
-            cls.delete_build(build.copr.user, build)
-            counter += 1
-            if counter >= 100:
+    @classmethod
+    def delete_builds_in_bulk(cls, build_ids_query, chunk_size=1000,
+                              dry_run=False, progress=None, archived=False):
+        """
+        Delete the builds (IDs returned by build_ids_query) without loading
+        them into the session one by one.  Each chunk of builds is removed by a
+        few bulk DELETE statements and committed, and one delete action per
+        CoprDir is sent to Backend.  With dry_run=True, every chunk is rolled
+        back instead (so the run can be used for benchmarking).  The optional
+        progress(done, total) callback is called after each chunk.  Use
+        archived=True for the IDs of archived builds.  Return the number of (to
+        be) deleted builds.
+        """
+        db.session.flush()
+        build_ids = [build_id for (build_id,) in build_ids_query]
+        total = len(build_ids)
+        delete_chunk = cls._delete_archived_builds_chunk if archived \
+            else cls._delete_builds_chunk
+        for start in range(0, total, chunk_size):
+            delete_chunk(build_ids[start:start + chunk_size])
+            if dry_run:
+                db.session.rollback()
+            else:
                 db.session.commit()
-                counter = 0
+            if progress:
+                progress(min(start + chunk_size, total), total)
+        return total
+
+    @staticmethod
+    def _send_delete_actions(builds):
+        """
+        Send one delete action per CoprDir
+        """
+        builds_by_dir = {}
+        for build in builds:
+            builds_by_dir.setdefault(build.copr_dir_id, []).append(build)
+        for dir_builds in builds_by_dir.values():
+            ActionsLogic.send_delete_multiple_builds(dir_builds)
+
+    @classmethod
+    def _delete_builds_chunk(cls, build_ids):
+        builds = (
+            models.Build.query
+            .filter(models.Build.id.in_(build_ids))
+            .options(
+                load_only("id", "copr_id", "copr_dir_id", "package_id",
+                          "result_dir"),
+                joinedload("copr").joinedload("user"),
+                joinedload("copr").joinedload("group"),
+                joinedload("copr_dir"),
+                selectinload("build_chroots").joinedload("mock_chroot"),
+            )
+            .order_by(models.Build.id.asc())
+            .all()
+        )
 
-        if counter > 0:
+        cls._send_delete_actions(builds)
+
+        pairs = {(build.copr_dir_id, build.package_id) for build in builds
+                 if build.package_id is not None}
+
+        build = models.Build.__table__
+        build_chroot = models.BuildChroot.__table__
+        result = models.BuildChrootResult.__table__
+        latest = models.LatestBuildChroot.__table__
+        pending = models.PendingQueueTask.__table__
+        build_chroot_ids = (select(build_chroot.c.id)
+                            .where(build_chroot.c.build_id.in_(build_ids)))
+        for statement in [
+                result.delete()
+                .where(result.c.build_chroot_id.in_(build_chroot_ids)),
+                latest.delete().where(latest.c.build_id.in_(build_ids)),
+                pending.delete().where(pending.c.build_id.in_(build_ids)),
+                build_chroot.delete()
+                .where(build_chroot.c.build_id.in_(build_ids)),
+                build.delete().where(build.c.id.in_(build_ids))]:
+            db.session.execute(statement)
+
+        # The deleted builds may have been the latest ones in some chroots
+        if pairs:
+            BuildsMonitorLogic.refresh_latest_build_chroots(
+                db.session.connection(),
+                lambda table: or_(*[
+                    and_(table.c.copr_dir_id == copr_dir_id,
+                         table.c.package_id == package_id)
+                    for copr_dir_id, package_id in pairs
+                ]))
+
+    @classmethod
+    def _delete_archived_builds_chunk(cls, build_ids):
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from coprs.logic.archive_logic import ArchiveLogic
+        cls._send_delete_actions(ArchiveLogic.get_builds(build_ids))
+        ArchiveLogic.delete_builds(build_ids)
+
+    @classmethod
+    def clean_old_builds(cls, chunk_size=1000, dry_run=False, progress=None):
+        """
+        Delete all the (live and archived) builds "obsoleted" per the
+        Package.max_builds configuration, see old_builds_query() and
+        delete_builds_in_bulk().
+        """
+        return sum(
+            cls.delete_builds_in_bulk(cls.old_builds_query(archived),
+                                      chunk_size, dry_run, progress, archived)
+            for archived in [False, True])
+
+    @classmethod
+    def delete_orphaned_builds(cls, chunk_size=1000, dry_run=False,
+                               progress=None):
+        """
+        Delete all the finished (live and archived) builds in deleted
+        projects, see orphaned_builds_query() and delete_builds_in_bulk().
+        """
+        return sum(
+            cls.delete_builds_in_bulk(cls.orphaned_builds_query(archived),
+                                      chunk_size, dry_run, progress, archived)
+            for archived in [False, True])
+
+    @classmethod
+    def backfill_stored_status(cls, only_missing=True, batch_size=1000):
+        """
+        Re-calculate the Build.stored_status column, for the builds with no
+        stored status yet (or for all builds with only_missing=False).  Commit
+        after each batch_size builds, and return the number of updated builds.
+        """
+        updated = 0
+        last_id = 0
+        while True:
+            query = (
+                models.Build.query
+                .filter(models.Build.id > last_id)
+                .order_by(models.Build.id.asc())
+                .options(selectinload("build_chroots"))
+            )
+            if only_missing:
+                query = query.filter(models.Build.stored_status.is_(None))
+
+            builds = query.limit(batch_size).all()
+            if not builds:
+                return updated
+
+            for build in builds:
+                status = _stored_status(build)
+                if build.stored_status != status:
+                    build.stored_status = status
+                    updated += 1
+            last_id = builds[-1].id
             db.session.commit()
 
     @classmethod
@@ -1476,13 +2169,16 @@ class BuildsMonitorLogic(object):
     @classmethod
     def package_build_chroots_query(cls, copr_dir, mock_chroot_ids):
         """
-        Return an SQL query returning all BuildChroots assigned to given CoprDir
-        (copr_dir) and MockChroot's (mock_chroot_ids).  The output is sorted by
-        Package.name, and then by Build.id (so callers can easily skip the
-        uninteresting entries).
+        Return an SQL query returning the latest BuildChroots assigned to given
+        CoprDir (copr_dir) and MockChroot's (mock_chroot_ids), see the
+        LatestBuildChroot model.  The output is sorted by Package.name, and
+        then by Build.id.
         """
         return (
             models.BuildChroot.query
+            .join(models.LatestBuildChroot,
+                  models.LatestBuildChroot.build_chroot_id
+                  == models.BuildChroot.id)
             .join(models.Build)
             .join(models.Package)
             .options(
@@ -1491,14 +2187,37 @@ class BuildsMonitorLogic(object):
                                                   "pkg_version")
                     .contains_eager("package").load_only("name"),
             )
-            .filter(models.BuildChroot.mock_chroot_id.in_(mock_chroot_ids))
-            .filter(models.Build.copr_dir==copr_dir)
+            .filter(models.LatestBuildChroot.copr_dir_id == copr_dir.id)
+            .filter(models.LatestBuildChroot.mock_chroot_id.in_(mock_chroot_ids))
             .order_by(
                 models.Package.name.asc(),
                 models.Build.id.desc(),
             )
         )
 
+    @classmethod
+    def fingerprint(cls, copr_dir):
+        """
+        Return a cheap fingerprint of the package_build_chroots() output, for
+        the conditional GET requests.
+        """
+        mock_chroot_ids = sorted(mch.id for mch in copr_dir.copr.active_chroots)
+        latest = models.LatestBuildChroot.__table__
+        build_chroot = models.BuildChroot.__table__
+        build = models.Build.__table__
+        rows = db.session.execute(
+            select(build_chroot.c.id, build_chroot.c.status,
+                   build_chroot.c.result_dir, build.c.pkg_version)
+            .select_from(
+                latest
+                .join(build_chroot,
+                      build_chroot.c.id == latest.c.build_chroot_id)
+                .join(build, build.c.id == build_chroot.c.build_id))
+            .where(latest.c.copr_dir_id == copr_dir.id)
+            .where(latest.c.mock_chroot_id.in_(mock_chroot_ids))
+            .order_by(build_chroot.c.id))
+        return [mock_chroot_ids, [list(row) for row in rows]]
+
     @classmethod
     def package_build_chroots(cls, copr_dir):
         """
@@ -1510,92 +2229,32 @@ class BuildsMonitorLogic(object):
                 "chroots": [ <BuildChroot>, <BuildChroot>, ...  ],
             }, ...]
         """
-
-        class _Finder:
-            def __init__(self, find_mock_chroot_ids):
-                self.searching_for = set(find_mock_chroot_ids)
-                self.package_name = None
-                self._reset()
-
-            def _reset(self):
-                self.mock_chroot_ids_found = set()
-                self.package_name = None
-                self.chroots = []
-
-            def get_data(self):
-                """
-                Return the dictionary to be yielded, or None if no data are
-                already processed.
-                """
-                if not self.chroots:
-                    # no package in the result set
-                    return None
-                return {
-                    "name": self.package_name,
-                    "chroots": self.chroots,
-                }
-
-            def _add_item(self, build_chroot):
-                self.mock_chroot_ids_found.add(build_chroot.mock_chroot_id)
-                self.chroots.append(build_chroot)
-                self.package_name = build_chroot.build.package.name
-
-            def add(self, build_chroot):
-                """
-                Process one BuildChroot instance.  Return the get_data() output
-                if we should flush the package out to caller, or None.
-                """
-                package_name = build_chroot.build.package.name
-
-                if self.package_name is None:
-                    # first package
-                    self._add_item(build_chroot)
-                    return None
-
-                if package_name == self.package_name:
-                    # additional chroot for the same package
-                    mock_chroot_id = build_chroot.mock_chroot_id
-                    if mock_chroot_id in self.mock_chroot_ids_found:
-                        # we already have status for this
-                        return None
-                    self._add_item(build_chroot)
-                    return None
-
-                # a different package, flush the old one
-                return_value = self.get_data()
-                self._reset()
-                self._add_item(build_chroot)
-                return return_value
-
         mock_chroot_ids = {mch.id for mch in copr_dir.copr.active_chroots}
-        package_data = _Finder(mock_chroot_ids)
-        for bch in cls.package_build_chroots_query(copr_dir, mock_chroot_ids).yield_per(1000):
-            if value := package_data.add(bch):
-                yield value
-
-        if value := package_data.get_data():
-            yield value
-
+        query = cls.package_build_chroots_query(copr_dir, mock_chroot_ids)
+        for name, build_chroots in groupby(query.yield_per(1000),
+                                           lambda bch: bch.build.package.name):
+            yield {
+                "name": name,
+                "chroots": list(build_chroots),
+            }
 
     @classmethod
     def last_buildchroots(cls, pkg_ids, mock_chroot_ids):
         """
         Query the BuildChroot for given list of package IDs, and mock chroot IDs
         """
+        latest = models.LatestBuildChroot
+        # the package may be built in multiple CoprDirs
         builds_ids = (
-            models.Build.query.join(models.BuildChroot)
-                  .filter(models.Build.package_id.in_(pkg_ids))
-                  .filter(models.BuildChroot.mock_chroot_id.in_(mock_chroot_ids))
-                  .with_entities(
-                      models.Build.package_id.label('package_id'),
-                      func.max(models.Build.id).label('build_id').label("build_id"),
-                      models.BuildChroot.mock_chroot_id,
-                  )
-                  .group_by(
-                      models.Build.package_id,
-                      models.BuildChroot.mock_chroot_id,
-                  )
-                  .subquery()
+            db.session.query(
+                latest.package_id.label("package_id"),
+                func.max(latest.build_id).label("build_id"),
+                latest.mock_chroot_id.label("mock_chroot_id"),
+            )
+            .filter(latest.package_id.in_(pkg_ids))
+            .filter(latest.mock_chroot_id.in_(mock_chroot_ids))
+            .group_by(latest.package_id, latest.mock_chroot_id)
+            .subquery()
         )
 
         return (models.BuildChroot.query
@@ -1608,6 +2267,101 @@ class BuildsMonitorLogic(object):
             )
         )
 
+    @staticmethod
+    def _latest_build_chroots_select(condition):
+        """
+        Select the LatestBuildChroot rows (calculated the expensive way) for the
+        Builds matching the condition.
+        """
+        build = models.Build.__table__
+        build_chroot = models.BuildChroot.__table__
+        latest = (
+            select(build.c.copr_dir_id, build.c.package_id,
+                   build_chroot.c.mock_chroot_id,
+                   func.max(build.c.id).label("build_id"))
+            .select_from(build.join(build_chroot))
+            .where(build.c.package_id.isnot(None))
+            .where(build.c.copr_dir_id.isnot(None))
+            .where(condition)
+            .group_by(build.c.copr_dir_id, build.c.package_id,
+                      build_chroot.c.mock_chroot_id)
+            .subquery()
+        )
+        return (
+            select(latest.c.copr_dir_id, latest.c.package_id,
+                   latest.c.mock_chroot_id, latest.c.build_id,
+                   build_chroot.c.id)
+            .select_from(latest.join(build_chroot, and_(
+                build_chroot.c.build_id == latest.c.build_id,
+                build_chroot.c.mock_chroot_id == latest.c.mock_chroot_id)))
+        )
+
+    @classmethod
+    def add_latest_build_chroots(cls, connection, build_ids):
+        """
+        Update the LatestBuildChroot table for newly created BuildChroots of
+        the given Builds (or when the Builds are assigned to a Package).  Only
+        the rows pointing to older builds are replaced.
+        """
+        table = models.LatestBuildChroot.__table__
+        build = models.Build.__table__
+        # The WHERE clause disambiguates the ON CONFLICT from JOIN ... ON in
+        # SQLite
+        new = cls._latest_build_chroots_select(build.c.id.in_(build_ids)) \
+            .where(true())
+        dialect = postgresql if connection.dialect.name == "postgresql" \
+            else sqlite
+        insert = dialect.insert(table).from_select(
+            LATEST_BUILD_CHROOT_COLUMNS, new)
+        # One statement, so the concurrent transactions don't both insert
+        connection.execute(insert.on_conflict_do_update(
+            index_elements=[table.c.copr_dir_id, table.c.package_id,
+                            table.c.mock_chroot_id],
+            set_={"build_id": insert.excluded.build_id,
+                  "build_chroot_id": insert.excluded.build_chroot_id},
+            where=insert.excluded.build_id > table.c.build_id,
+        ))
+
+    @classmethod
+    def refresh_latest_build_chroots(cls, connection, condition):
+        """
+        Re-calculate the LatestBuildChroot rows from scratch.  The condition is
+        a callable which accepts a table (either Build or LatestBuildChroot)
+        and returns the WHERE clause for the affected copr_dir_id and
+        package_id columns.
+        """
+        table = models.LatestBuildChroot.__table__
+        connection.execute(table.delete().where(condition(table)))
+        connection.execute(table.insert().from_select(
+            LATEST_BUILD_CHROOT_COLUMNS,
+            cls._latest_build_chroots_select(
+                condition(models.Build.__table__))))
+
+    @classmethod
+    def rebuild_latest_build_chroots(cls, batch_size=1000):
+        """
+        Re-calculate the whole LatestBuildChroot table, commit after each
+        batch_size CoprDirs.  Return the number of processed CoprDirs.
+        """
+        processed = 0
+        last_id = 0
+        while True:
+            copr_dir_ids = [
+                copr_dir_id for (copr_dir_id,) in
+                db.session.query(models.CoprDir.id)
+                .filter(models.CoprDir.id > last_id)
+                .order_by(models.CoprDir.id.asc())
+                .limit(batch_size)
+            ]
+            if not copr_dir_ids:
+                return processed
+
+            cls.refresh_latest_build_chroots(
+                db.session.connection(),
+                lambda table: table.c.copr_dir_id.in_(copr_dir_ids))
+            db.session.commit()
+            processed += len(copr_dir_ids)
+            last_id = copr_dir_ids[-1]
 
     @classmethod
     def get_monitor_data(cls, copr, per_page=50, page=1,
@@ -1664,3 +2418,118 @@ class BuildsMonitorLogic(object):
                     mapper[package.id].get(chroot.name))
 
         return pagination
+
+
+# Changes in these attributes may change the Build.status value
+BUILD_STATUS_ATTRIBUTES = ["source_status", "canceled", "build_chroots"]
+
+
+def _stored_status(build):
+    """
+    The Build.status value for the Build.stored_status column.  The NULL
+    stored status means "not backfilled yet", so the undecidable status is
+    stored as "unknown".
+    """
+    status = build.status
+    if status is None:
+        return StatusEnum("unknown")
+    return status
+
+
+@listens_for(Session, "before_flush")
+def update_stored_status(session, _flush_context, _instances):
+    """
+    Keep the Build.stored_status column in sync with the Build.status property
+    whenever the Build, or any of its BuildChroots, changes the state.
+    """
+    builds = set()
+    for obj in session.new:
+        if isinstance(obj, models.Build):
+            _apply_defaults(obj, ["source_status", "canceled"])
+            builds.add(obj)
+        elif isinstance(obj, models.BuildChroot):
+            _apply_defaults(obj, ["status"])
+            builds.add(obj.build)
+
+    for obj in session.dirty:
+        if isinstance(obj, models.Build):
+            if helpers.changed(obj, BUILD_STATUS_ATTRIBUTES):
+                builds.add(obj)
+        elif isinstance(obj, models.BuildChroot):
+            if helpers.changed(obj, ["status"]):
+                builds.add(obj.build)
+
+    deleted = session.deleted
+    for obj in deleted:
+        if isinstance(obj, models.BuildChroot) and obj.build not in deleted:
+            builds.add(obj.build)
+
+    for build in builds:
+        # BuildChroots created with the build_id foreign key only
+        if build is None:
+            continue
+        status = _stored_status(build)
+        if build.stored_status != status:
+            build.stored_status = status
+
+
+# The (latest) BuildChroot is identified by these attributes
+LATEST_BUILD_CHROOT_COLUMNS = ["copr_dir_id", "package_id", "mock_chroot_id",
+                               "build_id", "build_chroot_id"]
+LATEST_BUILD_ATTRIBUTES = ["package", "package_id", "copr_dir", "copr_dir_id"]
+LATEST_BUILD_CHROOT_ATTRIBUTES = ["build", "build_id", "mock_chroot",
+                                  "mock_chroot_id"]
+
+
+@listens_for(Session, "after_flush")
+def sync_latest_build_chroots(session, flush_context):
+    """
+    Keep the LatestBuildChroot table in sync when BuildChroots are created or
+    deleted, or when a Build is assigned to a Package (after the SRPM build).
+    The state changes don't matter, the table only points to the BuildChroot.
+    """
+    new, dirty, deleted_build_chroots = helpers.flushed_objects(
+        session, flush_context, models.BuildChroot)
+    added = {obj.build_id for obj in new}
+    added.update(obj.build_id for obj in dirty
+                 if helpers.changed(obj, LATEST_BUILD_CHROOT_ATTRIBUTES))
+    build_ids = {obj.build_id for obj in deleted_build_chroots}
+
+    _, dirty, deleted_builds = helpers.flushed_objects(
+        session, flush_context, models.Build)
+    added.update(obj.id for obj in dirty
+                 if helpers.changed(obj, LATEST_BUILD_ATTRIBUTES))
+    pairs = {(obj.copr_dir_id, obj.package_id) for obj in deleted_builds}
+
+    connection = session.connection()
+    if build_ids:
+        build = models.Build.__table__
+        pairs.update(tuple(row) for row in connection.execute(
+            select(build.c.copr_dir_id, build.c.package_id)
+            .where(build.c.id.in_(build_ids))))
+
+    pairs = [pair for pair in pairs if None not in pair]
+    if pairs:
+        BuildsMonitorLogic.refresh_latest_build_chroots(
+            connection,
+            lambda table: or_(*[
+                and_(table.c.copr_dir_id == copr_dir_id,
+                     table.c.package_id == package_id)
+                for copr_dir_id, package_id in pairs
+            ]))
+
+    added.discard(None)
+    if added:
+        BuildsMonitorLogic.add_latest_build_chroots(connection, added)
+
+
+def _apply_defaults(obj, attributes):
+    """
+    The column defaults are set on INSERT, but we need them to calculate the
+    Build.status before that.
+    """
+    for name in attributes:
+        default = obj.__table__.c[name].default
+        if getattr(obj, name) is None and default is not None and \
+                default.is_scalar:
+            setattr(obj, name, default.arg)
@@ -1,11 +1,14 @@
 # coding: utf-8
 
+import json
 import os
 import datetime
 import time
 import fnmatch
 import flask
 import sqlalchemy
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm.attributes import set_committed_value
 
 from copr_common.enums import StatusEnum
 from coprs import app
@@ -14,6 +17,7 @@ from coprs import helpers
 from coprs import models
 from coprs import exceptions
 from coprs.exceptions import ObjectNotFound, ActionInProgressException
+from coprs.logic.archive_logic import ArchiveLogic
 from coprs.logic.builds_logic import BuildsLogic
 from coprs.logic.batches_logic import BatchesLogic
 from coprs.logic.packages_logic import PackagesLogic
@@ -33,11 +37,159 @@ def unpin_projects_on_delete(copr, deleted, oldvalue, event):
     PinnedCoprsLogic.delete_by_copr(copr)
 
 
+@sqlalchemy.event.listens_for(sqlalchemy.orm.Session, "before_flush")
+def invalidate_runtime_deps_closure(session, _flush_context, _instances):
+    """
+    Drop the resolved runtime dependencies (Copr.runtime_deps_closure) of all
+    the projects that depend (transitively) on a project which is created,
+    deleted, or which changes its runtime dependencies.
+    """
+    changed = []
+    for copr in session.new:
+        if isinstance(copr, models.Copr):
+            changed.append(copr)
+
+    for copr in session.dirty:
+        if isinstance(copr, models.Copr) and \
+                helpers.changed(copr, ["runtime_dependencies", "deleted"]):
+            changed.append(copr)
+
+    changed.extend(obj for obj in session.deleted
+                   if isinstance(obj, models.Copr))
+    if not changed:
+        return
+
+    for copr in changed:
+        copr.runtime_deps_closure = None
+
+    edges = models.CoprRuntimeDependency.__table__
+    connection = session.connection()
+    copr_ids = {row.copr_id for row in connection.execute(
+        sqlalchemy.select(edges.c.copr_id).where(edges.c.dependency.in_(
+            {copr.full_name for copr in changed})))}
+    copr_ids.update(copr.id for copr in changed if copr.id is not None)
+    if not copr_ids:
+        return
+
+    table = models.Copr.__table__.left
+    connection.execute(
+        table.update()
+        .where(table.c.id.in_(copr_ids))
+        .where(table.c.runtime_deps_closure.isnot(None))
+        .values(runtime_deps_closure=None))
+    connection.execute(edges.delete().where(edges.c.copr_id.in_(copr_ids)))
+
+
 class ComplexLogic(object):
     """
     Used for manipulation which affects multiply models
     """
 
+    @classmethod
+    def get_transitive_runtime_dependencies(cls, copr):
+        """
+        Get a list of runtime dependencies (build transitively from
+        dependencies' dependencies). Returns three lists, one with Copr
+        dependencies, one with URLs to external dependencies and one with list
+        of non-existing Copr dependencies.
+
+        The result is stored in Copr.runtime_deps_closure (together with the
+        CoprRuntimeDependency edges), so the dependency graph doesn't have to
+        be walked again.  The caller is supposed to commit the session.
+
+        :type copr: models.Copr
+        :rtype: List[models.Copr], List[str], List[str]
+        """
+        if not copr:
+            return [], [], []
+
+        if copr.runtime_deps_closure is None:
+            closure = cls._resolve_runtime_dependencies(copr)
+            names = closure.pop("names")
+            cls._store_runtime_deps_closure(copr, closure, names)
+        else:
+            closure = json.loads(copr.runtime_deps_closure)
+
+        internal_deps = []
+        if closure["internal"]:
+            coprs = {c.id: c for c in models.Copr.query.filter(
+                models.Copr.id.in_(closure["internal"]))}
+            internal_deps = [coprs[copr_id] for copr_id in closure["internal"]
+                             if copr_id in coprs]
+        return internal_deps, closure["external"], closure["non_existing"]
+
+    @staticmethod
+    def _store_runtime_deps_closure(copr, closure, names):
+        """
+        Store the resolved closure, unless a concurrent request stored it
+        since we read it as NULL
+        """
+        value = json.dumps(closure)
+        connection = db.session.connection()
+        table = models.Copr.__table__.left
+        result = connection.execute(
+            table.update()
+            .where(table.c.id == copr.id)
+            .where(table.c.runtime_deps_closure.is_(None))
+            .values(runtime_deps_closure=value))
+        if not result.rowcount:
+            return
+        set_committed_value(copr, "runtime_deps_closure", value)
+
+        edges = models.CoprRuntimeDependency.__table__
+        dialect = postgresql if connection.dialect.name == "postgresql" \
+            else sqlite
+        connection.execute(
+            dialect.insert(edges).on_conflict_do_nothing(
+                index_elements=[edges.c.copr_id, edges.c.dependency]),
+            [{"copr_id": copr.id, "dependency": name}
+             for name in sorted(set(names))])
+
+    @classmethod
+    def _resolve_runtime_dependencies(cls, copr):
+        """
+        Walk the runtime dependency graph, and return the closure dictionary
+        for Copr.runtime_deps_closure, with the "names" of all the projects
+        (for CoprRuntimeDependency) the result depends on.
+        """
+        wlist = helpers.WorkList([copr])
+        internal_deps = []
+        non_existing = []
+        external_deps = []
+        # all the project names the result depends on
+        names = [copr.full_name]
+
+        while not wlist.empty:
+            analyzed_copr = wlist.pop()
+
+            for dep in sorted(analyzed_copr.runtime_deps):
+                try:
+                    copr_dep = cls.get_copr_by_repo_safe(dep)
+                except ObjectNotFound:
+                    if dep not in non_existing:
+                        non_existing.append(dep)
+                        names.append(helpers.copr_repo_fullname(dep))
+                    continue
+
+                if not copr_dep:
+                    if dep not in external_deps:
+                        external_deps.append(dep)
+                    continue
+                if copr == copr_dep:
+                    continue
+                # check transitive dependencies
+                if copr_dep.id not in internal_deps:
+                    internal_deps.append(copr_dep.id)
+                    names.append(copr_dep.full_name)
+                wlist.schedule(copr_dep)
+
+        return {
+            "internal": internal_deps,
+            "external": external_deps,
+            "non_existing": non_existing,
+            "names": names,
+        }
+
     @classmethod
     def delete_copr(cls, copr, admin_action=False):
         """
@@ -64,6 +216,13 @@ class ComplexLogic(object):
             # a whole project as a part of CoprsLogic.delete_unsafe() method.
             BuildsLogic.delete_build(user, build, send_delete_action=False)
 
+        # the whole project directory is removed, including the archived builds
+        archive = models.build_archive
+        ArchiveLogic.delete_builds([
+            build_id for (build_id,) in db.session.execute(
+                sqlalchemy.select(archive.c.id)
+                .where(archive.c.copr_id == copr.id))])
+
         CoprsLogic.delete_unsafe(user, copr)
 
 
@@ -186,12 +345,19 @@ class ComplexLogic(object):
 
     @staticmethod
     def get_build_safe(build_id):
+        """
+        Return the build by ID, the archived (read-only) builds included
+        """
         try:
             return BuildsLogic.get_by_id(build_id).one()
-        except (sqlalchemy.orm.exc.NoResultFound,
-                sqlalchemy.exc.DataError):
-            raise ObjectNotFound(
-                message="Build {} does not exist.".format(build_id))
+        except sqlalchemy.orm.exc.NoResultFound:
+            build = ArchiveLogic.get_build(build_id)
+            if build:
+                return build
+        except sqlalchemy.exc.DataError:
+            pass
+        raise ObjectNotFound(
+            message="Build {} does not exist.".format(build_id))
 
     @staticmethod
     def get_build_chroot(build_id, chrootname):
@@ -23,7 +23,7 @@ from coprs import models
 from coprs import logic
 from coprs.exceptions import MalformedArgumentException, BadRequest
 from coprs.logic import users_logic
-from coprs.whoosheers import CoprWhoosheer
+from coprs.logic.search_logic import CoprSearchLogic
 from coprs.helpers import fix_protocol_for_backend, clone_sqlalchemy_instance
 
 from coprs.logic.actions_logic import ActionsLogic
@@ -226,8 +226,7 @@ class CoprsLogic(object):
             query = query.filter(models.Package.name.ilike(value))
 
         if fulltext:
-            query = query.whooshee_search(
-                fulltext, whoosheer=CoprWhoosheer, order_by_relevance=100)
+            query = CoprSearchLogic.filter_fulltext(query, fulltext)
 
         return query
 
@@ -614,8 +613,13 @@ class CoprDirsLogic(object):
     def delete_with_builds(cls, copr_dir):
         """
         Delete CoprDir istance from database, and transitively delete all
-        assigned Builds and BuildChroots.  No Backend action is generated.
+        assigned Builds and BuildChroots, including the archived ones.  No
+        Backend action is generated.
         """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from coprs.logic.archive_logic import ArchiveLogic
+        ArchiveLogic.delete_builds(
+            ArchiveLogic.get_build_ids(copr_dir_id=copr_dir.id))
         models.Build.query.filter(models.Build.copr_dir_id==copr_dir.id)\
                 .delete()
         cls.delete(copr_dir)
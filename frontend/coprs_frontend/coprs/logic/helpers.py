@@ -1,6 +1,8 @@
 # coding: utf-8
 import time
 
+from coprs import db
+
 def slice_query(query, limit=100, offset=0):
     """
     :param Query query:
@@ -35,3 +37,39 @@ def get_graph_parameters(type):
         "start": start,
         "end": end,
     }
+
+
+def get_graph_buckets_sql():
+    """
+    Return the "WITH RECURSIVE buckets(start, stop) AS (...)" SQL prefix which
+    generates the graph time buckets [start, stop), from the :first bucket
+    start to the :last bucket start, by :step seconds.  PostgreSQL has the
+    generate_series() function for this, SQLite (used by the test-suite) needs
+    the recursive query.
+    """
+    if db.engine.dialect.name == "postgresql":
+        return """
+            WITH RECURSIVE buckets(start, stop) AS (
+                SELECT s, s + :step FROM generate_series(:first, :last, :step) s
+            )
+        """
+    return """
+        WITH RECURSIVE buckets(start, stop) AS (
+            SELECT :first, :first + :step
+            UNION ALL
+            SELECT stop, stop + :step FROM buckets WHERE stop <= :last
+        )
+    """
+
+
+def missing_graph_steps(params, cached):
+    """
+    Return the (first, last) bucket starts which are not yet cached, for the
+    graph parameters from get_graph_parameters() and the number of cached
+    buckets.  Return None if everything is cached.
+    """
+    if cached >= params["steps"]:
+        return None
+    first = params["start"] + cached * params["step"]
+    last = params["start"] + (params["steps"] - 1) * params["step"]
+    return first, last
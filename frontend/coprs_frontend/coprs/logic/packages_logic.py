@@ -211,15 +211,31 @@ class PackagesLogic(object):
                 .filter(models.Package.name == package_name))
 
 
+    @classmethod
+    def get_builds(cls, package):
+        """
+        Return both the live and the archived (read-only, see ArchiveLogic)
+        builds of the package, ordered by ID
+        """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from coprs.logic.archive_logic import ArchiveLogic
+        archived = ArchiveLogic.get_builds(
+            ArchiveLogic.get_build_ids(package_id=package.id))
+        return sorted(package.builds + archived, key=lambda build: build.id)
+
     @classmethod
     def delete_package(cls, user, package):
         if not user.can_edit(package.copr):
             raise exceptions.InsufficientRightsException(
                 "You are not allowed to delete package `{}`.".format(package.id))
 
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from coprs.logic.archive_logic import ArchiveLogic
+
         to_delete = []
         for build in package.builds:
             to_delete.append(build.id)
+        to_delete += ArchiveLogic.get_build_ids(package_id=package.id)
 
         builds_logic.BuildsLogic.delete_builds(user, to_delete)
         db.session.delete(package)
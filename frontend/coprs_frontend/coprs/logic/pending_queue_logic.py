@@ -0,0 +1,297 @@
+"""
+Maintain the materialized Backend build queue, the models.PendingQueueTask.
+"""
+
+import time
+import uuid
+
+from redis.exceptions import RedisError
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.sql import false, or_, true, tuple_
+
+from copr_common.enums import StatusEnum
+from coprs import app
+from coprs import db
+from coprs import models
+from coprs import rcp
+from coprs.helpers import changed, flushed_objects
+from coprs.logic.builds_logic import BuildsLogic
+
+
+# Backend re-processes also the "starting" and "running" tasks, see
+# BuildsLogic._todo_states().
+TODO_STATES = [StatusEnum(x) for x in ["pending", "starting", "running"]]
+
+# Changes in these attributes may move the task in or out of the queue
+BUILD_ATTRIBUTES = ["source_status", "canceled", "is_background", "batch",
+                    "batch_id"]
+BUILD_CHROOT_ATTRIBUTES = ["status", "mock_chroot", "mock_chroot_id"]
+
+# Redis key with a random token, changed after each commit touching the queue
+VERSION_KEY = "pending_queue_version"
+
+# The version changes at least this often (seconds), for the changes in the
+# queue data that are not tracked (e.g. MockChroot tags)
+VERSION_MAX_AGE = 600
+
+
+class PendingQueueLogic:
+    """
+    The pending_queue table is updated automatically (on session flush) when
+    the Build or BuildChroot state changes.  So submitting a build, importing
+    it, starting, finishing or canceling it keeps the queue in sync.
+    """
+
+    @classmethod
+    def get_tasks(cls, srpm, arches=None):
+        """
+        Return the query for the pending SRPM (srpm=True) or RPM tasks, in the
+        order they should be processed by Backend.  The RPM tasks can be
+        limited to the given list of architectures.
+        """
+        task = models.PendingQueueTask
+        query = (
+            task.query
+            .filter(task.srpm == (true() if srpm else false()))
+            .order_by(task.background.asc(), task.build_id.asc(),
+                      task.mock_chroot_id.asc())
+        )
+        if not srpm:
+            query = query.options(joinedload("mock_chroot")
+                                  .load_only("tags_raw"))
+        if arches:
+            query = (query.join(models.MockChroot)
+                     .filter(models.MockChroot.arch.in_(arches)))
+        return query
+
+    @classmethod
+    def version(cls):
+        """
+        Return the current version of the queue, for the conditional GET
+        requests of the /backend/pending-jobs/ route.
+        """
+        redis = rcp.get_connection()
+        token = redis.get(VERSION_KEY)
+        if token is None:
+            redis.set(VERSION_KEY, uuid.uuid4().hex, nx=True)
+            token = redis.get(VERSION_KEY)
+        return [token.decode("utf-8"), int(time.time()) // VERSION_MAX_AGE]
+
+    @staticmethod
+    def mark_changed(session):
+        """
+        Change the queue version once the session commits
+        """
+        session.info["pending_queue_changed"] = True
+
+    @classmethod
+    def srpm_task_row(cls, build):
+        """
+        Return the pending_queue row (dict) for the SRPM build, or None if the
+        SRPM build is not to be processed by Backend.
+        """
+        if build.canceled or build.source_status not in TODO_STATES:
+            return None
+        return cls._srpm_row(build)
+
+    @classmethod
+    def rpm_task_row(cls, build_chroot):
+        """
+        Return the pending_queue row (dict) for the BuildChroot, or None if the
+        RPM build is not to be processed by Backend.
+        """
+        if build_chroot.status not in TODO_STATES or \
+                build_chroot.build.canceled:
+            return None
+        return cls._rpm_row(build_chroot)
+
+    @staticmethod
+    def _srpm_row(build):
+        chroot = None
+        if build.source_type_text == "custom":
+            chroot = build.source_json_dict["chroot"]
+
+        return {
+            "task_id": build.task_id,
+            "build_id": build.id,
+            "batch_id": build.batch_id,
+            "mock_chroot_id": None,
+            "srpm": True,
+            "background": bool(build.is_background),
+            "project_owner": build.copr.owner_name,
+            "sandbox": build.sandbox,
+            "chroot": chroot,
+        }
+
+    @staticmethod
+    def _rpm_row(build_chroot):
+        build = build_chroot.build
+        return {
+            "task_id": build_chroot.task_id,
+            "build_id": build.id,
+            "batch_id": build.batch_id,
+            "mock_chroot_id": build_chroot.mock_chroot.id,
+            "srpm": False,
+            "background": bool(build.is_background),
+            "project_owner": build.copr.owner_name,
+            "sandbox": build.sandbox,
+            "chroot": build_chroot.mock_chroot.name,
+        }
+
+    @classmethod
+    def add_tasks(cls, build_ids, batch_size=1000):
+        """
+        Add the SRPM and RPM tasks for the builds (and their BuildChroots)
+        created by bulk INSERT statements (not through the ORM, so
+        sync_pending_queue() doesn't see them).
+        """
+        table = models.PendingQueueTask.__table__
+        for start in range(0, len(build_ids), batch_size):
+            builds = (
+                models.Build.query
+                .filter(models.Build.id.in_(build_ids[start:start + batch_size]))
+                .options(joinedload(models.Build.copr),
+                         joinedload(models.Build.user),
+                         selectinload(models.Build.build_chroots)
+                         .joinedload(models.BuildChroot.mock_chroot))
+            )
+            rows = []
+            for build in builds:
+                rows.append(cls.srpm_task_row(build))
+                rows.extend(map(cls.rpm_task_row, build.build_chroots))
+            rows = [row for row in rows if row]
+            if rows:
+                db.session.execute(table.insert(), rows)
+                cls.mark_changed(db.session())
+
+    @classmethod
+    def expected_rows(cls):
+        """
+        Calculate the pending_queue rows from the Build and BuildChroot states
+        (the expensive way), generator of (task_id, row) pairs.
+        """
+        args = {"data_type": "for_backend"}
+        for build in BuildsLogic.get_pending_srpm_build_tasks(**args):
+            yield build.task_id, cls._srpm_row(build)
+        for build_chroot in BuildsLogic.get_pending_build_tasks(**args):
+            yield build_chroot.task_id, cls._rpm_row(build_chroot)
+
+    @classmethod
+    def check(cls, fix=False):
+        """
+        Compare the pending_queue table with the expected state.  Return the
+        tuple of lists (missing, unexpected, outdated) of task IDs.  With
+        fix=True, make the table consistent.
+        """
+        table = models.PendingQueueTask.__table__
+        existing = {
+            row.task_id: {column.name: getattr(row, column.name)
+                          for column in table.columns}
+            for row in db.session.execute(table.select())
+        }
+        expected = dict(cls.expected_rows())
+
+        missing = sorted(set(expected) - set(existing))
+        unexpected = sorted(set(existing) - set(expected))
+        outdated = sorted(
+            task_id for task_id in set(existing) & set(expected)
+            # sandbox is random for builds with unknown submitter
+            if {k: v for k, v in existing[task_id].items() if k != "sandbox"}
+            != {k: v for k, v in expected[task_id].items() if k != "sandbox"}
+        )
+
+        if fix:
+            drop = unexpected + outdated
+            if drop:
+                db.session.execute(
+                    table.delete().where(table.c.task_id.in_(drop)))
+            add = missing + outdated
+            if add:
+                db.session.execute(table.insert(),
+                                   [expected[task_id] for task_id in add])
+            if drop or add:
+                cls.mark_changed(db.session())
+            db.session.commit()
+
+        return missing, unexpected, outdated
+
+
+@listens_for(Session, "after_flush")
+def sync_pending_queue(session, flush_context):
+    """
+    Update the pending_queue table according to the flushed Build and
+    BuildChroot changes.  The affected tasks are dropped by one DELETE, and
+    the still pending ones re-inserted by one (executemany) INSERT.
+    """
+    table = models.PendingQueueTask.__table__
+
+    build_chroots = set()
+    new, dirty, deleted_builds = flushed_objects(session, flush_context,
+                                                 models.Build)
+    dirty = [obj for obj in dirty if changed(obj, BUILD_ATTRIBUTES)]
+    for obj in dirty:
+        # e.g. canceled build, all the RPM tasks are affected
+        build_chroots.update(obj.build_chroots)
+    srpm_build_ids = {obj.id for obj in new + dirty}
+    rows = [PendingQueueLogic.srpm_task_row(obj) for obj in new + dirty]
+
+    new, dirty, deleted_build_chroots = flushed_objects(
+        session, flush_context, models.BuildChroot)
+    build_chroots.update(new)
+    build_chroots.update(obj for obj in dirty
+                         if changed(obj, BUILD_CHROOT_ATTRIBUTES))
+
+    # The BuildChroot objects may be created with the foreign keys only (e.g.
+    # when forking), so don't touch the relationships unless needed.
+    rpm_keys = set()
+    for build_chroot in build_chroots:
+        rpm_keys.add((build_chroot.build_id, build_chroot.mock_chroot_id))
+        rows.append(PendingQueueLogic.rpm_task_row(build_chroot))
+
+    deleted_build_ids = {obj.id for obj in deleted_builds}
+    rpm_keys.update((obj.build_id, obj.mock_chroot_id)
+                    for obj in deleted_build_chroots)
+
+    conditions = []
+    if srpm_build_ids:
+        conditions.append(table.c.build_id.in_(srpm_build_ids) & table.c.srpm)
+    if rpm_keys:
+        conditions.append(tuple_(table.c.build_id, table.c.mock_chroot_id)
+                          .in_(rpm_keys))
+    if deleted_build_ids:
+        conditions.append(table.c.build_id.in_(deleted_build_ids))
+    if not conditions:
+        return
+
+    connection = session.connection()
+    result = connection.execute(table.delete().where(or_(*conditions)))
+    rows = [row for row in rows if row]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+    if rows or result.rowcount:
+        PendingQueueLogic.mark_changed(session)
+
+
+@listens_for(Session, "after_commit")
+def bump_pending_queue_version(session):
+    """
+    Change the queue version, only after the change is visible to others
+    """
+    if not session.info.pop("pending_queue_changed", False):
+        return
+    try:
+        rcp.get_connection().set(VERSION_KEY, uuid.uuid4().hex)
+    except RedisError:
+        # The change is committed already, don't fail the request.  The
+        # stale version expires after VERSION_MAX_AGE anyway.
+        app.logger.exception("Can't bump the pending queue version")
+
+
+@listens_for(Session, "after_rollback")
+def forget_pending_queue_changes(session):
+    """
+    The queue didn't change after all
+    """
+    session.info.pop("pending_queue_changed", None)
@@ -0,0 +1,277 @@
+"""
+Full-text project search, backed by the models.CoprSearch documents.
+"""
+
+import re
+import time
+
+from sqlalchemy import bindparam, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import false
+
+from coprs import db
+from coprs import models
+from coprs.helpers import changed, flushed_objects
+
+
+# PostgreSQL text search configuration, no stemming and no stop-words
+TS_CONFIG = "simple"
+
+# Changes in these attributes change the search document of the Copr
+COPR_ATTRIBUTES = ["name", "description", "instructions", "user_id",
+                   "group_id", "user", "group"]
+PACKAGE_ATTRIBUTES = ["name", "copr_id", "copr"]
+COPR_CHROOT_ATTRIBUTES = ["deleted", "mock_chroot_id", "mock_chroot"]
+
+
+class CoprSearchLogic:
+    """
+    Maintain and query the copr_search table.
+    """
+
+    @staticmethod
+    def _postgres():
+        return db.engine.dialect.name == "postgresql"
+
+    @classmethod
+    def _document_expression(cls):
+        """
+        The SQL expression for the CoprSearch.document column, from the :names,
+        :contents and :texts bind parameters (in the order of importance).
+        """
+        def _weighted(param, weight):
+            return func.setweight(
+                func.to_tsvector(TS_CONFIG, bindparam(param)), weight)
+
+        return _weighted("names", "A").op("||")(
+            _weighted("contents", "B")).op("||")(
+                _weighted("texts", "C"))
+
+    @classmethod
+    def _documents(cls, connection, copr_ids):
+        """
+        Generate the (copr_id, names, contents, texts) tuples for the given
+        (existing) projects.
+        """
+        copr = models.Copr.__table__.left
+        user = models.User.__table__.left
+        group = models.Group.__table__
+        package = models.Package.__table__
+        copr_chroot = models.CoprChroot.__table__
+        mock_chroot = models.MockChroot.__table__
+
+        contents = {}
+        for copr_id, name in connection.execute(
+                select(package.c.copr_id, package.c.name)
+                .where(package.c.copr_id.in_(copr_ids))):
+            contents.setdefault(copr_id, []).append(name)
+        for copr_id, os_release, os_version, arch in connection.execute(
+                select(copr_chroot.c.copr_id, mock_chroot.c.os_release,
+                       mock_chroot.c.os_version, mock_chroot.c.arch)
+                .select_from(copr_chroot.join(mock_chroot))
+                .where(copr_chroot.c.copr_id.in_(copr_ids))
+                .where(copr_chroot.c.deleted.isnot(True))):
+            contents.setdefault(copr_id, []).append(
+                "{}-{}-{}".format(os_release, os_version, arch))
+
+        for row in connection.execute(
+                select(copr.c.id, copr.c.name, copr.c.description,
+                       copr.c.instructions, user.c.username,
+                       group.c.name.label("group_name"))
+                .select_from(copr.join(user, copr.c.user_id == user.c.id)
+                             .outerjoin(group, copr.c.group_id == group.c.id))
+                .where(copr.c.id.in_(copr_ids))):
+            owner = "@" + row.group_name if row.group_name else row.username
+            yield (
+                row.id,
+                "{} {}".format(owner, row.name),
+                " ".join(contents.get(row.id, [])),
+                "{} {}".format(row.description or "", row.instructions or ""),
+            )
+
+    @classmethod
+    def update(cls, connection, copr_ids):
+        """
+        Re-calculate the search documents for the given projects
+        """
+        table = models.CoprSearch.__table__
+        copr_ids = list(copr_ids)
+        now = int(time.time())
+        rows = [
+            {"copr_id": copr_id, "names": names, "contents": contents,
+             "texts": texts}
+            for copr_id, names, contents, texts
+            in cls._documents(connection, copr_ids)
+        ]
+        deleted = set(copr_ids) - {row["copr_id"] for row in rows}
+        if deleted:
+            connection.execute(
+                table.delete().where(table.c.copr_id.in_(deleted)))
+        if not rows:
+            return
+
+        if cls._postgres():
+            document = cls._document_expression()
+        else:
+            document = bindparam("document")
+            for row in rows:
+                row["document"] = " ".join(
+                    [row["names"], row["contents"], row["texts"]]).lower()
+        # Concurrent indexers may update the same project, the queue rows are
+        # locked but the projects are not
+        dialect = postgresql if cls._postgres() else sqlite
+        insert = dialect.insert(table).values(
+            copr_id=bindparam("copr_id"),
+            document=document,
+            indexed_on=now)
+        connection.execute(
+            insert.on_conflict_do_update(
+                index_elements=[table.c.copr_id],
+                set_={"document": insert.excluded.document,
+                      "indexed_on": insert.excluded.indexed_on}),
+            rows)
+
+    @classmethod
+    def rebuild(cls, copr_ids_query=None, batch_size=1000):
+        """
+        Re-calculate the search documents for all the projects (or for those
+        returned by the copr_ids_query), commit after each batch_size
+        projects.  Return the number of processed projects.
+        """
+        if copr_ids_query is None:
+            copr_ids_query = db.session.query(models.Copr.id)
+        copr_ids = sorted(copr_id for (copr_id,) in copr_ids_query)
+        for start in range(0, len(copr_ids), batch_size):
+            cls.update(db.session.connection(),
+                       copr_ids[start:start + batch_size])
+            db.session.commit()
+        return len(copr_ids)
+
+    @staticmethod
+    def enqueue(connection, copr_ids):
+        """
+        Schedule the search document update for the given projects, see
+        process_queue()
+        """
+        now = int(time.time())
+        connection.execute(
+            models.CoprSearchQueue.__table__.insert(),
+            [{"copr_id": copr_id, "queued_on": now} for copr_id in copr_ids])
+
+    @classmethod
+    def process_queue(cls, batch_size=1000):
+        """
+        Update the search documents of the queued projects, commit after each
+        batch_size queued rows.  Concurrent indexers on PostgreSQL skip the
+        rows locked by each other.  Return the number of processed rows.
+        """
+        queue = models.CoprSearchQueue.__table__
+        processed = 0
+        while True:
+            query = select(queue.c.id, queue.c.copr_id) \
+                .order_by(queue.c.id.asc()).limit(batch_size)
+            if cls._postgres():
+                query = query.with_for_update(skip_locked=True)
+            rows = db.session.execute(query).all()
+            if not rows:
+                return processed
+
+            cls.update(db.session.connection(),
+                       {row.copr_id for row in rows})
+            db.session.execute(queue.delete().where(
+                queue.c.id.in_([row.id for row in rows])))
+            db.session.commit()
+            processed += len(rows)
+
+    @staticmethod
+    def queue_status():
+        """
+        Return the dict with the number of queued rows, and the lag (in
+        seconds) of the search documents, i.e. the age of the oldest queued
+        row
+        """
+        queue = models.CoprSearchQueue
+        count, oldest = db.session.query(
+            func.count(queue.id), func.min(queue.queued_on)).one()
+        return {
+            "queued": count,
+            "lag": int(time.time()) - oldest if oldest else 0,
+        }
+
+    @classmethod
+    def is_complete(cls):
+        """
+        True if every project has its search document
+        """
+        missing = (
+            db.session.query(models.Copr.id)
+            .outerjoin(models.CoprSearch)
+            .filter(models.CoprSearch.copr_id.is_(None))
+        )
+        return not db.session.query(missing.exists()).scalar()
+
+    @staticmethod
+    def _words(fulltext):
+        return re.findall(r"\w[\w.+-]*", fulltext.lower())
+
+    @classmethod
+    def filter_fulltext(cls, query, fulltext):
+        """
+        Filter the models.Copr query by the search phrase; every word has to
+        match (the beginning of) some word in the search document.  On
+        PostgreSQL, the results are ordered by relevance.
+        """
+        words = cls._words(fulltext)
+        if not words:
+            return query.filter(false())
+
+        search = models.CoprSearch
+        query = query.join(search, search.copr_id == models.Copr.id)
+        if not cls._postgres():
+            for word in words:
+                query = query.filter(
+                    search.document.like("%{}%".format(word)))
+            return query
+
+        tsquery = func.to_tsquery(
+            TS_CONFIG, " & ".join("'{}':*".format(word) for word in words))
+        query = query.filter(search.document.op("@@")(tsquery))
+        return query.order_by(None).order_by(
+            func.ts_rank(search.document, tsquery).desc(),
+            models.Copr.created_on.desc())
+
+
+@listens_for(Session, "after_flush")
+def enqueue_search_updates(session, flush_context):
+    """
+    Queue the search document updates for the projects affected by the
+    flushed Copr, Package and CoprChroot changes.
+    """
+    copr_ids = set()
+    watched = [(models.Copr, COPR_ATTRIBUTES),
+               (models.Package, PACKAGE_ATTRIBUTES),
+               (models.CoprChroot, COPR_CHROOT_ATTRIBUTES)]
+    for model, attributes in watched:
+        new, dirty, deleted = flushed_objects(session, flush_context, model)
+        for obj in new + [obj for obj in dirty if changed(obj, attributes)] + \
+                deleted:
+            if model is models.Copr:
+                copr_ids.add(obj.id)
+            else:
+                copr_ids.add(obj.copr_id)
+                # the package moved to another project
+                history = inspect(obj).attrs.copr_id.history
+                copr_ids.update(history.deleted or [])
+
+    copr_ids.discard(None)
+    if not copr_ids:
+        return
+    connection = session.connection()
+    CoprSearchLogic.enqueue(connection, copr_ids)
+    # see the update_indexes_quick command
+    copr = models.Copr.__table__.left
+    connection.execute(copr.update()
+                       .where(copr.c.id.in_(copr_ids))
+                       .values(latest_indexed_data_update=int(time.time())))
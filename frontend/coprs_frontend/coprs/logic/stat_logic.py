@@ -4,10 +4,16 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from coprs import app
 from coprs import db
+from coprs import rcp
 from coprs.models import CounterStat
 from coprs import helpers
 
 
+# Redis hash with counters incremented by CounterStatLogic.incr_later()
+PENDING_COUNTERS_KEY = "counter_stat_pending"
+FLUSHING_COUNTERS_KEY = "counter_stat_flushing"
+
+
 class CounterStatLogic(object):
 
     @classmethod
@@ -47,6 +53,51 @@ class CounterStatLogic(object):
         db.session.add(csl)
         return csl
 
+    @classmethod
+    def incr_later(cls, name, counter_type, count=1):
+        """
+        Cheap alternative to incr(), the counter is only incremented in Redis
+        (no database commit) and merged into the CounterStat table later by
+        flush_pending().
+        """
+        field = "{}|{}".format(counter_type, name)
+        rcp.get_connection().hincrby(PENDING_COUNTERS_KEY, field, count)
+
+    @classmethod
+    def flush_pending(cls):
+        """
+        Merge the counters incremented by incr_later() into the CounterStat
+        table, by one transaction.  Return the number of updated counters.
+        """
+        redis = rcp.get_connection()
+        # Atomically take over the pending counters, so the concurrent
+        # incr_later() calls are not lost.  If the previous flush failed, the
+        # flushing key still exists and needs to be processed first.
+        if not redis.exists(FLUSHING_COUNTERS_KEY):
+            if not redis.exists(PENDING_COUNTERS_KEY):
+                return 0
+            redis.rename(PENDING_COUNTERS_KEY, FLUSHING_COUNTERS_KEY)
+
+        by_type = defaultdict(dict)
+        for field, count in redis.hgetall(FLUSHING_COUNTERS_KEY).items():
+            counter_type, name = field.decode("utf-8").split("|", 1)
+            by_type[counter_type][name] = int(count)
+
+        updated = 0
+        for counter_type, counts in by_type.items():
+            existing = cls.get_multiply_same_type(counter_type, list(counts))
+            for stat in existing:
+                stat.counter = CounterStat.counter + counts.pop(stat.name)
+                updated += 1
+            for name, count in counts.items():
+                csl = cls.add(name, counter_type)
+                csl.counter = count
+                updated += 1
+
+        db.session.commit()
+        redis.delete(FLUSHING_COUNTERS_KEY)
+        return updated
+
     @classmethod
     def get_copr_repo_dl_stat(cls, copr):
         # chroot -> stat_name
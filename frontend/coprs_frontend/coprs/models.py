@@ -18,6 +18,7 @@ import zlib
 import modulemd_tools.yaml
 
 from sqlalchemy import outerjoin, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import column_property, validates
 from sqlalchemy.event import listens_for
@@ -336,6 +337,10 @@ class _CoprPublic(db.Model, helpers.Serializer, CoprSearchRelatedData):
     module_hotfixes = db.Column(db.Boolean, default=False, nullable=False, server_default="0")
 
     runtime_dependencies = db.Column(db.Text)
+    # JSON with resolved transitive runtime dependencies, or NULL if not yet
+    # resolved, see ComplexLogic.get_transitive_runtime_dependencies() and
+    # CoprRuntimeDependency
+    runtime_deps_closure = db.Column(db.Text)
 
     # optional tools to run after build
     fedora_review = db.Column(db.Boolean, default=False, nullable=False, server_default="0")
@@ -937,20 +942,33 @@ class Build(db.Model, helpers.Serializer):
     SCM_COMMIT = 'commit'
     SCM_PULL_REQUEST = 'pull-request'
 
+    # True for the read-only builds loaded from the build_archive table, see
+    # ArchiveLogic.get_build()
+    archived = False
+
     def __init__(self, *args, **kwargs):
         if kwargs.get('source_type') == helpers.BuildSourceEnum("custom"):
-            source_dict = json.loads(kwargs['source_json'])
-            if 'fedora-latest' in source_dict['chroot']:
-                arch = source_dict['chroot'].rsplit('-', 2)[2]
-                source_dict['chroot'] = \
-                    MockChroot.latest_fedora_branched_chroot(arch=arch).name
-            kwargs['source_json'] = json.dumps(source_dict)
+            kwargs['source_json'] = self.resolve_custom_chroot(
+                kwargs['source_json'])
 
         if kwargs.get('copr') and not kwargs.get('copr_dir'):
             kwargs['copr_dir'] = kwargs.get('copr').main_dir
 
         super(Build, self).__init__(*args, **kwargs)
 
+    @staticmethod
+    def resolve_custom_chroot(source_json):
+        """
+        Replace the 'fedora-latest-<arch>' chroot of the custom build source
+        with the actual latest Fedora chroot
+        """
+        source_dict = json.loads(source_json)
+        if 'fedora-latest' in source_dict['chroot']:
+            arch = source_dict['chroot'].rsplit('-', 2)[2]
+            source_dict['chroot'] = \
+                MockChroot.latest_fedora_branched_chroot(arch=arch).name
+        return json.dumps(source_dict)
+
     id = db.Column(db.Integer, primary_key=True)
     # single url to the source rpm, should not contain " ", "\n", "\t"
     pkgs = db.Column(db.Text)
@@ -985,6 +1003,10 @@ class Build(db.Model, helpers.Serializer):
 
     source_status = db.Column(db.Integer, default=StatusEnum("waiting"),
                               nullable=False)
+    # The Build.status value stored in database, so we can filter and paginate
+    # by the build status in SQL.  Kept in sync upon flush, see
+    # builds_logic.update_stored_status().
+    stored_status = db.Column(db.Integer, nullable=True)
     srpm_url = db.Column(db.Text)
 
     isolation = db.Column(db.Text, default="default")
@@ -1035,6 +1057,8 @@ class Build(db.Model, helpers.Serializer):
         db.Index('build_copr_id_package_id', "copr_id", "package_id"),
         db.Index("build_copr_id_build_id", "copr_id", "id", unique=True),
         db.Index("build_id_desc_per_copr_dir", id.desc(), "copr_dir_id"),
+        db.Index("build_copr_id_stored_status", "copr_id", "stored_status"),
+        db.Index("build_user_id_stored_status", "user_id", "stored_status"),
     )
 
     _cached_status = None
@@ -1383,7 +1407,9 @@ class Build(db.Model, helpers.Serializer):
         backend later applies builder user-VM separation policy (VMs are only
         re-used for builds which have the same build.sandbox value)
         """
-        submitter, _ = self.submitter
+        # Same as self.submitter[0], but without the (expensive and request
+        # context dependant) url_for() call.
+        submitter = self.user.name if self.user else self.submitted_by
         if not submitter:
             # If we don't know build submitter, use "random" value and keep the
             # build separated from any other.
@@ -2029,6 +2055,29 @@ class BuildChrootResult(db.Model, helpers.Serializer):
     )
 
 
+
+def _archive_table(table, *indexes):
+    """
+    Define the "<table>_archive" table with the same columns as the given
+    table, see coprs.logic.archive_logic.  There are no foreign keys, the
+    archived rows are never modified.
+    """
+    columns = [db.Column(column.name, column.type,
+                         primary_key=column.primary_key,
+                         nullable=column.nullable)
+               for column in table.columns]
+    name = table.name + "_archive"
+    return db.Table(
+        name, db.metadata, *columns,
+        *[db.Index("{}_{}".format(name, column), column)
+          for column in indexes])
+
+
+build_archive = _archive_table(Build.__table__, "copr_id", "package_id")
+build_chroot_archive = _archive_table(BuildChroot.__table__, "build_id")
+build_chroot_result_archive = _archive_table(BuildChrootResult.__table__,
+                                             "build_chroot_id")
+
 class LegalFlag(db.Model, helpers.Serializer):
     id = db.Column(db.Integer, primary_key=True)
     # message from user who raised the flag (what he thinks is wrong)
@@ -2092,6 +2141,9 @@ class Action(db.Model, helpers.Serializer):
     created_on = db.Column(db.Integer, index=True)
     # time ended as returned by int(time.time())
     ended_on = db.Column(db.Integer, index=True)
+    # the action is claimed by a Backend action processor till this time (as
+    # returned by int(time.time())), see ActionsLogic.claim_waiting()
+    lease_expires_on = db.Column(db.Integer, nullable=True)
 
     def __str__(self):
         return self.__unicode__()
@@ -2179,7 +2231,10 @@ class Batch(db.Model):
     blocked_by_id = db.Column(db.Integer, db.ForeignKey("batch.id"), nullable=True)
     blocked_by = db.relationship("Batch", remote_side=[id])
 
-    _is_finished = None
+    # Batch.finished_slow value, maintained automatically upon the Build and
+    # BuildChroot state changes, see coprs.logic.batches_logic
+    stored_finished = db.Column(db.Boolean, default=False, nullable=False,
+                                server_default="false")
 
     @property
     def finished_slow(self):
@@ -2187,13 +2242,16 @@ class Batch(db.Model):
         Check if this batch is finished by iterating through all the contained
         builds.
         """
-        cache_timeout = 3600
-        redis_cache_id = "batch_finished_{}".format(self.id)
-
-        if app.cache.get(redis_cache_id):
-            # prolong the cache after the access
-            app.cache.set(redis_cache_id, True, timeout=cache_timeout)
-            return True
+        # Builds in these stored states are certainly not finished, so the
+        # unfinished batches (the common case for blocking batches) are
+        # detected by a single query, without loading all the builds.
+        unfinished = Build.query.filter(
+            Build.batch_id == self.id,
+            Build.stored_status.in_([StatusEnum(s) for s in [
+                "importing", "pending", "starting", "running"]]),
+        )
+        if db.session.query(unfinished.exists()).scalar():
+            return False
 
         if not self.builds:
             # no builds assigned to this batch (yet)
@@ -2202,21 +2260,15 @@ class Batch(db.Model):
         # Some Batches are rather large;  use the all+map pair here, not a list
         # comprehension, to escape the loop as soon as possible on the first
         # miss (comprehension would go through all builds unnecessarily)
-        if all(map(lambda x: x.finished, self.builds)):
-            # nothing can switch finished batch to non-finished state, cache it
-            app.cache.set(redis_cache_id, True, cache_timeout)
-            return True
-        return False
+        return all(map(lambda x: x.finished, self.builds))
 
     @property
     def finished(self):
         """
         Same as self.finished_slow, but doesn't require re-calculation for all
-        the builds, buildchroots, states, etc.  Or checking Redis caches.
+        the builds, buildchroots, states, etc.  The value is stored in database.
         """
-        if self._is_finished is None:
-            self._is_finished = self.finished_slow
-        return self._is_finished
+        return self.stored_finished
 
     @property
     def blocked(self):
@@ -2429,6 +2481,170 @@ class CancelRequest(db.Model):
     what = db.Column(db.String(100), nullable=False, primary_key=True)
 
 
+class PendingQueueTask(db.Model):
+    """
+    Materialized Backend build queue, one row per SRPM (Build) or RPM
+    (BuildChroot) task to be processed by Backend.  The row carries only the
+    data needed by the /backend/pending-jobs/ route so the queue can be read by
+    a single index scan.  The table is maintained automatically upon the Build
+    and BuildChroot state changes, see coprs.logic.pending_queue_logic.
+    """
+    __tablename__ = "pending_queue"
+    __table_args__ = (
+        db.Index("pending_queue_order", "srpm", "background", "build_id"),
+    )
+
+    # <build_id> for SRPM builds, or <build_id>-<chroot> for RPM builds
+    task_id = db.Column(db.String(100), primary_key=True)
+    build_id = db.Column(
+        db.Integer,
+        db.ForeignKey("build.id", ondelete="CASCADE"),
+        nullable=False, index=True,
+    )
+    batch_id = db.Column(db.Integer, db.ForeignKey("batch.id"), nullable=True)
+    batch = db.relationship("Batch")
+    # NULL for SRPM builds
+    mock_chroot_id = db.Column(db.Integer, db.ForeignKey("mock_chroot.id"),
+                               nullable=True)
+    mock_chroot = db.relationship("MockChroot")
+
+    srpm = db.Column(db.Boolean, nullable=False)
+    background = db.Column(db.Boolean, nullable=False)
+    project_owner = db.Column(db.Text, nullable=False)
+    sandbox = db.Column(db.Text, nullable=False)
+    # Mock chroot name, or the chroot requested by "custom" SRPM builds
+    chroot = db.Column(db.Text, nullable=True)
+
+    @property
+    def blocked(self):
+        """
+        Same as Build.blocked, the task is blocked by unfinished parent Batch.
+        """
+        return bool(self.batch and self.batch.blocked)
+
+    def to_dict(self):
+        """
+        Return the task description for Backend, see get_build_record() and
+        get_srpm_build_record() with for_backend=True.
+        """
+        record = {
+            "task_id": self.task_id,
+            "build_id": self.build_id,
+            "project_owner": self.project_owner,
+            "sandbox": self.sandbox,
+            "background": self.background,
+            "chroot": self.chroot,
+        }
+        if not self.srpm:
+            record["tags"] = self.mock_chroot.tags
+        return record
+
+
+class LatestBuildChroot(db.Model):
+    """
+    Pointer to the latest BuildChroot (the one with the highest build ID) of
+    the Package built in the given CoprDir and MockChroot, so the project
+    monitor can be read by a single index scan.  The table is maintained
+    automatically when BuildChroots are created or deleted, and when a Build
+    gets its Package assigned, see coprs.logic.builds_logic.
+    """
+    __tablename__ = "latest_build_chroot"
+
+    copr_dir_id = db.Column(
+        db.Integer,
+        db.ForeignKey("copr_dir.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    package_id = db.Column(
+        db.Integer,
+        db.ForeignKey("package.id", ondelete="CASCADE"),
+        primary_key=True, index=True,
+    )
+    mock_chroot_id = db.Column(
+        db.Integer,
+        db.ForeignKey("mock_chroot.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    build_id = db.Column(
+        db.Integer,
+        db.ForeignKey("build.id", ondelete="CASCADE"),
+        nullable=False, index=True,
+    )
+    build_chroot_id = db.Column(
+        db.Integer,
+        db.ForeignKey("build_chroot.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    build_chroot = db.relationship("BuildChroot")
+
+
+class CoprSearch(db.Model):
+    """
+    The full-text search document of the Copr (owner and project name, package
+    and chroot names, description and instructions).  On PostgreSQL this is a
+    weighted tsvector with a GIN index, other databases (SQLite in the
+    test-suite) store just the lower-cased text.  Updated asynchronously, see
+    CoprSearchQueue.
+    """
+    __tablename__ = "copr_search"
+    __table_args__ = (
+        db.Index("copr_search_document", "document",
+                 postgresql_using="gin"),
+    )
+
+    copr_id = db.Column(
+        db.Integer,
+        db.ForeignKey("copr.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    document = db.Column(db.Text().with_variant(TSVECTOR(), "postgresql"),
+                         nullable=False)
+    # time of the last indexing, as returned by int(time.time()); unlike the
+    # Copr.latest_indexed_data_update (time of the last indexed data change)
+    indexed_on = db.Column(db.Integer, nullable=False)
+
+
+class CoprSearchQueue(db.Model):
+    """
+    Projects waiting for the CoprSearch document update.  The rows are added
+    automatically upon the Copr, Package and CoprChroot changes (see
+    coprs.logic.search_logic) and processed in batches by the
+    'copr-frontend process-search-queue' indexer.  One project may be queued
+    several times.
+    """
+    __tablename__ = "copr_search_queue"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # no foreign key, the project may be deleted before the row is processed
+    copr_id = db.Column(db.Integer, nullable=False)
+    # as returned by int(time.time())
+    queued_on = db.Column(db.Integer, nullable=False)
+
+
+class CoprRuntimeDependency(db.Model):
+    """
+    The reverse edges of the stored Copr.runtime_deps_closure, one row for
+    each project (full name, even a non-existing one) the resolved closure
+    depends on.  So the closures to drop, when a project is created, deleted
+    or changes its runtime dependencies, are found by an index lookup.  See
+    coprs.logic.complex_logic.
+    """
+    __tablename__ = "copr_runtime_dependency"
+    __table_args__ = (
+        db.UniqueConstraint("copr_id", "dependency",
+                            name="copr_runtime_dependency_uniq"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    copr_id = db.Column(
+        db.Integer,
+        db.ForeignKey("copr.id", ondelete="CASCADE"),
+        nullable=False, index=True,
+    )
+    # e.g. "@group/project"
+    dependency = db.Column(db.Text, nullable=False, index=True)
+
+
 class ReviewedOutdatedChroot(db.Model):
     id = db.Column(db.Integer, primary_key=True)
 
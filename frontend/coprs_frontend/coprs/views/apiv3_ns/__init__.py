@@ -1,3 +1,5 @@
+import base64
+import binascii
 import json
 import flask
 import wtforms
@@ -18,9 +20,11 @@ from coprs.exceptions import (
 )
 from coprs.logic.complex_logic import ComplexLogic
 from coprs.helpers import streamed_json
+from coprs.views.misc import add_etag
 
 
 apiv3_ns = flask.Blueprint("apiv3_ns", __name__, url_prefix="/api_3")
+apiv3_ns.after_request(add_etag)
 
 
 # HTTP methods
@@ -60,6 +64,19 @@ def query_params():
     return query_params_decorator
 
 
+def get_arg_to_bool(argument):
+    """
+    Through GET, we send requests like '/?with_latest_build=True', so the
+    argument is passed down as "string".  But by default, as function argument,
+    the value may be boolean, too.
+    """
+    if not argument:
+        return argument
+    if argument in [True, "True", "true", 1, "1"]:
+        return True
+    return False
+
+
 def pagination():
     def pagination_decorator(f):
         @wraps(f)
@@ -92,6 +109,7 @@ class PaginationForm(wtforms.Form):
     order = wtforms.StringField("Order by", validators=[wtforms.validators.Optional()])
     order_type = wtforms.SelectField("Order type", validators=[wtforms.validators.Optional()],
                                      choices=[("ASC", "ASC"), ("DESC", "DESC")], default="ASC")
+    cursor = wtforms.StringField("Cursor", validators=[wtforms.validators.Optional()])
 
 
 def get_copr(ownername=None, projectname=None):
@@ -102,17 +120,29 @@ def get_copr(ownername=None, projectname=None):
 
 
 class Paginator(object):
+    """
+    Both the LIMIT/OFFSET and the keyset (cursor) pagination is supported.
+    The opaque `meta["next"]` cursor points right behind the last returned
+    item, so the next page is filtered by the indexed (order, id) key instead
+    of skipping the `offset` rows, and each page costs the same.
+    """
     LIMIT = None
     OFFSET = 0
     ORDER = "id"
 
-    def __init__(self, query, model, limit=None, offset=None, order=None, order_type=None, **kwargs):
+    def __init__(self, query, model, limit=None, offset=None, order=None, order_type=None,
+                 cursor=None, keyset=True, **kwargs):
         self.query = query
         self.model = model
+        # False if the query is pre-ordered (e.g. by relevance), the `next`
+        # cursor then carries just the offset
+        self.keyset = keyset
         self.limit = limit or self.LIMIT
         self.offset = offset or self.OFFSET
         self.order = order or self.ORDER
         self.order_type = order_type
+        self.cursor = self._decode_cursor(cursor) if cursor else None
+        self.next = None
         if not self.order_type:
             # desc/asc unspecified, use some guessed defaults
             if self.order == 'id':
@@ -120,14 +150,26 @@ class Paginator(object):
             if self.order == 'name':
                 self.order_type = 'ASC'
 
-    def get(self):
-        return self.paginate_query(self.query)
-
-    def paginate_query(self, query):
-        """
-        Return `self.query` with all pagination parameters (limit, offset,
-        order) but do not run it.
-        """
+    @staticmethod
+    def _decode_cursor(cursor):
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            offset, key = data.get("offset"), data.get("key")
+            if offset is not None and \
+                    not (Paginator._is_type(offset, int) and offset >= 0):
+                raise ValueError
+            if key is not None and len(key) != 2:
+                raise ValueError
+        except (ValueError, TypeError, AttributeError, binascii.Error) as exc:
+            raise BadRequest("Invalid pagination cursor") from exc
+        return data
+
+    @staticmethod
+    def _encode_cursor(data):
+        return base64.urlsafe_b64encode(
+            json.dumps(data).encode("utf-8")).decode("ascii")
+
+    def _order_attr(self):
         order_attr = getattr(self.model, self.order, None)
         if not order_attr:
             msg = "Cannot order by {}, {} doesn't have such property".format(
@@ -138,26 +180,114 @@ class Paginator(object):
         # a real database column
         if not isinstance(order_attr, InstrumentedAttribute):
             raise CoprHttpException("Cannot order by {}".format(self.order))
+        return order_attr
 
+    def _order_by(self):
+        """
+        The ORDER BY clauses, with the primary key as a tie-breaker so the
+        order is stable and every row has a unique (order, id) key.  NULL
+        values are sorted last, regardless of the database.
+        """
+        order_attr = self._order_attr()
         order_fun = (lambda x: x)
         if self.order_type == 'ASC':
             order_fun = sqlalchemy.asc
         elif self.order_type == 'DESC':
             order_fun = sqlalchemy.desc
 
-        return (query.order_by(order_fun(order_attr))
-                .limit(self.limit)
-                .offset(self.offset))
+        if self.order == "id":
+            return [order_fun(order_attr)]
+        order = order_fun(order_attr)
+        if self._nullable(order_attr):
+            order = order.nullslast()
+        return [order, order_fun(self.model.id)]
+
+    @staticmethod
+    def _nullable(order_attr):
+        columns = getattr(order_attr.property, "columns", [])
+        return any(column.nullable for column in columns)
+
+    @staticmethod
+    def _is_type(value, python_type):
+        # bool is a subclass of int
+        if isinstance(value, bool) and python_type is not bool:
+            return False
+        return python_type is not None and isinstance(value, python_type)
+
+    @staticmethod
+    def _python_type(order_attr):
+        try:
+            return order_attr.property.columns[0].type.python_type
+        except (AttributeError, IndexError, NotImplementedError):
+            return None
+
+    def _after_cursor(self, query):
+        """
+        Filter the query to the rows ordered after the cursor key
+        """
+        value, last_id = self.cursor["key"]
+        order_attr = self._order_attr()
+        # the key comes from the client, it must match the column types
+        if not self._is_type(last_id, int) or value is not None and \
+                not self._is_type(value, self._python_type(order_attr)):
+            raise BadRequest("Invalid pagination cursor")
+        pk = self.model.id
+        after = (lambda a, b: a < b) if self.order_type == "DESC" \
+            else (lambda a, b: a > b)
+
+        if self.order == "id":
+            return query.filter(after(pk, last_id))
+        if value is None:
+            return query.filter(order_attr.is_(None), after(pk, last_id))
+        condition = after(sqlalchemy.tuple_(order_attr, pk),
+                          sqlalchemy.tuple_(value, last_id))
+        if self._nullable(order_attr):
+            condition = sqlalchemy.or_(condition, order_attr.is_(None))
+        return query.filter(condition)
+
+    def get(self):
+        return self.paginate_query(self.query)
+
+    def paginate_query(self, query):
+        """
+        Return `self.query` with all pagination parameters (limit, offset or
+        cursor, order) but do not run it.
+        """
+        if self.keyset:
+            query = query.order_by(None)
+        query = query.order_by(*self._order_by())
+        if self.cursor:
+            if self.cursor.get("key") and self.keyset:
+                query = self._after_cursor(query)
+            self.offset = self.cursor.get("offset") or 0
+        return query.limit(self.limit).offset(self.offset)
+
+    def fetch(self):
+        """
+        Run the query, and calculate the `next` cursor from the last item
+        """
+        items = list(self.get())
+        self.next = None
+        if self.limit and len(items) == self.limit:
+            last = items[-1]
+            value = getattr(last, self.order)
+            if self.keyset and isinstance(value, (int, str, type(None))):
+                data = {"key": [value, last.id]}
+            else:
+                # values we can't put into JSON (e.g. datetime), offset it is
+                data = {"offset": self.offset + self.limit}
+            self.next = self._encode_cursor(data)
+        return items
 
     @property
     def meta(self):
-        return {k: getattr(self, k) for k in ["limit", "offset", "order", "order_type"]}
+        return {k: getattr(self, k) for k in ["limit", "offset", "order", "order_type", "next"]}
 
     def map(self, fun):
-        return [fun(x) for x in self.get()]
+        return [fun(x) for x in self.fetch()]
 
     def to_dict(self):
-        return [x.to_dict() for x in self.get()]
+        return [x.to_dict() for x in self.fetch()]
 
 
 class SubqueryPaginator(Paginator):
@@ -175,36 +305,7 @@ class SubqueryPaginator(Paginator):
     def get(self):
         subquery = self.paginate_query(self.subquery).subquery()
         query = self.query.filter(self.pk.in_(subquery))
-        return query.all()
-
-
-class ListPaginator(Paginator):
-    """
-    The normal `Paginator` class works with a SQLAlchemy query object and
-    therefore can do limits and ordering on database level, which is ideal.
-    However, in some special cases, we already have a list of objects fetched
-    from database and need to adjust it based on user pagination preferences,
-    hence this special case of `Paginator` class.
-
-    It isn't efficient, it isn't pretty. Please use `Paginator` if you can.
-    """
-    def get(self):
-        objects = self.query
-        reverse = self.order_type != "ASC"
-
-        if not hasattr(self.model, self.order):
-            msg = "Cannot order by {}, {} doesn't have such property".format(
-                self.order, self.model.__tablename__)
-            raise CoprHttpException(msg)
-
-        if self.order:
-            objects.sort(key=lambda x: getattr(x, self.order), reverse=reverse)
-
-        limit = None
-        if self.limit:
-            limit = self.offset + self.limit
-
-        return objects[self.offset : limit]
+        return query.order_by(None).order_by(*self._order_by()).all()
 
 
 def editable_copr(f):
@@ -1,4 +1,7 @@
+import json
 import os
+import time
+
 import flask
 from sqlalchemy.orm import joinedload
 
@@ -6,15 +9,18 @@ from werkzeug.datastructures import MultiDict
 from werkzeug.utils import secure_filename
 
 from copr_common.enums import StatusEnum
-from coprs import db, forms, models
-from coprs.exceptions import (BadRequest, AccessRestricted)
-from coprs.views.misc import api_login_required
+from coprs import app, db, forms, models
+from coprs.exceptions import (BadRequest, AccessRestricted, CoprHttpException)
+from coprs.views.misc import api_login_required, conditional_get
 from coprs.views.apiv3_ns import apiv3_ns
+from coprs.logic.archive_logic import ArchiveLogic
 from coprs.logic.complex_logic import ComplexLogic
 from coprs.logic.builds_logic import BuildsLogic
+from coprs.logic.build_events_logic import BuildEventsLogic
 
 from . import (
     get_copr,
+    get_arg_to_bool,
     file_upload,
     query_params,
     pagination,
@@ -84,26 +90,140 @@ def render_build(build):
 
 @apiv3_ns.route("/build/<int:build_id>/", methods=GET)
 @apiv3_ns.route("/build/<int:build_id>", methods=GET)
+@conditional_get(BuildsLogic.fingerprint)
 def get_build(build_id):
     build = ComplexLogic.get_build_safe(build_id)
     return render_build(build)
 
 
+@apiv3_ns.route("/build/states/", methods=GET)
+@query_params()
+def get_build_states(build_ids, chroots=False):
+    """
+    Return the states of up to BUILD_STATES_MAX_IDS builds at once, e.g.
+    '/build/states/?build_ids=1,2,3&chroots=True'.  This is meant for clients
+    watching many builds, so they don't have to poll them one by one.  The
+    non-existing builds are omitted from the output.
+    """
+    try:
+        build_ids = sorted({int(build_id) for build_id
+                            in build_ids.split(",") if build_id.strip()})
+    except ValueError as ex:
+        raise BadRequest("Invalid build_ids: {}".format(build_ids)) from ex
+
+    limit = app.config["BUILD_STATES_MAX_IDS"]
+    if len(build_ids) > limit:
+        raise BadRequest("Too many build_ids, the limit is {}".format(limit))
+
+    items = BuildsLogic.get_states(build_ids, get_arg_to_bool(chroots))
+    return flask.jsonify(items=items, meta={"limit": limit})
+
+
+@apiv3_ns.route("/build/events/", methods=GET + POST)
+@apiv3_ns.route("/build/events", methods=GET + POST)
+@api_login_required
+def get_build_events():
+    """
+    Stream the state changes of the given builds (build_ids), of the builds in
+    a project (ownername and projectname) and of the builds submitted by a
+    user (username) as Server-Sent Events; the data of each event is
+    {"build_id": ..., "chroot": ..., "state": ...}, the "chroot" is null for
+    the build state.  The stream starts with the current states of the given
+    build_ids.  The parameters are either in the query string
+    (?build_ids=1,2,3) or, for many build IDs, in the POSTed JSON
+    ({"build_ids": [1, 2, 3]}).  Each stream occupies one frontend worker, so
+    only authenticated users may open them, and the number of open streams is
+    limited per user and in total.
+    """
+    if flask.request.method == "POST":
+        params = flask.request.json or {}
+        build_ids = params.get("build_ids") or []
+    else:
+        params = flask.request.args
+        build_ids = (params.get("build_ids") or "").split(",")
+
+    try:
+        build_ids = sorted({int(build_id) for build_id in build_ids
+                            if str(build_id).strip()})
+    except ValueError as ex:
+        raise BadRequest("Invalid build_ids: {}".format(build_ids)) from ex
+
+    limit = app.config["BUILD_EVENTS_MAX_IDS"]
+    if len(build_ids) > limit:
+        raise BadRequest("Too many build_ids, the limit is {}".format(limit))
+
+    if params.get("ownername") and params.get("projectname"):
+        # fail early for non-existing projects
+        get_copr(params["ownername"], params["projectname"])
+
+    channels = BuildEventsLogic.channels(
+        build_ids, params.get("ownername"), params.get("projectname"),
+        params.get("username"))
+    if not channels:
+        raise BadRequest("Specify build_ids, ownername and projectname, "
+                         "or username")
+
+    deadline = time.time() + app.config["BUILD_EVENTS_MAX_SECONDS"]
+    username = flask.g.user.username
+    stream_id = BuildEventsLogic.open_stream(
+        deadline, app.config["BUILD_EVENTS_MAX_STREAMS"],
+        app.config["BUILD_EVENTS_MAX_STREAMS_PER_USER"], username)
+    if stream_id is None:
+        raise CoprHttpException("Too many open build event streams, poll the "
+                                "/build/states/ instead", code=503)
+
+    # Subscribe first, so no change is lost between the initial states and
+    # the first event
+    pubsub = BuildEventsLogic.subscribe(channels)
+    initial = []
+    for item in BuildsLogic.get_states(build_ids, with_chroots=True):
+        initial.append({"build_id": item["id"], "chroot": None,
+                        "state": item["state"]})
+        initial.extend({"build_id": item["id"], "chroot": chroot,
+                        "state": state}
+                       for chroot, state in sorted(item["chroots"].items()))
+
+    def _stream():
+        keepalive = app.config["BUILD_EVENTS_KEEPALIVE"]
+        try:
+            for event in initial:
+                yield "data: {}\n\n".format(json.dumps(event))
+            last = time.time()
+            while time.time() < deadline:
+                message = pubsub.get_message(timeout=keepalive)
+                if message is not None:
+                    yield "data: {}\n\n".format(message["data"].decode("utf-8"))
+                    last = time.time()
+                elif time.time() - last >= keepalive:
+                    yield ": keepalive\n\n"
+                    last = time.time()
+        finally:
+            pubsub.close()
+            BuildEventsLogic.close_stream(stream_id, username)
+
+    return flask.Response(_stream(), mimetype="text/event-stream",
+                          headers={"Cache-Control": "no-cache"})
+
+
+class BuildsPaginator(SubqueryPaginator):
+    """
+    Paginate both the live and the archived builds.  The `subquery` selects
+    from the ArchiveLogic.all_builds() alias (the `model`), the live builds
+    on the page are then loaded by `query`, the archived ones from the archive
+    tables.
+    """
+    def get(self):
+        build_ids = [build_id for (build_id,)
+                     in self.paginate_query(self.subquery)]
+        return ArchiveLogic.load_builds(build_ids, self.query)
+
+
 @apiv3_ns.route("/build/list/", methods=GET)
 @pagination()
 @query_params()
 def get_build_list(ownername, projectname, packagename=None, status=None, **kwargs):
     copr = get_copr(ownername, projectname)
 
-    # WORKAROUND
-    # We can't filter builds by status directly in the database, because we
-    # use a logic in Build.status property to determine a build status.
-    # Therefore if we want to filter by `status`, we need to query all builds
-    # and filter them in the application and then return the desired number.
-    limit = kwargs["limit"]
-    paginator_limit = None if status else kwargs["limit"]
-    del kwargs["limit"]
-
     # Loading relationships straight away makes running `to_dict` somewhat
     # faster, which adds up over time, and  brings a significant speedup for
     # large projects
@@ -114,18 +234,19 @@ def get_build_list(ownername, projectname, packagename=None, status=None, **kwar
         joinedload(models.Build.copr),
     )
 
-    subquery = query.filter(models.Build.copr == copr)
+    # the archived builds are listed, too
+    build = ArchiveLogic.all_builds()
+    subquery = db.session.query(build).filter(build.copr_id == copr.id)
     if packagename:
-        subquery = BuildsLogic.filter_by_package_name(subquery, packagename)
+        subquery = BuildsLogic.filter_by_package_name(subquery, packagename,
+                                                      build)
+    if status:
+        subquery = BuildsLogic.filter_by_status(subquery, status, build)
 
-    paginator = SubqueryPaginator(query, subquery, models.Build, limit=paginator_limit, **kwargs)
+    paginator = BuildsPaginator(query, subquery, build, **kwargs)
 
     builds = paginator.map(to_dict)
 
-    if status:
-        builds = [b for b in builds if b["state"] == status][:limit]
-        paginator.limit = limit
-
     return flask.jsonify(items=builds, meta=paginator.meta)
 
 
@@ -300,16 +421,136 @@ def create_from_custom():
     return process_creating_new_build(copr, form, create_new_build)
 
 
-def process_creating_new_build(copr, form, create_new_build):
-    if not form.validate_on_submit():
-        raise BadRequest("Bad request parameters: {0}".format(form.errors))
+# Source types accepted by /build/create/bulk; the form factory, the fields
+# kept as lists, and the function turning the validated form into the list of
+# BuildsLogic.*_source() dicts
+BULK_SOURCE_TYPES = {
+    "url": (
+        forms.BuildFormUrlFactory, [],
+        lambda form: [BuildsLogic.url_source(url)
+                      for url in form.pkgs.data.split("\n")]),
+    "scm": (
+        forms.BuildFormScmFactory, [],
+        lambda form: [BuildsLogic.scm_source(
+            form.scm_type.data, form.clone_url.data, form.committish.data,
+            form.subdirectory.data, form.spec.data,
+            form.srpm_build_method.data)]),
+    "distgit": (
+        forms.BuildFormDistGitSimpleFactory, [],
+        lambda form: [BuildsLogic.distgit_source(
+            form.package_name.data, form.distgit.data, form.namespace.data,
+            form.committish.data)]),
+    "pypi": (
+        forms.BuildFormPyPIFactory, ["python_versions"],
+        lambda form: [BuildsLogic.pypi_source(
+            form.pypi_package_name.data, form.pypi_package_version.data,
+            form.spec_template.data,
+            form.python_versions.data or form.python_versions.default)]),
+    "rubygems": (
+        forms.BuildFormRubyGemsFactory, [],
+        lambda form: [BuildsLogic.rubygems_source(form.gem_name.data)]),
+    "custom": (
+        forms.BuildFormCustomFactory, [],
+        lambda form: [BuildsLogic.custom_source(
+            form.script.data, form.chroot.data, form.builddeps.data,
+            form.resultdir.data)]),
+}
+
+
+# The options shared by all the builds in /build/create/bulk, not allowed in the
+# per-build specifications
+BULK_SHARED_OPTIONS = ["chroots", "exclude_chroots", "timeout", "enable_net",
+                       "background", "project_dirname", "bootstrap",
+                       "isolation", "after_build_id", "with_build_id"]
+
+
+@apiv3_ns.route("/build/create/bulk", methods=POST)
+@api_login_required
+def create_bulk():
+    """
+    Submit many builds into one project by one request.  The input is the
+    usual build options (chroots, timeout, ...) shared by all the builds, and
+    the "builds" list of source specifications, e.g.
+    {"source_type": "scm", "clone_url": "..."}, with the same fields the
+    /build/create/<source_type> routes accept, except for the shared
+    options (BULK_SHARED_OPTIONS).  All the builds are validated first, and
+    created in one transaction; the response is the list of new build IDs.
+    """
+    copr = get_copr()
+    options = rename_fields(json2form.get_input_dict())
+    specs = options.pop("builds", None)
+    for name in ["ownername", "projectname"]:
+        options.pop(name, None)
+
+    if not specs or not isinstance(specs, list):
+        raise BadRequest("No builds specified")
+
+    limit = app.config["BUILD_CREATE_BULK_MAX"]
+    if len(specs) > limit:
+        raise BadRequest("Too many builds, the limit is {}".format(limit))
+
+    if options.get("after_build_id") or options.get("with_build_id"):
+        raise BadRequest("Batches are not supported for bulk builds")
+
+    form_classes = {}
+    sources = []
+    errors = []
+    form = None
+    for index, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            errors.append("builds[{}]: Not a build specification object"
+                          .format(index))
+            continue
+        shared = [name for name in BULK_SHARED_OPTIONS if name in spec]
+        if shared:
+            errors.append("builds[{}]: {} can be only set for all the builds"
+                          .format(index, ", ".join(shared)))
+            continue
+
+        spec = rename_fields(spec)
+        source_type = spec.pop("source_type", None)
+        if source_type not in BULK_SOURCE_TYPES:
+            errors.append("builds[{}]: Unsupported source_type {}"
+                          .format(index, source_type))
+            continue
+
+        factory, lists, get_sources = BULK_SOURCE_TYPES[source_type]
+        if source_type not in form_classes:
+            form_classes[source_type] = factory(copr.active_chroots)
+
+        spec.update(options)
+        data = json2form.form_compatible_data(
+            spec, preserve=["chroots", "exclude_chroots"] + lists)
+        form = form_classes[source_type](MultiDict(data), meta={'csrf': False})
+        if not form.validate():
+            errors.append("builds[{}]: {}".format(index, form.errors))
+            continue
+        sources.extend(get_sources(form))
+
+    if errors:
+        raise BadRequest("Bad request parameters: {}".format(", ".join(errors)))
 
     if not flask.g.user.can_build_in(copr):
         raise AccessRestricted("User {} is not allowed to build in the copr: {}"
                                .format(flask.g.user.username, copr.full_name))
+
+    # The shared options are the same in all the forms, take the last one
+    build_options = generic_build_options(form)
+    del build_options["after_build_id"]
+    del build_options["with_build_id"]
+    build_ids = BuildsLogic.create_new_bulk(flask.g.user, copr, sources,
+                                            **build_options)
+    db.session.commit()
+    return flask.jsonify({"builds": build_ids})
+
+
+def generic_build_options(form):
+    """
+    The build options from the validated form, shared by all the source types
+    """
     form.isolation.data = "unchanged" if form.isolation.data is None else form.isolation.data
 
-    generic_build_options = {
+    options = {
         'chroot_names': form.selected_chroots,
         'background': form.background.data,
         'copr_dirname': form.project_dirname.data,
@@ -321,11 +562,23 @@ def process_creating_new_build(copr, form, create_new_build):
     }
 
     if form.enable_net.data is not None:
-        generic_build_options['enable_net'] = form.enable_net.data
+        options['enable_net'] = form.enable_net.data
+    return options
+
+
+def process_creating_new_build(copr, form, create_new_build):
+    if not form.validate_on_submit():
+        raise BadRequest("Bad request parameters: {0}".format(form.errors))
+
+    if not flask.g.user.can_build_in(copr):
+        raise AccessRestricted("User {} is not allowed to build in the copr: {}"
+                               .format(flask.g.user.username, copr.full_name))
+
+    build_options = generic_build_options(form)
 
     # From URLs it can be created multiple builds at once
     # so it can return a list
-    build = create_new_build(generic_build_options)
+    build = create_new_build(build_options)
     db.session.commit()
 
     if type(build) == list:
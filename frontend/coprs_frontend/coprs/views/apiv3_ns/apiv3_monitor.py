@@ -7,6 +7,7 @@ import flask
 from coprs.exceptions import BadRequest
 from coprs.logic.builds_logic import BuildsMonitorLogic
 from coprs.logic.coprs_logic import CoprDirsLogic
+from coprs.views.misc import conditional_get
 from coprs.views.apiv3_ns import (
     apiv3_ns,
     GET,
@@ -48,8 +49,24 @@ def monitor_generator(copr_dir, additional_fields):
     checkpoint("Last package queried")
 
 
+def _get_copr_dir(ownername, projectname, project_dirname=None):
+    copr = get_copr(ownername, projectname)
+    if project_dirname:
+        return CoprDirsLogic.get_by_copr(copr, project_dirname)
+    return copr.main_dir
+
+
+def monitor_fingerprint(ownername, projectname, project_dirname=None):
+    """
+    The conditional GET support for package_monitor()
+    """
+    return BuildsMonitorLogic.fingerprint(
+        _get_copr_dir(ownername, projectname, project_dirname))
+
+
 @apiv3_ns.route("/monitor", methods=GET)
 @query_params()
+@conditional_get(monitor_fingerprint)
 def package_monitor(ownername, projectname, project_dirname=None):
     """
     For list of the project packages return list of JSON dictionaries informing
@@ -59,8 +76,6 @@ def package_monitor(ownername, projectname, project_dirname=None):
 
     additional_fields = flask.request.args.getlist("additional_fields[]")
 
-    copr = get_copr(ownername, projectname)
-
     valid_additional_fields = [
         "url_build_log",
         "url_backend_log",
@@ -81,10 +96,7 @@ def package_monitor(ownername, projectname, project_dirname=None):
     else:
         additional_fields = set()
 
-    if project_dirname:
-        copr_dir = CoprDirsLogic.get_by_copr(copr, project_dirname)
-    else:
-        copr_dir = copr.main_dir
+    copr_dir = _get_copr_dir(ownername, projectname, project_dirname)
 
     # Preload those to avoid the error sqlalchemy.orm.exc.DetachedInstanceError
     # http://sqlalche.me/e/13/bhk3
@@ -18,7 +18,8 @@ from coprs.logic.packages_logic import PackagesLogic
 # @TODO if we need to do this on several places, we should figure a better way to do it
 from coprs.views.apiv3_ns.apiv3_builds import to_dict as build_to_dict
 
-from . import query_params, pagination, get_copr, GET, POST, PUT, DELETE, Paginator
+from . import (query_params, pagination, get_copr, get_arg_to_bool, GET, POST,
+               PUT, DELETE, Paginator)
 from .json2form import get_form_compatible_data
 
 
@@ -84,19 +85,6 @@ def rename_fields(input):
     return output
 
 
-def get_arg_to_bool(argument):
-    """
-    Through GET, we send requests like '/?with_latest_build=True', so the
-    argument is passed down as "string".  But by default, as function argument,
-    the value may be boolean, too.
-    """
-    if not argument:
-        return argument
-    if argument in [True, "True", "true", 1, "1"]:
-        return True
-    return False
-
-
 @apiv3_ns.route("/package", methods=GET)
 @query_params()
 def get_package(ownername, projectname, packagename,
@@ -124,7 +112,7 @@ def get_package_list(ownername, projectname, with_latest_build=False,
     copr = get_copr(ownername, projectname)
     query = PackagesLogic.get_all(copr.id)
     paginator = Paginator(query, models.Package, **kwargs)
-    packages = paginator.get().all()
+    packages = paginator.fetch()
 
     if len(packages) > MAX_PACKAGES_WITHOUT_PAGINATION:
         raise ApiError("Too many packages, please use pagination. "
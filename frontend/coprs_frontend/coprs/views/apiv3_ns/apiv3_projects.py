@@ -114,7 +114,9 @@ def get_project_list(ownername=None, **kwargs):
 def search_projects(query, **kwargs):
     try:
         search_query = CoprsLogic.get_multiple_fulltext(query)
-        paginator = Paginator(search_query, models.Copr, **kwargs)
+        # ordered by relevance, no keyset pagination
+        paginator = Paginator(search_query, models.Copr, keyset=False,
+                              **kwargs)
         projects = paginator.map(to_dict)
     except ValueError as ex:
         raise BadRequest(str(ex))
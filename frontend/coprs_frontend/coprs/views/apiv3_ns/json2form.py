@@ -3,7 +3,16 @@ from werkzeug.datastructures import MultiDict
 
 
 def get_form_compatible_data(preserve=None):
-    input = without_empty_fields(get_input_dict())
+    output = form_compatible_data(get_input_dict(), preserve)
+    output.update(flask.request.files or {})
+    return MultiDict(output)
+
+
+def form_compatible_data(input, preserve=None):
+    """
+    Transform the JSON input dict into the dict the forms expect
+    """
+    input = without_empty_fields(input)
     output = dict(input).copy()
 
     for k, v in input.items():
@@ -17,8 +26,7 @@ def get_form_compatible_data(preserve=None):
 
         output[k] = v
 
-    output.update(flask.request.files or {})
-    return MultiDict(output)
+    return output
 
 
 def get_input_dict():
@@ -5,11 +5,17 @@ from copr_common.enums import StatusEnum
 from coprs import db, app
 from coprs import models
 from coprs.logic import actions_logic
+from coprs.logic.batches_logic import BatchesLogic
 from coprs.logic.builds_logic import BuildsLogic
 from coprs.logic.complex_logic import ComplexLogic, BuildConfigLogic
 from coprs.logic.packages_logic import PackagesLogic
+from coprs.logic.pending_queue_logic import PendingQueueLogic
 from coprs.logic.coprs_logic import MockChrootsLogic, CoprChrootsLogic
-from coprs.exceptions import MalformedArgumentException, ObjectNotFound
+from coprs.exceptions import (
+    BadRequest,
+    MalformedArgumentException,
+    ObjectNotFound,
+)
 from coprs.helpers import streamed_json
 
 from coprs.views import misc
@@ -32,6 +38,9 @@ def send_frontend_version(response):
     return response
 
 
+backend_ns.after_request(misc.add_etag)
+
+
 @backend_ns.route("/importing/")
 def dist_git_importing_queue():
     """
@@ -273,6 +282,22 @@ def pending_actions():
     return flask.json.dumps(data)
 
 
+@backend_ns.route("/claim-actions/", methods=["POST"])
+@misc.backend_authenticated
+def claim_actions():
+    """
+    Lease up to ?limit=N (default 10) waiting actions to the calling action
+    processor, and return them (the same format as /action/<id>/ provides).
+    The lease may be specified by ?lease=SECONDS, ACTION_LEASE_SECONDS is used
+    by default.
+    """
+    limit = flask.request.args.get("limit", 10, type=int)
+    lease = flask.request.args.get("lease", None, type=int)
+    if limit < 1 or (lease is not None and lease < 1):
+        raise BadRequest("Positive limit and lease expected")
+    actions = actions_logic.ActionsLogic.claim_waiting(limit, lease)
+    return flask.jsonify([action.to_dict() for action in actions])
+
 
 @backend_ns.route("/action/<int:action_id>/")
 def get_action(action_id):
@@ -290,37 +315,44 @@ def pending_action_count():
 
 
 @backend_ns.route("/pending-jobs/")
+@misc.conditional_get(PendingQueueLogic.version)
 def pending_jobs():
     """
-    Return the job queue.
+    Return the job queue.  Backend hosts processing only a part of the queue
+    may limit the RPM builds by one or more "arch" arguments, and skip the
+    SRPM builds by "srpm=0".
     """
-
-    # This code is really expensive, and takes a long time when there is a large
-    # build queue.  We want to avoid repeated reload of models.Batch data, and
-    # for that we need to have it strongly referenced.
-    cache = set()
-
-    def build_ready(build):
-        """ Is the build blocked? """
-        cache.add(build.batch)
-        return not build.blocked
+    arches = flask.request.args.getlist("arch")
+    srpm_builds = flask.request.args.get("srpm", "1") != "0"
+
+    # The queue is read from the materialized pending_queue table, and the
+    # blocked batches are calculated by a single (recursive) query, once we
+    # meet the first batched task.
+    blocked = None
+
+    def task_ready(task):
+        """ Is the task blocked? """
+        nonlocal blocked
+        if not task.batch_id:
+            return True
+        if blocked is None:
+            blocked = BatchesLogic.blocked_batch_ids(
+                sqlalchemy.select(models.PendingQueueTask.batch_id)
+                .where(models.PendingQueueTask.batch_id.isnot(None))
+                .distinct())
+        return task.batch_id not in blocked
 
     def _stream():
-        args = {"data_type": "for_backend"}
-
-        log.info("Generating SRPM builds")
-        for build in BuildsLogic.get_pending_srpm_build_tasks(**args):
-            if not build_ready(build):
-                continue
-            record = get_srpm_build_record(build, for_backend=True)
-            yield record
+        if srpm_builds:
+            log.info("Generating SRPM builds")
+            for task in PendingQueueLogic.get_tasks(srpm=True):
+                if task_ready(task):
+                    yield task.to_dict()
 
         log.info("Generating RPM builds")
-        for build_chroot in BuildsLogic.get_pending_build_tasks(**args):
-            if not build_ready(build_chroot.build):
-                continue
-            record = get_build_record(build_chroot, for_backend=True)
-            yield record
+        for task in PendingQueueLogic.get_tasks(srpm=False, arches=arches):
+            if task_ready(task):
+                yield task.to_dict()
 
     return streamed_json(_stream())
 
@@ -1,15 +1,17 @@
+import itertools
+
 import flask
 from flask import request, render_template, stream_with_context
-from sqlalchemy import desc
+from flask_sqlalchemy import Pagination
 
 from copr_common.enums import StatusEnum
 from coprs import app
 from coprs import db
 from coprs import forms
 from coprs import helpers
-from coprs import models
 
 from coprs.logic import builds_logic
+from coprs.logic.archive_logic import ArchiveLogic
 from coprs.logic.builds_logic import BuildsLogic
 from coprs.logic.complex_logic import ComplexLogic
 from coprs.logic.coprs_logic import CoprDirsLogic
@@ -68,18 +70,23 @@ def copr_builds(copr, page=1):
     flashes = flask.session.pop('_flashes', [])
     dirname = flask.request.args.get('dirname')
     builds_query = builds_logic.BuildsLogic.get_copr_builds_list(copr, dirname)
+    # the archived builds are listed, too
+    ids_query = builds_logic.BuildsLogic.get_copr_build_ids(copr, dirname)
 
     one_js_page_limit = 10000
-    if builds_query.count() > one_js_page_limit:
+    per_page = 50
+    total = ids_query.count()
+    if total > one_js_page_limit:
         # we currently don't support filtering with server-side pagination,
         # so order the query so the newest builds are shown first
-        builds_query = builds_query.order_by(desc(models.Build.id))
-        builds = builds_query.paginate(
-            page=page,
-            per_page=50,
-        )
+        build_ids = [build_id for (build_id,) in
+                     ids_query.limit(per_page).offset((page - 1) * per_page)]
+        builds = Pagination(None, page, per_page, total,
+                            ArchiveLogic.load_builds(build_ids, builds_query))
     else:
-        builds = builds_query.yield_per(1000)
+        builds = itertools.chain(
+            builds_query.yield_per(1000),
+            builds_logic.BuildsLogic.get_copr_archived_builds(copr, dirname))
 
     dirs = CoprDirsLogic.get_all_with_latest_submitted_build(copr.id)
 
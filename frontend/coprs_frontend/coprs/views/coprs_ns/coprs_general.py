@@ -4,7 +4,6 @@ Set of general Copr Frontend Flask routes.
 
 import os
 import time
-import subprocess
 import json
 from itertools import groupby
 import base64
@@ -47,8 +46,7 @@ from coprs.views.coprs_ns import coprs_ns
 
 from coprs.logic import builds_logic, coprs_logic, actions_logic, users_logic
 from coprs.helpers import generate_repo_url, \
-    url_for_copr_view, CounterStatType, generate_repo_name, \
-    WorkList
+    url_for_copr_view, CounterStatType, generate_repo_name
 
 
 def url_for_copr_details(copr):
@@ -562,7 +560,9 @@ def process_copr_update(copr, form):
         flask.flash("Project has been updated successfully.", "success")
         db.session.commit()
 
-        copr_deps, _, non_existing = get_transitive_runtime_dependencies(copr)
+        copr_deps, _, non_existing = ComplexLogic.get_transitive_runtime_dependencies(copr)
+        # store the resolved closure
+        db.session.commit()
         deps_without_chroots = {}
         for copr_dep in copr_deps:
             for chroot in copr.active_chroots:
@@ -817,46 +817,6 @@ def process_legal_flag(copr):
     return flask.redirect(url_for_copr_details(copr))
 
 
-def get_transitive_runtime_dependencies(copr):
-    """Get a list of runtime dependencies (build transitively from
-    dependencies' dependencies). Returns three lists, one with Copr
-    dependencies, one with list of non-existing Copr dependencies
-    and one with URLs to external dependencies.
-
-    :type copr: models.Copr
-    :rtype: List[models.Copr], List[str], List[str]
-    """
-
-    if not copr:
-        return [], [], []
-
-    wlist = WorkList([copr])
-    internal_deps = set()
-    non_existing = set()
-    external_deps = set()
-
-    while not wlist.empty:
-        analyzed_copr = wlist.pop()
-
-        for dep in analyzed_copr.runtime_deps:
-            try:
-                copr_dep = ComplexLogic.get_copr_by_repo_safe(dep)
-            except ObjectNotFound:
-                non_existing.add(dep)
-                continue
-
-            if not copr_dep:
-                external_deps.add(dep)
-                continue
-            if copr == copr_dep:
-                continue
-            # check transitive dependencies
-            internal_deps.add(copr_dep)
-            wlist.schedule(copr_dep)
-
-    return list(internal_deps), list(external_deps), list(non_existing)
-
-
 @coprs_ns.route("/<username>/<copr_dirname>/repo/<name_release>/", defaults={"repofile": None})
 @coprs_ns.route("/<username>/<copr_dirname>/repo/<name_release>/<repofile>")
 @coprs_ns.route("/g/<group_name>/<copr_dirname>/repo/<name_release>/", defaults={"repofile": None})
@@ -867,7 +827,27 @@ def generate_repo_file(copr_dir, name_release, repofile):
         Reponame = username-coprname """
 
     arch = flask.request.args.get('arch')
-    return render_generate_repo_file(copr_dir, name_release, arch)
+    name_release = _name_release_alias(copr_dir.copr, name_release)
+    response = render_generate_repo_file(copr_dir, name_release, arch)
+
+    # Count the downloads here, not in the (memoized) render method.  And don't
+    # wait for database, the counters are flushed by 'flush-counters' command.
+    name = helpers.get_stat_name(
+        CounterStatType.REPO_DL,
+        copr_dir=copr_dir,
+        name_release=name_release,
+    )
+    CounterStatLogic.incr_later(name=name, counter_type=CounterStatType.REPO_DL)
+    return response
+
+
+def _name_release_alias(copr, name_release):
+    """
+    Redirect the aliased chroot only if it is not enabled yet
+    """
+    if not any([ch.name.startswith(name_release) for ch in copr.active_chroots]):
+        name_release = app.config["CHROOT_NAME_RELEASE_ALIAS"].get(name_release, name_release)
+    return name_release
 
 
 def render_repo_template(copr_dir, mock_chroot, arch=None, cost=None, runtime_dep=None, dependent=None):
@@ -916,10 +896,6 @@ def _render_external_repo_template(dep, copr_dir, mock_chroot, dep_idx):
 def render_generate_repo_file(copr_dir, name_release, arch=None):
     copr = copr_dir.copr
 
-    # redirect the aliased chroot only if it is not enabled yet
-    if not any([ch.name.startswith(name_release) for ch in copr.active_chroots]):
-        name_release = app.config["CHROOT_NAME_RELEASE_ALIAS"].get(name_release, name_release)
-
     # if the arch isn't specified, find the fist one starting with name_release
     searched_chroot = name_release if not arch else name_release + "-" + arch
 
@@ -967,7 +943,9 @@ def render_generate_repo_file(copr_dir, name_release, arch=None):
             models.MockChroot.multilib_pairs[mock_chroot.arch],
             cost=1100)
 
-    internal_deps, external_deps, non_existing = get_transitive_runtime_dependencies(copr)
+    internal_deps, external_deps, non_existing = ComplexLogic.get_transitive_runtime_dependencies(copr)
+    # store the resolved closure
+    db.session.commit()
     dep_idx = 1
 
     for runtime_dep in internal_deps:
@@ -998,14 +976,6 @@ def render_generate_repo_file(copr_dir, name_release, arch=None):
     response.headers["Content-Disposition"] = \
         "filename={0}.repo".format(copr_dir.repo_name)
 
-    name = helpers.get_stat_name(
-        CounterStatType.REPO_DL,
-        copr_dir=copr_dir,
-        name_release=name_release,
-    )
-    CounterStatLogic.incr(name=name, counter_type=CounterStatType.REPO_DL)
-    db.session.commit()
-
     return response
 
 
@@ -1124,7 +1094,10 @@ def copr_forks(copr):
 
 @coprs_ns.route("/update_search_index/", methods=["POST"])
 def copr_update_search_index():
-    subprocess.call(['/usr/share/copr/coprs_frontend/manage.py', 'update-indexes-quick', '1'])
+    """
+    Kept for compatibility, the search index is updated by the
+    'process-search-queue' indexer.
+    """
     return "OK"
 
 
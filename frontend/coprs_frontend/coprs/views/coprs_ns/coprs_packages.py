@@ -63,7 +63,9 @@ def copr_packages(copr, page=1):
 @req_with_copr
 def copr_package(copr, package_name):
     package = ComplexLogic.get_package_safe(copr, package_name)
-    return flask.render_template("coprs/detail/package.html", package=package, copr=copr)
+    builds = PackagesLogic.get_builds(package)
+    return flask.render_template("coprs/detail/package.html", package=package,
+                                 builds=builds, copr=copr)
 
 @coprs_ns.route("/<username>/<coprname>/package/<package_name>/status_image/last_build.png")
 @coprs_ns.route("/g/<group_name>/<coprname>/package/<package_name>/status_image/last_build.png")
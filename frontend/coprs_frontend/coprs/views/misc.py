@@ -1,6 +1,8 @@
 import base64
 import datetime
 import functools
+import hashlib
+import json
 from functools import wraps
 from urllib.parse import urlparse
 import flask
@@ -315,3 +317,49 @@ def req_with_pagination(f):
             raise ObjectNotFound("Invalid pagination format") from err
         return f(*args, page=page, **kwargs)
     return wrapper
+
+
+def conditional_get(version):
+    """
+    Support the conditional GET requests without rendering the response.  The
+    `version(*args, **kwargs)` callback (called with the view arguments)
+    returns a cheap JSON-serializable fingerprint of the data the view would
+    render (e.g. the relevant database rows), or None if unknown.  The ETag is
+    calculated from the fingerprint, and if the client already has it, the
+    "304 Not Modified" response is sent right away.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            fingerprint = version(*args, **kwargs)
+            if fingerprint is None:
+                return f(*args, **kwargs)
+
+            etag = hashlib.sha256(json.dumps(
+                [flask.request.full_path, fingerprint],
+                default=str).encode("utf-8")).hexdigest()
+            if etag in flask.request.if_none_match:
+                response = flask.Response(status=304)
+            else:
+                response = flask.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
+
+
+def add_etag(response):
+    """
+    The after_request hook, set the ETag for the GET responses that don't have
+    one yet (calculated from the response body), and answer "304 Not Modified"
+    if the client already has it.  This saves only bandwidth, the
+    conditional_get() decorator saves also the rendering.
+    """
+    if flask.request.method != "GET" or response.status_code != 200:
+        return response
+    if response.is_streamed or response.get_etag()[0]:
+        return response
+    response.add_etag()
+    return response.make_conditional(flask.request)
@@ -2,48 +2,81 @@ from collections import Counter, defaultdict
 from time import time
 
 import flask
+from flask_sqlalchemy import Pagination
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
 
-from copr_common.enums import StatusEnum
+from coprs.views.misc import req_with_pagination
 from coprs.views.status_ns import status_ns
 from coprs.logic import batches_logic
 from coprs.logic import builds_logic
 from coprs.logic import complex_logic
-from coprs import cache
+from coprs.logic.search_logic import CoprSearchLogic
+from coprs import db, helpers, models
 
-PENDING_ALL_CACHE_SECONDS = 2*60
+# Show all the tasks on one page (with client-side pagination) only if there's
+# not too many of them
+PAGINATE_IF_MORE_THAN = 1000
+TASKS_PER_PAGE = 100
 
 @status_ns.context_processor
 def inject_common_blueprint_variables():
     return dict(queue_sizes=complex_logic.ComplexLogic.get_queue_sizes())
 
 
+def _tasks_pagination(state, page, background=None):
+    """
+    Load one page of the tasks in the given state, and return the pagination
+    object (pagination.items are the (task_type, time, task) tuples).
+    """
+    tasks = builds_logic.BuildsLogic.get_status_tasks(state, background)
+    total = db.session.query(func.count()).select_from(tasks).scalar()
+
+    serverside_pagination = total > PAGINATE_IF_MORE_THAN
+    per_page = TASKS_PER_PAGE if serverside_pagination else PAGINATE_IF_MORE_THAN
+    if not serverside_pagination or page < 1:
+        page = 1
+
+    rows = db.session.execute(
+        select(tasks)
+        .order_by(*builds_logic.BuildsLogic.status_tasks_order(tasks))
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    ).all()
+
+    pagination = Pagination(None, page, per_page, total,
+                            builds_logic.BuildsLogic.load_status_tasks(rows))
+    pagination.serverside_pagination = serverside_pagination
+    return pagination
+
+
+def _background_count(state):
+    tasks = builds_logic.BuildsLogic.get_status_tasks(state, background=True)
+    return db.session.query(func.count()).select_from(tasks).scalar()
+
+
 @status_ns.route("/")
 @status_ns.route("/pending/")
-def pending():
-    rpm_tasks = builds_logic.BuildsLogic.get_pending_build_tasks(background=False).all()
-    bg_tasks_cnt = builds_logic.BuildsLogic.get_pending_build_tasks(background=True).count()
-    tasks = list(zip(["rpm"] * len(rpm_tasks),
-                     [x.build.submitted_on for x in rpm_tasks],
-                     rpm_tasks))
-    srpm_tasks = builds_logic.BuildsLogic.get_pending_srpm_build_tasks(background=False).all()
-    bg_tasks_cnt += builds_logic.BuildsLogic.get_pending_srpm_build_tasks(background=True).count()
-    srpm_tasks = list(zip(["srpm"] * len(srpm_tasks),
-                          [x.submitted_on for x in srpm_tasks],
-                          srpm_tasks))
-    tasks.extend(srpm_tasks)
-    return render_status("pending", tasks=tasks, bg_tasks_cnt=bg_tasks_cnt)
+@req_with_pagination
+def pending(page=1):
+    return render_status("pending", _tasks_pagination("pending", page, False),
+                         bg_tasks_cnt=_background_count("pending"))
 
 @status_ns.route("/pending/all/")
-@cache.memoize(timeout=PENDING_ALL_CACHE_SECONDS)
 def pending_all():
     """
     Provide the overview for _all_ the pending jobs.
     """
 
-    # Get "for_backend" type of data, which are much cheaper to get.  This page
+    # The tasks are counted by SQL per project, chroot and priority.  This page
     # is for admins, to analyze the build queue (to allow us to understand best
     # what backend sees).
-    rpm_tasks = builds_logic.BuildsLogic.get_pending_build_tasks(data_type="overview")
+    overview = builds_logic.BuildsLogic.get_pending_overview()
+    coprs = {copr.id: copr for copr in models.Copr.query
+             .filter(models.Copr.id.in_({row[0] for row in overview}))
+             .options(joinedload("user"), joinedload("group"))}
+    mock_chroots = {mock_chroot.id: mock_chroot.name
+                    for mock_chroot in models.MockChroot.query}
 
     owner_stats = Counter()
     owner_substats = defaultdict(lambda: {
@@ -56,32 +89,24 @@ def pending_all():
     background_stats = Counter()
     chroot_stats = Counter()
 
-    def _calc_task(owner_name, project_name, chroot_name, background):
-        owner_stats[owner_name] += 1
+    def _calc_tasks(owner_name, project_name, chroot_name, background, count):
+        owner_stats[owner_name] += count
         owner = owner_substats[owner_name]
-        owner["projects"][project_name] += 1
-        owner["chroots"][chroot_name] += 1
-        owner["background"][background] += 1
-        project_stats[project_name] += 1
-        chroot_stats[chroot_name] += 1
-        background_stats[background] += 1
-
-
-    for task in rpm_tasks:
-        _calc_task(
-            task.build.copr.owner.name,
-            task.build.copr.full_name,
-            task.mock_chroot.name,
-            task.build.is_background,
-        )
-
-    srpm_tasks = builds_logic.BuildsLogic.get_pending_srpm_build_tasks(data_type="overview").all()
-    for task in srpm_tasks:
-        _calc_task(
-            task.copr.owner.name,
-            task.copr.full_name,
-            "srpm-builds",
-            task.is_background,
+        owner["projects"][project_name] += count
+        owner["chroots"][chroot_name] += count
+        owner["background"][background] += count
+        project_stats[project_name] += count
+        chroot_stats[chroot_name] += count
+        background_stats[background] += count
+
+    for copr_id, mock_chroot_id, background, count in overview:
+        copr = coprs[copr_id]
+        _calc_tasks(
+            copr.owner.name,
+            copr.full_name,
+            mock_chroots[mock_chroot_id] if mock_chroot_id else "srpm-builds",
+            background,
+            count,
         )
 
     calculated_stats = {
@@ -96,51 +121,87 @@ def pending_all():
         "status_overview.html",
         stats=calculated_stats,
         state_of_tasks="pending",
-        cache_seconds=PENDING_ALL_CACHE_SECONDS,
     )
 
 
 @status_ns.route("/running/")
-def running():
-    rpm_tasks = builds_logic.BuildsLogic.get_build_tasks(StatusEnum("running")).all()
-    tasks = list(zip(["rpm"] * len(rpm_tasks),
-                     [x.started_on for x in rpm_tasks],
-                     rpm_tasks))
-    srpm_tasks = builds_logic.BuildsLogic.get_srpm_build_tasks(StatusEnum("running")).all()
-    srpm_tasks = list(zip(["srpm"] * len(srpm_tasks),
-                          [x.submitted_on for x in srpm_tasks],
-                          srpm_tasks))
-    tasks.extend(srpm_tasks)
-    return render_status("running", tasks=tasks)
+@req_with_pagination
+def running(page=1):
+    return render_status("running", _tasks_pagination("running", page))
 
 
 @status_ns.route("/importing/")
-def importing():
-    tasks = builds_logic.BuildsLogic.get_build_importing_queue(background=False).all()
-    bg_tasks_cnt = builds_logic.BuildsLogic.get_build_importing_queue(background=True).count()
-    tasks = list(zip(["rpm"] * len(tasks),
-                     [x.submitted_on for x in tasks],
-                     tasks))
-    return render_status("importing", tasks=tasks, bg_tasks_cnt=bg_tasks_cnt)
+@req_with_pagination
+def importing(page=1):
+    return render_status("importing",
+                         _tasks_pagination("importing", page, False),
+                         bg_tasks_cnt=_background_count("importing"))
 
 
 @status_ns.route("/starting/")
-def starting():
-    tasks = builds_logic.BuildsLogic.get_build_tasks(StatusEnum("starting")).all()
-    tasks = list(zip(["rpm"] * len(tasks),
-                     [x.build.submitted_on for x in tasks],
-                     tasks))
-    srpm_tasks = builds_logic.BuildsLogic.get_srpm_build_tasks(StatusEnum("starting")).all()
-    srpm_tasks = list(zip(["srpm"] * len(srpm_tasks),
-                          [x.submitted_on for x in srpm_tasks],
-                          srpm_tasks))
-    tasks.extend(srpm_tasks)
-    return render_status("starting", tasks=tasks)
-
-
-def render_status(build_status, tasks, bg_tasks_cnt=None):
-    return flask.render_template("status.html", number=len(tasks),
-                                 tasks=tasks, bg_tasks_cnt=bg_tasks_cnt,
+@req_with_pagination
+def starting(page=1):
+    return render_status("starting", _tasks_pagination("starting", page))
+
+
+@status_ns.route("/", methods=["POST"])
+@status_ns.route("/<any(importing, pending, starting, running):_state>/",
+                 methods=["POST"])
+def status_pagination_redirect(**_kwargs):
+    """
+    Redirect the current page to the very same page, with just the '?page=<N>'
+    argument changed (see the pagination_form macro).
+    """
+    to_page = flask.request.form.get('go_to_page', 1)
+    return flask.redirect(helpers.current_url(page=to_page))
+
+
+@status_ns.route("/<any(importing, pending, starting, running):state>/json/")
+def tasks_json(state):
+    """
+    Stream all the tasks in the given state (including the background ones) as
+    a JSON array, the newest tasks first.
+    """
+    tasks = builds_logic.BuildsLogic.get_status_tasks(state)
+    query = (
+        select(tasks)
+        .order_by(*builds_logic.BuildsLogic.status_tasks_order(tasks))
+        .execution_options(stream_results=True)
+    )
+
+    def _stream():
+        result = db.session.execute(query)
+        for rows in result.partitions(TASKS_PER_PAGE):
+            for task_type, time_, task in \
+                    builds_logic.BuildsLogic.load_status_tasks(rows):
+                build = task.build if task_type == "rpm" else task
+                yield {
+                    "type": task_type,
+                    "build_id": build.id,
+                    "project": build.copr.full_name,
+                    "package": build.package.name if build.package else None,
+                    "pkg_version": build.pkg_version,
+                    "chroot": task.name if task_type == "rpm" else None,
+                    "background": bool(build.is_background),
+                    "time": time_,
+                }
+
+    return helpers.streamed_json(flask.stream_with_context(_stream()))
+
+
+@status_ns.route("/search-queue/json/")
+def search_queue_json():
+    """
+    The number of queued search document updates, and the search index lag
+    (in seconds), for monitoring.
+    """
+    return flask.jsonify(CoprSearchLogic.queue_status())
+
+
+def render_status(build_status, pagination, bg_tasks_cnt=None):
+    return flask.render_template("status.html", number=pagination.total,
+                                 pagination=pagination,
+                                 bg_tasks_cnt=bg_tasks_cnt,
                                  state_of_tasks=build_status)
 
 
@@ -26,10 +26,12 @@ import commands.dump_user
 import commands.update_indexes
 import commands.update_indexes_quick
 import commands.update_indexes_required
+import commands.process_search_queue
 import commands.get_admins
 import commands.fail_build
 import commands.rawhide_to_release
 import commands.update_graphs
+import commands.flush_counters
 import commands.vacuum_graphs
 import commands.notify_outdated_chroots
 import commands.delete_outdated_chroots
@@ -38,6 +40,10 @@ import commands.clean_old_builds
 import commands.delete_orphans
 import commands.fixup_unnoticed_chroots
 import commands.chroots_template
+import commands.check_pending_queue
+import commands.backfill_build_status
+import commands.rebuild_latest_build_chroots
+import commands.archive_builds
 
 from coprs import app
 
@@ -71,16 +77,18 @@ commands_list =	[
     "add_user",
     "dump_user",
 
-    # Whooshee indexes
+    # Full-text search indexes
     "update_indexes",
     "update_indexes_quick",
     "update_indexes_required",
+    "process_search_queue",
 
     # Other
     "get_admins",
     "fail_build",
     "rawhide_to_release",
     "update_graphs",
+    "flush_counters",
     "vacuum_graphs",
     "notify_outdated_chroots",
     "delete_outdated_chroots",
@@ -88,6 +96,10 @@ commands_list =	[
     "clean_old_builds",
     "delete_orphans",
     "delete_dirs",
+    "check_pending_queue",
+    "backfill_build_status",
+    "rebuild_latest_build_chroots",
+    "archive_builds",
 ]
 
 
@@ -19,6 +19,7 @@ from coprs import models
 from coprs import cache
 from coprs.logic.coprs_logic import BranchesLogic, CoprChrootsLogic
 from coprs.logic.dist_git_logic import DistGitLogic
+from coprs.logic.stat_logic import PENDING_COUNTERS_KEY, FLUSHING_COUNTERS_KEY
 
 from tests.request_test_api import WebUIRequests, API3Requests, BackendRequests
 from tests.lib.pagure_pull_requests import PullRequestTrigger
@@ -84,6 +85,9 @@ class CoprsTestCase(object):
 
         self.app.config = self.original_config.copy()
         cache.clear()
+        # counters from CounterStatLogic.incr_later()
+        coprs.rcp.get_connection().delete(PENDING_COUNTERS_KEY,
+                                          FLUSHING_COUNTERS_KEY)
 
     @property
     def auth_header(self):
@@ -2,14 +2,13 @@
 
 import copy
 import json
-from flask_whooshee import Whooshee
 
 from coprs.logic.builds_logic import BuildsLogic
 
 from coprs.logic.actions_logic import ActionsLogic
 from coprs.logic.coprs_logic import CoprsLogic
+from coprs.logic.search_logic import CoprSearchLogic
 from coprs.models import Copr
-from coprs.whoosheers import CoprWhoosheer
 from coprs import app
 
 from tests.coprs_test_case import CoprsTestCase
@@ -93,9 +92,6 @@ class TestProjectResource(CoprsTestCase):
         self.s_coprs = []
         c1_username = self.c1.user.username
 
-        index = Whooshee.get_or_create_index(app, CoprWhoosheer)
-        writer = index.writer()
-
         k1 = 3
         k2 = 5
         for x in range(k1):
@@ -106,10 +102,7 @@ class TestProjectResource(CoprsTestCase):
 
         self.db.session.add_all(self.s_coprs)
         self.db.session.commit()
-
-        for copr in self.s_coprs:
-            CoprWhoosheer.insert_copr(writer, copr)
-        writer.commit(optimize=True)
+        CoprSearchLogic.process_queue()
 
         r0 = self.tc.get(u"/api_2/projects?search_query={}".format(self.prefix))
         assert r0.status_code == 200
@@ -4,12 +4,16 @@ Test all kind of build request via v3 API
 
 import copy
 import json
+import time
 
 import pytest
 
 from bs4 import BeautifulSoup
-from copr_common.enums import BuildSourceEnum
+from copr_common.enums import BuildSourceEnum, StatusEnum
+from coprs.logic.archive_logic import ArchiveLogic
+from coprs.logic.build_events_logic import BuildEventsLogic
 from coprs.logic.builds_logic import BuildChrootResultsLogic
+from coprs.logic.pending_queue_logic import PendingQueueLogic
 
 from tests.coprs_test_case import CoprsTestCase, TransactionDecorator
 
@@ -197,6 +201,188 @@ class TestAPIv3Builds(CoprsTestCase):
         assert response2.json["ownername"] == "user2"
         assert response2.json["projectname"] == "foocopr"
 
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots",
+                             "f_builds", "f_db")
+    def test_v3_build_list_by_status(self):
+        self.b4.canceled = True
+        self.db.session.commit()
+
+        def _ids(status):
+            response = self.tc.get(
+                "/api_3/build/list/?ownername=user2&projectname=foocopr"
+                "&status={}".format(status))
+            assert response.status_code == 200
+            return [build["id"] for build in response.json["items"]]
+
+        assert _ids("canceled") == [4]
+        assert _ids("importing") == [3]
+        assert _ids("succeeded") == []
+
+        response = self.tc.get("/api_3/build/list/?ownername=user2"
+                               "&projectname=foocopr&status=foo")
+        assert response.status_code == 400
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots",
+                             "f_builds", "f_db")
+    def test_v3_build_list_cursor(self):
+        url = "/api_3/build/list/?ownername=user1&projectname=foocopr&limit=1"
+        response = self.tc.get(url)
+        assert [build["id"] for build in response.json["items"]] == [1]
+        cursor = response.json["meta"]["next"]
+
+        response = self.tc.get(url + "&cursor=" + cursor)
+        assert [build["id"] for build in response.json["items"]] == [2]
+        cursor = response.json["meta"]["next"]
+
+        response = self.tc.get(url + "&cursor=" + cursor)
+        assert response.json["items"] == []
+        assert response.json["meta"]["next"] is None
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots",
+                             "f_builds", "f_db")
+    def test_v3_build_list_archived(self):
+        url = "/api_3/build/list/?ownername=user1&projectname=foocopr"
+        urls = [url, url + "&packagename=hello-world",
+                url + "&status=succeeded", url + "&order_type=DESC"]
+        expected = [self.tc.get(url).json["items"] for url in urls]
+        assert [build["id"] for build in expected[0]] == [1, 2]
+        assert [build["id"] for build in expected[2]] == [1]
+
+        assert ArchiveLogic.archive_builds(days=365) == 1
+        assert ArchiveLogic.get_build(1)
+        assert [self.tc.get(url).json["items"] for url in urls] == expected
+
+        response = self.tc.get(url + "&limit=1")
+        assert [build["id"] for build in response.json["items"]] == [1]
+        response = self.tc.get(url + "&limit=1&cursor="
+                               + response.json["meta"]["next"])
+        assert [build["id"] for build in response.json["items"]] == [2]
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots",
+                             "f_builds", "f_db")
+    def test_v3_get_build_etag(self):
+        url = "/api_3/build/{}/".format(self.b1.id)
+        response = self.tc.get(url)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        response = self.tc.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.headers["ETag"] == etag
+
+        self.b1_bc[0].status = 0
+        self.db.session.add(self.b1_bc[0])
+        self.db.session.commit()
+        response = self.tc.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+        # the ETag calculated from the response body
+        url = "/api_3/build/list/?ownername=user1&projectname=foocopr"
+        etag = self.tc.get(url).headers["ETag"]
+        response = self.tc.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots",
+                             "f_builds", "f_db")
+    def test_v3_build_states(self):
+        self.b4.canceled = True
+        self.db.session.commit()
+
+        url = "/api_3/build/states/?build_ids=4,2,1,999"
+        response = self.tc.get(url)
+        assert response.status_code == 200
+        assert response.json["items"] == [
+            {"id": 1, "state": "succeeded"},
+            {"id": 2, "state": "importing"},
+            {"id": 4, "state": "canceled"},
+        ]
+
+        response = self.tc.get(url + "&chroots=True")
+        items = response.json["items"]
+        assert items[0] == {"id": 1, "state": "succeeded",
+                            "chroots": {"fedora-18-x86_64": "succeeded"}}
+        assert items[2]["chroots"] == {"fedora-17-x86_64": "waiting",
+                                       "fedora-17-i386": "waiting"}
+
+        # archived builds are still there
+        ArchiveLogic.archive_builds(days=0)
+        assert ArchiveLogic.get_build(1)
+        assert self.tc.get(url + "&chroots=True").json["items"] == items
+
+        for build_ids in ["1,a", ",".join(str(i) for i in range(501))]:
+            response = self.tc.get("/api_3/build/states/?build_ids="
+                                   + build_ids)
+            assert response.status_code == 400
+
+    @pytest.mark.usefixtures("f_users", "f_users_api", "f_coprs",
+                             "f_mock_chroots", "f_builds", "f_db")
+    def test_v3_build_events(self):
+        self.app.config["BUILD_EVENTS_KEEPALIVE"] = 0.2
+        self.app.config["BUILD_EVENTS_MAX_SECONDS"] = 1
+        headers = self.api3_auth_headers(self.u1)
+        other = self.api3_auth_headers(self.u2)
+        username = self.u1.username
+
+        def _events(response):
+            return [json.loads(line[len("data: "):])
+                    for line in response.get_data(as_text=True).split("\n")
+                    if line.startswith("data: ")]
+
+        # only for the authenticated users
+        url = "/api_3/build/events/?build_ids=1"
+        assert self.tc.get(url).status_code == 401
+
+        # the current states first, then the changes
+        response = self.tc.get("/api_3/build/events/?build_ids=1,999",
+                               headers=headers)
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        self.db.session.add(self.b1_bc[0])
+        self.b1_bc[0].status = StatusEnum("failed")
+        self.db.session.commit()
+        assert _events(response) == [
+            {"build_id": 1, "chroot": None, "state": "succeeded"},
+            {"build_id": 1, "chroot": "fedora-18-x86_64",
+             "state": "succeeded"},
+            {"build_id": 1, "chroot": None, "state": "failed"},
+            {"build_id": 1, "chroot": "fedora-18-x86_64", "state": "failed"},
+        ]
+
+        response = self.tc.post("/api_3/build/events/", headers=headers,
+                                data=json.dumps({"ownername": "user2",
+                                                 "projectname": "foocopr"}))
+        self.db.session.add(self.b3)
+        self.b3.canceled = True
+        self.db.session.commit()
+        assert _events(response) == [
+            {"build_id": 3, "chroot": None, "state": "canceled"}]
+        assert ": keepalive" in response.get_data(as_text=True)
+
+        for bad_url in ["/api_3/build/events/",
+                        "/api_3/build/events/?build_ids=a",
+                        "/api_3/build/events/?ownername=user2"]:
+            assert self.tc.get(bad_url, headers=headers).status_code == 400
+        bad_url = "/api_3/build/events/?ownername=user2&projectname=nonexisting"
+        assert self.tc.get(bad_url, headers=headers).status_code == 404
+
+        # the number of open streams is limited per user ...
+        stream_id = BuildEventsLogic.open_stream(time.time() + 60, 2, 1,
+                                                 username)
+        assert stream_id
+        try:
+            assert self.tc.get(url, headers=headers).status_code == 503
+            assert self.tc.get(url, headers=other).status_code == 200
+
+            # ... and in total
+            self.app.config["BUILD_EVENTS_MAX_STREAMS"] = 1
+            assert self.tc.get(url, headers=other).status_code == 503
+        finally:
+            BuildEventsLogic.close_stream(stream_id, username)
+        assert self.tc.get(url, headers=other).status_code == 200
+        assert self.tc.get(url, headers=headers).status_code == 200
+
     @pytest.mark.usefixtures("f_users", "f_users_api", "f_coprs",
                              "f_mock_chroots", "f_other_distgit", "f_db")
     @pytest.mark.parametrize("case", CASES)
@@ -220,6 +406,87 @@ class TestAPIv3Builds(CoprsTestCase):
         expected -= set(exclude_chroots)
         assert {ch.name for ch in build.chroots} == expected
 
+    @pytest.mark.usefixtures("f_users", "f_users_api", "f_coprs",
+                             "f_mock_chroots", "f_other_distgit", "f_db")
+    def test_v3_builds_bulk(self):
+        form_data = {
+            "ownername": "user2",
+            "projectname": "foocopr",
+            "chroots": ["fedora-17-x86_64"],
+            "timeout": 10000,
+            "builds": [
+                {"source_type": "url",
+                 "pkgs": ["http://example.com/a.src.rpm",
+                          "http://example.com/b.src.rpm"]},
+                {"source_type": "scm",
+                 "clone_url": "https://example.com/c.git",
+                 "source_build_method": "make_srpm"},
+                {"source_type": "distgit", "package_name": "mock"},
+                {"source_type": "pypi", "pypi_package_name": "d"},
+                {"source_type": "custom", "script": "echo e"},
+            ],
+        }
+        endpoint = "/api_3/build/create/bulk"
+        user = self.models.User.query.filter_by(username="user2").first()
+        response = self.post_api3_with_auth(endpoint, form_data, user)
+        assert response.status_code == 200
+        build_ids = response.json["builds"]
+        assert len(build_ids) == 6
+
+        builds = self.models.Build.query.order_by(self.models.Build.id).all()
+        assert [build.id for build in builds] == build_ids
+        assert [build.source_type_text for build in builds] == \
+            ["link", "link", "scm", "distgit", "pypi", "custom"]
+        assert builds[1].pkgs == "http://example.com/b.src.rpm"
+        assert builds[2].source_json_dict["srpm_build_method"] == "make_srpm"
+        assert builds[3].source_json_dict["clone_url"] == \
+            "git://prio.com/some/other/uri/mock/git"
+        for build in builds:
+            assert build.status == StatusEnum("pending")
+            assert build.timeout == 10000
+            assert build.user.username == "user2"
+            assert [ch.name for ch in build.chroots] == ["fedora-17-x86_64"]
+            assert build.build_chroots[0].status == StatusEnum("waiting")
+
+        tasks = PendingQueueLogic.get_tasks(srpm=True).all()
+        assert [task.build_id for task in tasks] == build_ids
+
+        # one invalid build spec, nothing is created
+        form_data["builds"].append({"source_type": "scm"})
+        user = self.models.User.query.filter_by(username="user2").first()
+        response = self.post_api3_with_auth(endpoint, form_data, user)
+        assert response.status_code == 400
+        assert "builds[5]" in response.json["error"]
+        assert self.models.Build.query.count() == 6
+
+        form_data["builds"] = [{"source_type": "upload"}]
+        response = self.post_api3_with_auth(endpoint, form_data, user)
+        assert response.status_code == 400
+        assert "Unsupported source_type" in response.json["error"]
+
+        # the shared options can't differ per build
+        form_data["builds"] = [
+            {"source_type": "rubygems", "gem_name": "f"},
+            {"source_type": "rubygems", "gem_name": "g",
+             "chroots": ["fedora-18-x86_64"], "timeout": 5},
+            "rubygems",
+            ["source_type", "rubygems"],
+        ]
+        response = self.post_api3_with_auth(endpoint, form_data, user)
+        assert response.status_code == 400
+        error = response.json["error"]
+        assert "builds[1]: chroots, timeout can be only set for all" in error
+        assert "builds[2]: Not a build specification object" in error
+        assert "builds[3]: Not a build specification object" in error
+        assert "builds[0]" not in error
+        assert self.models.Build.query.count() == 6
+
+        form_data["builds"] = [{"source_type": "rubygems", "gem_name": "f"}]
+        user3 = self.models.User.query.filter_by(username="user3").first()
+        response = self.post_api3_with_auth(endpoint, form_data, user3)
+        assert response.status_code == 403
+        assert self.models.Build.query.count() == 6
+
 class TestWebUIBuilds(CoprsTestCase):
 
     @TransactionDecorator("u1")
@@ -196,3 +196,24 @@ class TestAPIv3Monitor(CoprsTestCase):
             "state": "failed",
         })
         assert result == expected_result
+
+    @TransactionDecorator("u1")
+    @pytest.mark.usefixtures("f_users", "f_users_api", "f_mock_chroots", "f_db")
+    def test_v3_monitor_etag(self):
+        self.web_ui.new_project("test", ["fedora-18-x86_64"])
+        self.web_ui.create_distgit_package("test", "tar")
+        self.api3.rebuild_package("test", "tar")
+        params = {"ownername": "user1", "projectname": "test"}
+        etag = self.tc.get("/api_3/monitor", query_string=params) \
+            .headers["ETag"]
+
+        result = self.tc.get("/api_3/monitor", query_string=params,
+                             headers={"If-None-Match": etag})
+        assert result.status_code == 304
+
+        self.backend.finish_build(1, package_name="tar")
+        result = self.tc.get("/api_3/monitor", query_string=params,
+                             headers={"If-None-Match": etag})
+        assert result.status_code == 200
+        chroots = result.json["packages"][0]["chroots"]
+        assert chroots["fedora-18-x86_64"]["state"] == "succeeded"
@@ -2,6 +2,7 @@
 Test all kind of build request via v3 API
 """
 
+import base64
 import copy
 import json
 
@@ -81,3 +82,44 @@ class TestAPIv3Packages(CoprsTestCase):
             _assert_default_chroots(build)
         else:
             assert [mch.name for mch in build.chroots] == ["fedora-17-i386"]
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_db")
+    @pytest.mark.parametrize("order", ["id", "name", "max_builds"])
+    def test_v3_package_list_cursor(self, order):
+        for i in range(7):
+            self.db.session.add(self.models.Package(
+                name="pkg{}".format(i % 4) + "x" * i, copr=self.c1,
+                source_type=0, max_builds=None if i % 3 else i % 2))
+        self.db.session.commit()
+
+        url = ("/api_3/package/list?ownername=user1&projectname=foocopr"
+               "&order={}&limit=3".format(order))
+        response = self.tc.get(url.replace("&limit=3", ""))
+        expected = [p["name"] for p in response.json["items"]]
+        assert len(expected) == 7
+
+        names, by_offset = [], []
+        cursor = None
+        for page in range(4):
+            response = self.tc.get(url + ("&cursor=" + cursor if cursor
+                                          else ""))
+            assert response.status_code == 200
+            names += [p["name"] for p in response.json["items"]]
+            cursor = response.json["meta"]["next"]
+            if not cursor:
+                break
+            response = self.tc.get(url + "&offset={}".format(3 * (page + 1)))
+            by_offset += [p["name"] for p in response.json["items"]]
+        assert page == 2
+        assert names == expected
+        assert by_offset == expected[3:]
+
+        response = self.tc.get(url + "&cursor=foo")
+        assert response.status_code == 400
+
+        # the key types must match the order column
+        for key in [[{"a": 1}, 1], [1, "1"], [True, 1], [[1], 1], [1, None]]:
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({"key": key}).encode("utf-8")).decode("ascii")
+            response = self.tc.get(url + "&cursor=" + cursor)
+            assert response.status_code == 400
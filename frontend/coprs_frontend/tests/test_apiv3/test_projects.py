@@ -154,7 +154,7 @@ class TestApiv3Projects(CoprsTestCase):
             "created_on", "deleted", "scm_api_auth_json", "scm_api_type",
             "scm_repo_url", "id", "name", "user_id", "group_id",
             "webhook_secret", "forked_from_id", "latest_indexed_data_update",
-            "copr_id", "persistent", "playground",
+            "copr_id", "persistent", "playground", "runtime_deps_closure",
         ]:
             should_test.remove(item)
 
@@ -0,0 +1,25 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from commands.process_search_queue import process_search_queue
+from tests.coprs_test_case import CoprsTestCase
+
+
+class TestProcessSearchQueue(CoprsTestCase):
+
+    @patch("commands.process_search_queue.time.sleep")
+    @patch("commands.process_search_queue.CoprSearchLogic.process_queue")
+    def test_loop_survives_errors(self, process_queue, sleep, f_db):
+        error = OperationalError("UPDATE copr_search ...", {}, Exception())
+        process_queue.side_effect = [error, 2, KeyboardInterrupt]
+        with pytest.raises(KeyboardInterrupt):
+            process_search_queue.callback(batch_size=10, loop=True, sleep=1)
+        assert process_queue.call_count == 3
+        assert sleep.call_count == 2
+
+        # without --loop the error is reported
+        process_queue.side_effect = [error]
+        with pytest.raises(OperationalError):
+            process_search_queue.callback(batch_size=10, loop=False, sleep=1)
@@ -9,7 +9,8 @@ from coprs import app
 from coprs.helpers import parse_package_name, generate_repo_url, \
     fix_protocol_for_frontend, fix_protocol_for_backend, pre_process_repo_url, \
     parse_repo_params, pagure_html_diff_changed, SubdirMatch, \
-    raw_commit_changes, WorkList, pluralize, clone_sqlalchemy_instance
+    raw_commit_changes, WorkList, pluralize, clone_sqlalchemy_instance, \
+    changed, flushed_objects
 
 from tests.coprs_test_case import CoprsTestCase
 
@@ -261,6 +262,28 @@ class TestHelpers(CoprsTestCase):
         assert "fedora-17-x86_64" in \
                 [m.name for m in target_copr.mock_chroots]
 
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots",
+                             "f_builds", "f_db")
+    def test_flushed_objects(self):
+        new_build = self.models.Build(copr=self.c1, user=self.u1,
+                                      submitted_on=10)
+        self.db.session.add(new_build)
+        self.b1.canceled = True
+        self.db.session.delete(self.b2)
+        assert changed(self.b1, ["canceled", "source_status"])
+        assert not changed(self.b3, ["source_status"])
+
+        flush_context = mock.Mock(attributes={})
+        session = self.db.session
+        assert flushed_objects(session, flush_context, self.models.Build) == \
+            ([new_build], [self.b1], [self.b2])
+        assert flushed_objects(session, flush_context,
+                               self.models.BuildChroot) == ([], [], [])
+        # the session is scanned only once
+        with mock.patch.object(type(session), "new", []):
+            assert flushed_objects(session, flush_context,
+                                   self.models.Build)[0] == [new_build]
+
 
 def test_worklist_class():
     """ test that all tasks are processed only once """
@@ -0,0 +1,175 @@
+"""
+Test moving the long-finished builds to the archive tables
+"""
+
+import json
+
+import pytest
+from sqlalchemy import func, select
+from copr_common.enums import StatusEnum
+from coprs import models
+from coprs.exceptions import BadRequest, ObjectNotFound
+from coprs.logic.archive_logic import ArchiveLogic
+from coprs.logic.builds_logic import BuildsLogic
+from coprs.logic.complex_logic import ComplexLogic
+from coprs.logic.coprs_logic import CoprDirsLogic
+from coprs.logic.packages_logic import PackagesLogic
+from tests.coprs_test_case import CoprsTestCase
+
+
+@pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds",
+                         "f_db")
+class TestArchiveLogic(CoprsTestCase):
+
+    def _get(self, url):
+        response = self.tc.get(url)
+        assert response.status_code == 200
+        return json.loads(response.data)
+
+    def test_archive_builds(self):
+        result = models.BuildChrootResult(
+            build_chroot=self.b1_bc[0], name="hello", epoch=0,
+            version="1.0", release="1", arch="x86_64")
+        self.db.session.add(result)
+        self.db.session.commit()
+        chroot = self.b1_bc[0].name
+
+        urls = [
+            "/api_3/build/1",
+            "/api_3/build/source-chroot/1/",
+            "/api_3/build-chroot?build_id=1&chrootname={}".format(chroot),
+            "/api_3/build-chroot/built-packages/?build_id=1&chrootname={}"
+            .format(chroot),
+        ]
+        expected = [self._get(url) for url in urls]
+        assert expected[3]["packages"][0]["name"] == "hello"
+
+        # b2 is not finished, and b1 is not the latest build
+        assert ArchiveLogic.archive_builds(days=365) == 1
+        assert {b.id for b in models.Build.query} == {2, 3, 4}
+        assert models.BuildChroot.query.filter_by(build_id=1).count() == 0
+        assert models.BuildChrootResult.query.count() == 0
+        assert ArchiveLogic.archive_builds(days=365) == 0
+
+        # the API reads work transparently
+        assert [self._get(url) for url in urls] == expected
+
+        build = ComplexLogic.get_build_safe(1)
+        assert build.archived
+        assert build.status == StatusEnum("succeeded")
+        assert build not in self.db.session
+
+        with pytest.raises(ObjectNotFound):
+            ComplexLogic.get_build_safe(100)
+
+    def _archived_rows(self):
+        return [self.db.session.execute(
+            select(func.count()).select_from(table)).scalar()
+                for table, _ in ArchiveLogic.ARCHIVE_TABLES]
+
+    def test_delete_archived_build(self):
+        chroot = self.b1_bc[0].name
+        assert ArchiveLogic.archive_builds(days=365) == 1
+        assert self._archived_rows() == [0, 1, 1]
+
+        build = ComplexLogic.get_build_safe(1)
+        BuildsLogic.delete_build(self.u1, build)
+        self.db.session.commit()
+        assert self._archived_rows() == [0, 0, 0]
+        action = models.Action.query.one()
+        assert action.object_id == 1
+        assert json.loads(action.data)["chroot_builddirs"] == {
+            "srpm-builds": ["bar"],
+            chroot: ["bar"],
+        }
+        with pytest.raises(ObjectNotFound):
+            ComplexLogic.get_build_safe(1)
+
+    def test_delete_archived_builds(self):
+        assert ArchiveLogic.archive_builds(days=365) == 1
+        with pytest.raises(BadRequest) as error:
+            BuildsLogic.delete_builds(self.u1, [1, 2, 100])
+        assert "still running" in str(error.value)
+        assert "Build(s) 100 don't exist" in str(error.value)
+
+        BuildsLogic.delete_builds(self.u1, [1])
+        self.db.session.commit()
+        assert self._archived_rows() == [0, 0, 0]
+        assert json.loads(models.Action.query.one().data)["build_ids"] == [1]
+
+    def test_clean_archived_builds(self):
+        assert ArchiveLogic.archive_builds(days=365) == 1
+        assert [i for (i,) in BuildsLogic.old_builds_query(archived=True)] \
+            == []
+
+        # the archived builds count into the limit
+        self.db.session.execute(
+            models.Package.__table__.update().values(max_builds=1))
+        self.db.session.commit()
+        assert [i for (i,) in BuildsLogic.old_builds_query(archived=True)] \
+            == [1]
+        # b2 is not finished yet, and b3 is the only build of its package
+        assert BuildsLogic.clean_old_builds() == 1
+        assert self._archived_rows() == [0, 0, 0]
+        assert json.loads(models.Action.query.one().data)["build_ids"] == [1]
+
+    def test_delete_orphaned_archived_builds(self):
+        assert ArchiveLogic.archive_builds(days=365) == 1
+        self.c1.deleted = True
+        self.db.session.commit()
+        # b2 is not finished yet
+        assert BuildsLogic.delete_orphaned_builds() == 1
+        assert self._archived_rows() == [0, 0, 0]
+        assert models.Action.query.count() == 1
+
+    def test_delete_project_with_archived_builds(self):
+        assert ArchiveLogic.archive_builds(days=365) == 1
+        self._finish_b2()
+
+        ComplexLogic.delete_copr(self.c1, admin_action=True)
+        self.db.session.commit()
+        assert self._archived_rows() == [0, 0, 0]
+        assert {a.object_type for a in models.Action.query} == {"copr"}
+
+    def _finish_b2(self):
+        self.b2.source_status = StatusEnum("succeeded")
+        for build_chroot in self.b2.build_chroots:
+            build_chroot.status = StatusEnum("failed")
+        self.db.session.commit()
+
+    def test_delete_package_with_archived_builds(self):
+        assert ArchiveLogic.archive_builds(days=365) == 1
+        self._finish_b2()
+        assert ArchiveLogic.get_build_ids(package_id=self.p1.id) == [1]
+
+        PackagesLogic.delete_package(self.u1, self.p1)
+        self.db.session.commit()
+        assert self._archived_rows() == [0, 0, 0]
+        assert models.Build.query.filter_by(id=2).count() == 0
+        action = models.Action.query.one()
+        assert sorted(json.loads(action.data)["build_ids"]) == [1, 2]
+
+    def test_delete_dir_with_archived_builds(self):
+        assert ArchiveLogic.archive_builds(days=365) == 1
+        assert ArchiveLogic.get_build_ids(copr_dir_id=self.c1_dir.id) == [1]
+        CoprDirsLogic.delete_with_builds(self.c1_dir)
+        self.db.session.commit()
+        assert self._archived_rows() == [0, 0, 0]
+
+    def test_archived_builds_listed(self):
+        urls = ["/coprs/user1/foocopr/builds/",
+                "/coprs/user1/foocopr/builds/?dirname=foocopr",
+                "/coprs/user1/foocopr/package/hello-world/"]
+
+        def _rows(url):
+            response = self.tc.get(url)
+            assert response.status_code == 200
+            return response.data.count(b'<tr class="build-')
+
+        assert [_rows(url) for url in urls] == [2, 2, 2]
+        assert ArchiveLogic.archive_builds(days=365) == 1
+        assert [_rows(url) for url in urls] == [2, 2, 2]
+        self.db.session.add_all([self.c1, self.p1])
+        assert [b.id for b in PackagesLogic.get_builds(self.p1)] == [1, 2]
+        assert [i for (i,) in BuildsLogic.get_copr_build_ids(self.c1)] \
+            == [2, 1]
@@ -10,6 +10,7 @@ from copr_common.enums import StatusEnum
 from coprs import app, models
 from coprs.exceptions import BadRequest
 from coprs.logic.batches_logic import BatchesLogic
+from coprs.logic.pending_queue_logic import PendingQueueLogic
 from tests.coprs_test_case import CoprsTestCase
 
 
@@ -71,8 +72,8 @@ class TestBatchesLogic(CoprsTestCase):
             for chroot in build.build_chroots:
                 chroot.state = StatusEnum("succeeded")
             assert build.finished
-        assert self.batches[0].finished
         self.db.session.commit()
+        assert self.batches[0].finished
 
     def _submit(self, build_options, status=400):
         resp = self.api3.submit_url_build("test", build_options=build_options)
@@ -136,6 +137,39 @@ class TestBatchesLogic(CoprsTestCase):
         assert "Build 1 is not yet in any batch" in str(error)
         assert "'user2' doesn't have the build permissions" in str(error)
 
+    def test_batch_chains(self):
+        self._prepare_project_with_batches(more=2)
+        ids = [batch.id for batch in self.batches]
+        assert [b.id for b in BatchesLogic.pending_batches()] == ids
+        assert BatchesLogic.blocked_batch_ids(ids) == set(ids[1:])
+        assert [b.id for b in BatchesLogic.batch_chain(ids[-1])] == ids[::-1]
+
+        self._succeed_first_batch()
+        assert [b.id for b in BatchesLogic.pending_batches()] == ids[1:]
+        assert BatchesLogic.blocked_batch_ids(ids) == set(ids[2:])
+
+        # the finished dependencies are a part of the tree
+        trees = BatchesLogic.pending_batch_trees()
+        assert len(trees) == 1
+        assert [node.name.id for node in trees[0].descendants] == ids[1:]
+        assert trees[0].name.id == ids[0]
+
+        # the unfinished build removed, the batch becomes finished
+        batch = self.batches[1]
+        finished_build = batch.builds[1]
+        finished_build.source_status = StatusEnum("failed")
+        self.db.session.commit()
+        assert not batch.finished
+        batch.builds[0].batch = None
+        self.db.session.commit()
+        assert batch.finished
+        assert BatchesLogic.blocked_batch_ids(ids) == {ids[3]}
+
+        self.db.session.execute(
+            models.Batch.__table__.update().values(stored_finished=False))
+        self.db.session.commit()
+        assert BatchesLogic.backfill_stored_finished() == 2
+
     def test_batched_build_queue_sql_performance(self):
         more_bchs = 5
         with app.app_context():
@@ -151,28 +185,17 @@ class TestBatchesLogic(CoprsTestCase):
         # slowdown means huge penalty on /bakcend/pending-jobs/ route.
         #
         # 1. Get user1 info (for self.test_client).
-        # 2. Large query for Source builds (get_pending_srpm_build_tasks).
-        # 3. Get info about Batch 1 - *expected* (even though it's in "finished"
-        #    state and is cached in Redis), this is triggered by lazy-loads from
-        #    accessing objects from query 1 => the source builds in the query
-        #    are from other batches (e.g. 3), but to check if Batch 3 is blocked
-        #    (already loaded) we have to check if Batch 2 is blocked (loaded)
-        #    and thus also if Batch 1 is blocked.  Because we ask for
-        #    'batch_1.blocked' it needs to be loaded **now** because it is not
-        #    yet (it is not loaded because all builds there are already
-        #    finished).
-        # 4. Read all builds (lazy) from Batch 2 to get Build statuses.  This is
-        #    the only Batch where we need to iterate through Builds (as there's
-        #    only one tree of batches).
-        # 5. Read BuildChroots (lazy) from ^^ to get statuses.
-        # 6. Large query for BuildChroots (get_pending_build_tasks).
+        # 2. Large query for Source builds (pending_queue table).
+        # 3. Recursive query for the blocked batches (the stored "finished"
+        #    flags of all the blocking batches), done for the first batched
+        #    task.
+        # 4. Large query for BuildChroots (pending_queue table).
         #
         # The last batch (ID=2+more_bchs) contains one "ready" BuildChroot task
         # (the srpm upload emulation, see _prepare_project_with_batches()) which
-        # is only blocked by parent batch.  But because we cache Batch objects
-        # in pending_jobs() method - they are preloaded and we can be sure that
-        # we don't have to re-load the batch data to check if that is finished.
-        expected = 6
+        # is only blocked by parent batch.  No Batch (nor Build) needs to be
+        # loaded to find out.
+        expected = 4
         if expected != len(dq):
             print()
             for n, query in enumerate(dq):
@@ -247,12 +270,16 @@ class TestBatchesLogic(CoprsTestCase):
             else:
                 new_bch.status = StatusEnum("waiting")
                 new_b.source_status = StatusEnum("pending")
+            # bulk_save_objects() doesn't trigger the flush events
+            new_b.stored_status = StatusEnum("pending")
 
             b_objs.append(new_b)
             bch_objs.append(new_bch)
 
         self.db.session.bulk_save_objects(b_objs)
         self.db.session.bulk_save_objects(bch_objs)
+        PendingQueueLogic.add_tasks(
+            list(range(build.id + 2, build.id + builds)))
         self.db.session.commit()
         return batch_build_id
 
@@ -300,13 +327,10 @@ class TestBatchesLogic(CoprsTestCase):
         asserts = [
             sql_alchemy_time < fill_time/3*2,
             query_time < fill_time/20,
-            # - for each project two queries (for batch => one build +batch_build)
+            # - one recursive query for the blocked batches
             # - two large queries (srpm + rpms)
             # - one query for self.tc initialization
-            # Note that we only lazily load first Build in each unblocked batch,
-            # because even that first Build in batch is not yet finished -
-            # meaning that the whole batch is not yet finished as well.
-            len(dq) == len(projects)*2 + 2 + 1,
+            len(dq) == 1 + 2 + 1,
         ]
 
         if not all(asserts):
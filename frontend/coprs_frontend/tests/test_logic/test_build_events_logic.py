@@ -0,0 +1,76 @@
+"""
+Test the build state change events
+"""
+
+import json
+import time
+
+from unittest import mock
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from copr_common.enums import StatusEnum
+from coprs.logic.build_events_logic import BuildEventsLogic
+from tests.coprs_test_case import CoprsTestCase
+
+
+def _events(pubsub):
+    # get_message() returns None also for the (ignored) subscribe messages
+    events = []
+    deadline = time.time() + 0.3
+    while time.time() < deadline:
+        message = pubsub.get_message(timeout=0.1)
+        if message is not None:
+            events.append((message["channel"].decode("utf-8"),
+                           json.loads(message["data"])))
+    return events
+
+
+@pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds",
+                         "f_db")
+class TestBuildEventsLogic(CoprsTestCase):
+
+    def test_state_changes(self):
+        pubsub = BuildEventsLogic.subscribe(
+            BuildEventsLogic.channels(build_ids=[3]))
+        project = BuildEventsLogic.subscribe(BuildEventsLogic.channels(
+            ownername="user2", projectname="foocopr"))
+        user = BuildEventsLogic.subscribe(
+            BuildEventsLogic.channels(username="user1"))
+
+        self.b3.source_status = StatusEnum("succeeded")
+        self.b3_bc[0].status = StatusEnum("running")
+        self.db.session.commit()
+        channel = "build_events:build:3"
+        expected = [
+            (channel, {"build_id": 3, "chroot": None, "state": "running"}),
+            (channel, {"build_id": 3, "chroot": self.b3_bc[0].name,
+                       "state": "running"}),
+        ]
+        assert _events(pubsub) == expected
+        assert len(_events(project)) == 2
+        assert _events(user) == []
+
+        # nothing is published for the rolled-back changes
+        self.b3.canceled = True
+        self.db.session.flush()
+        self.db.session.rollback()
+        assert _events(pubsub) == []
+
+        # no state change, no event
+        self.b3.result_dir = "baz"
+        self.db.session.commit()
+        assert _events(pubsub) == []
+
+        self.b3.canceled = True
+        self.db.session.commit()
+        assert _events(pubsub) == [
+            (channel, {"build_id": 3, "chroot": None, "state": "canceled"})]
+
+    def test_redis_failure(self):
+        # the change is committed, even though nothing is published
+        with mock.patch("coprs.logic.build_events_logic.BuildEventsLogic."
+                        "publish", side_effect=RedisConnectionError):
+            self.b3.canceled = True
+            self.db.session.commit()
+        assert self.models.Build.query.get(3).canceled
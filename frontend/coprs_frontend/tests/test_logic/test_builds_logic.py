@@ -3,9 +3,11 @@
 import json
 import os
 import time
+from unittest import mock
 
 import pytest
 
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm.exc import NoResultFound
 from coprs import models
 
@@ -21,6 +23,7 @@ from coprs.logic.builds_logic import (
     BuildsLogic,
     BuildChrootsLogic,
     BuildChrootResultsLogic,
+    BuildsMonitorLogic,
 )
 
 from tests.coprs_test_case import CoprsTestCase, TransactionDecorator
@@ -111,6 +114,53 @@ class TestBuildsLogic(CoprsTestCase):
         with pytest.raises(MalformedArgumentException):
             BuildsLogic.add(**params)
 
+    def test_create_new_bulk(self, f_users, f_coprs, f_mock_chroots, f_db):
+        count = models.Build.query.count()
+        sources = [BuildsLogic.url_source("http://example.com/a.src.rpm"),
+                   BuildsLogic.url_source("http://example.com/b.src.rpm")]
+        build_ids = BuildsLogic.create_new_bulk(self.u1, self.c1, sources,
+                                                ["fedora-18-x86_64"])
+        assert len(build_ids) == 2
+        builds = [models.Build.query.get(build_id) for build_id in build_ids]
+        assert [build.pkgs for build in builds] == \
+            [source["pkgs"] for source in sources]
+
+        sources.append(BuildsLogic.url_source("blah blah"))
+        with pytest.raises(MalformedArgumentException):
+            BuildsLogic.create_new_bulk(self.u1, self.c1, sources)
+        assert models.Build.query.count() == count + 2
+
+    def test_create_new_bulk_postgresql_ids(self, f_users, f_coprs,
+                                            f_mock_chroots, f_db):
+        # SQLite has no sequences, fake the nextval() query at least
+        execute = self.db.session.execute
+        queries = []
+
+        def _execute(statement, *args, **kwargs):
+            if "nextval" in str(statement):
+                queries.append((str(statement), args[0]))
+                return [(1001,), (1000,)]
+            return execute(statement, *args, **kwargs)
+
+        sources = [BuildsLogic.url_source("http://example.com/a.src.rpm"),
+                   BuildsLogic.url_source("http://example.com/b.src.rpm")]
+        with mock.patch.object(self.db.engine.dialect, "name", "postgresql"), \
+                mock.patch.object(self.db.session, "execute",
+                                  side_effect=_execute):
+            build_ids = BuildsLogic.create_new_bulk(
+                self.u1, self.c1, sources, ["fedora-18-x86_64"])
+
+        assert queries == [(
+            "SELECT nextval(pg_get_serial_sequence('build', 'id')) "
+            "FROM generate_series(1, :count)", {"count": 2})]
+        assert build_ids == [1001, 1000]
+        assert [models.Build.query.get(build_id).pkgs
+                for build_id in build_ids] == \
+            [source["pkgs"] for source in sources]
+        assert [bch.build_id for bch in models.BuildChroot.query.filter(
+            models.BuildChroot.build_id.in_(build_ids))
+            .order_by(models.BuildChroot.build_id.desc())] == build_ids
+
     """get_monitor_data output changed
     def test_monitor_logic(self, f_users, f_coprs, f_builds, f_mock_chroots_many, f_build_few_chroots, f_db):
         copr = self.c1
@@ -421,6 +471,65 @@ class TestBuildsLogic(CoprsTestCase):
         BuildsLogic.clean_old_builds()
         assert len(self.db.session.query(models.Build).all()) == 3
 
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots",
+                             "f_builds", "f_db")
+    def test_clean_old_builds_in_bulk(self):
+        for build in [self.b2, self.b3]:
+            build.source_status = StatusEnum("succeeded")
+            for build_chroot in build.build_chroots:
+                build_chroot.status = StatusEnum("succeeded")
+        self.db.session.execute(
+            models.Package.__table__.update().values(max_builds=1))
+        # b1 is the latest build in this chroot
+        lonely_chroot = self.b2_bc[0]
+        self.db.session.delete(lonely_chroot)
+        self.db.session.commit()
+        key = (self.c1_dir.id, self.p1.id, lonely_chroot.mock_chroot_id)
+        assert key in {(row.copr_dir_id, row.package_id, row.mock_chroot_id)
+                       for row in models.LatestBuildChroot.query}
+
+        progress = []
+        assert BuildsLogic.clean_old_builds(
+            dry_run=True, progress=lambda *args: progress.append(args)) == 2
+        assert progress == [(2, 2)]
+        assert models.Build.query.count() == 4
+        assert models.Action.query.count() == 0
+
+        b1_dirs = {"srpm-builds": ["bar"]}
+        b1_dirs.update({bch.name: ["bar"] for bch in self.b1_bc})
+        progress = []
+        assert BuildsLogic.clean_old_builds(
+            chunk_size=1, progress=lambda *args: progress.append(args)) == 2
+        assert progress == [(1, 2), (2, 2)]
+        assert {b.id for b in models.Build.query} == {2, 4}
+        assert models.BuildChroot.query.filter(
+            models.BuildChroot.build_id.in_([1, 3])).count() == 0
+
+        # one delete action per CoprDir
+        actions = models.Action.query.order_by(models.Action.id).all()
+        assert [json.loads(a.data)["build_ids"] for a in actions] == [[1], [3]]
+        assert json.loads(actions[0].data)["project_dirnames"] == {
+            "foocopr": b1_dirs,
+        }
+        assert {a.object_type for a in actions} == {"builds"}
+
+        latest = {(row.copr_dir_id, row.package_id, row.mock_chroot_id):
+                  row.build_id for row in models.LatestBuildChroot.query}
+        assert key not in latest
+        assert set(latest.values()) == {4}
+
+        assert BuildsLogic.clean_old_builds() == 0
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots",
+                             "f_builds", "f_db")
+    def test_delete_orphaned_builds(self):
+        self.c1.deleted = True
+        self.db.session.commit()
+        # b2 is not finished yet
+        assert BuildsLogic.delete_orphaned_builds() == 1
+        assert {b.id for b in models.Build.query} == {2, 3, 4}
+        assert models.Action.query.count() == 1
+
     @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_db")
     def test_no_active_chroot(self):
         self.c1.copr_chroots.clear()
@@ -638,3 +747,160 @@ class TestBuildsLogic(CoprsTestCase):
         # Filter results with multiple rows
         result = BuildChrootsLogic.get_by_results(name="qux").all()
         assert set(result) == set(self.b4.build_chroots)
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds", "f_db")
+    def test_stored_status_in_sync(self):
+        for build in self.basic_builds:
+            assert StatusEnum(build.stored_status) == build.state
+
+        for build_chroot in self.b4_bc:
+            build_chroot.status = StatusEnum("running")
+        self.db.session.commit()
+        assert self.b4.stored_status == StatusEnum("running")
+
+        self.b4_bc[0].status = StatusEnum("failed")
+        self.b4_bc[1].status = StatusEnum("succeeded")
+        self.db.session.commit()
+        assert self.b4.stored_status == StatusEnum("failed")
+
+        self.b4.canceled = True
+        self.db.session.commit()
+        assert self.b4.stored_status == StatusEnum("canceled")
+
+        query = BuildsLogic.filter_by_status(
+            models.Build.query.filter(models.Build.copr_id == self.c2.id),
+            "canceled")
+        assert query.all() == [self.b4]
+
+        with pytest.raises(BadRequest):
+            BuildsLogic.filter_by_status(models.Build.query, "foo")
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds", "f_db")
+    def test_backfill_stored_status(self):
+        # the Build.status of this one can not be decided
+        for build_chroot in self.b1_bc:
+            build_chroot.status = StatusEnum("canceled")
+        self.db.session.commit()
+        assert self.b1.state == "unknown"
+        assert self.b1.stored_status == StatusEnum("unknown")
+
+        self.db.session.execute(
+            models.Build.__table__.update().values(stored_status=None))
+        self.db.session.commit()
+
+        # not backfilled builds are not "unknown"
+        assert BuildsLogic.filter_by_status(
+            models.Build.query, "unknown").all() == []
+        build_ids = [b.id for b in self.basic_builds]
+        assert [b["state"] for b in BuildsLogic.get_states(build_ids)] == \
+            [b.state for b in sorted(self.basic_builds, key=lambda b: b.id)]
+
+        assert BuildsLogic.backfill_stored_status(batch_size=2) == \
+            len(self.basic_builds)
+        for build in models.Build.query.all():
+            assert StatusEnum(build.stored_status) == build.state
+        assert BuildsLogic.backfill_stored_status(only_missing=False) == 0
+
+        assert BuildsLogic.filter_by_status(
+            models.Build.query, "unknown").all() == [self.b1]
+
+
+class TestBuildsMonitorLogic(CoprsTestCase):
+
+    def _latest(self):
+        return {
+            (row.copr_dir_id, row.package_id, row.mock_chroot_id):
+                row.build_chroot_id
+            for row in models.LatestBuildChroot.query.all()
+        }
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds", "f_db")
+    def test_latest_build_chroots_in_sync(self):
+        latest = self._latest()
+        for build_chroot in self.b2_bc:
+            key = (self.c1_dir.id, self.p1.id, build_chroot.mock_chroot_id)
+            assert latest[key] == build_chroot.id
+
+        # the latest build deleted, fallback to the previous one
+        b1_bc_ids = [bch.id for bch in self.b1_bc]
+        for build_chroot in self.b2_bc:
+            self.db.session.delete(build_chroot)
+        self.db.session.delete(self.b2)
+        self.db.session.commit()
+        latest = self._latest()
+        assert sorted(bch_id for (copr_dir_id, package_id, _), bch_id
+                      in latest.items() if package_id == self.p1.id) \
+            == sorted(b1_bc_ids)
+
+        # new build, the package is assigned later (after the SRPM build)
+        build = models.Build(copr=self.c1, user=self.u1, submitted_on=50,
+                             source_status=StatusEnum("pending"))
+        build_chroot = models.BuildChroot(build=build, mock_chroot=self.mc1,
+                                          status=StatusEnum("waiting"))
+        self.db.session.add_all([build, build_chroot])
+        self.db.session.commit()
+        assert build_chroot.id not in self._latest().values()
+        build.package = self.p1
+        self.db.session.commit()
+        key = (self.c1_dir.id, self.p1.id, self.mc1.id)
+        assert self._latest()[key] == build_chroot.id
+
+        # the full re-calculation gives the same results
+        latest = self._latest()
+        models.LatestBuildChroot.query.delete()
+        self.db.session.commit()
+        assert BuildsMonitorLogic.rebuild_latest_build_chroots(batch_size=1) \
+            == models.CoprDir.query.count()
+        assert self._latest() == latest
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds", "f_db")
+    def test_add_latest_build_chroots_upsert(self):
+        latest = self._latest()
+        # e.g. a concurrent transaction added the same rows already
+        BuildsMonitorLogic.add_latest_build_chroots(
+            self.db.session.connection(), [self.b1.id, self.b2.id])
+        assert self._latest() == latest
+
+        # the production statement
+        connection = mock.Mock(dialect=postgresql.dialect())
+        BuildsMonitorLogic.add_latest_build_chroots(connection, [1])
+        statement = connection.execute.call_args[0][0]
+        sql = " ".join(str(statement.compile(
+            dialect=postgresql.dialect())).split())
+        assert "ON CONFLICT (copr_dir_id, package_id, mock_chroot_id) " \
+            "DO UPDATE SET build_id = excluded.build_id, " \
+            "build_chroot_id = excluded.build_chroot_id " \
+            "WHERE excluded.build_id > latest_build_chroot.build_id" in sql
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_db")
+    def test_monitor_many_builds(self):
+        packages, builds_per_package = 10, 5
+        chroots = self.c1.active_chroots
+        for i in range(packages):
+            package = models.Package(copr=self.c1, name="pkg{:03d}".format(i),
+                                     source_type=0)
+            for _ in range(builds_per_package):
+                build = models.Build(copr=self.c1, package=package,
+                                     user=self.u1, submitted_on=10)
+                self.db.session.add_all([build] + [
+                    models.BuildChroot(build=build, mock_chroot=chroot,
+                                       status=StatusEnum("succeeded"))
+                    for chroot in chroots
+                ])
+        self.db.session.commit()
+        last_build_ids = {
+            package.name: max(build.id for build in package.builds)
+            for package in models.Package.query.all()
+        }
+
+        query = BuildsMonitorLogic.package_build_chroots_query(
+            self.c1_dir, [chroot.id for chroot in chroots])
+        assert query.count() == packages * len(chroots)
+        result = list(BuildsMonitorLogic.package_build_chroots(self.c1_dir))
+
+        assert [package["name"] for package in result] == \
+            sorted(last_build_ids)
+        for package in result:
+            assert len(package["chroots"]) == len(chroots)
+            assert {bch.build_id for bch in package["chroots"]} == \
+                {last_build_ids[package["name"]]}
@@ -4,6 +4,8 @@ from unittest import mock
 
 import flask
 import pytest
+from flask_sqlalchemy import get_debug_queries
+from sqlalchemy.orm.attributes import set_committed_value
 
 from coprs import models, helpers, app
 from copr_common.enums import ActionTypeEnum
@@ -340,3 +342,109 @@ class TestReposLogic(CoprsTestCase):
         assert ReposLogic._delete_reason(self.c2.copr_chroots)\
             == ("The chroots x86_64 and i386 are EOL and will remain "
                 "available for another 179 days")
+
+
+class TestRuntimeDependencies(CoprsTestCase):
+
+    def _closure(self, copr):
+        internal, external, non_existing = \
+            ComplexLogic.get_transitive_runtime_dependencies(copr)
+        return ({c.name for c in internal}, set(external), set(non_existing))
+
+    @pytest.mark.usefixtures("f_users", "f_copr_transitive_dependency", "f_db")
+    def test_closure_stored_and_invalidated(self):
+        expected = ({"depcopr2", "depcopr3"}, {"http://some.url/"},
+                    {"copr://user2/nonexisting"})
+        assert self._closure(self.c_td1) == expected
+        self.db.session.commit()
+        assert self.c_td1.runtime_deps_closure is not None
+        assert self._closure(self.c_td1) == expected
+        assert {edge.dependency for edge in models.CoprRuntimeDependency.query
+                .filter_by(copr_id=self.c_td1.id)} == \
+            {"user2/depcopr1", "user2/depcopr2", "user2/depcopr3",
+             "user2/nonexisting"}
+
+        # the transitive dependency changes its dependencies
+        self.c_td3.runtime_dependencies = "copr://user2/depcopr1"
+        self.db.session.commit()
+        assert self.c_td1.runtime_deps_closure is None
+        assert self._closure(self.c_td1) == (
+            {"depcopr2", "depcopr3"}, {"http://some.url/"}, set())
+
+        # non-existing dependency is created
+        self.c_td3.runtime_dependencies = "copr://user2/nonexisting"
+        self.db.session.commit()
+        self._closure(self.c_td1)
+        self.db.session.commit()
+        self.db.session.add(models.Copr(name="nonexisting", user=self.u2,
+                                        repos=""))
+        self.db.session.commit()
+        assert self.c_td1.runtime_deps_closure is None
+        assert self._closure(self.c_td1) == (
+            {"depcopr2", "depcopr3", "nonexisting"}, {"http://some.url/"}, set())
+
+        # unrelated projects don't invalidate the closure
+        self._closure(self.c_td1)
+        self.db.session.commit()
+        self.c1.runtime_dependencies = "copr://user2/depcopr1"
+        self.db.session.commit()
+        assert self.c_td1.runtime_deps_closure is not None
+
+    @pytest.mark.usefixtures("f_users", "f_copr_transitive_dependency", "f_db")
+    def test_closure_concurrent_store(self):
+        def _edges():
+            return sorted(edge.dependency for edge in
+                          models.CoprRuntimeDependency.query
+                          .filter_by(copr_id=copr_id))
+
+        copr_id = self.c_td1.id
+        expected = self._closure(self.c_td1)
+        self.db.session.commit()
+        stored = self.c_td1.runtime_deps_closure
+        edges = _edges()
+
+        # a concurrent request stored the closure after we read it as NULL
+        set_committed_value(self.c_td1, "runtime_deps_closure", None)
+        assert self._closure(self.c_td1) == expected
+        self.db.session.commit()
+        assert self.c_td1.runtime_deps_closure == stored
+        assert _edges() == edges
+
+        # the edges exist already, e.g. inserted by a concurrent request
+        table = models.Copr.__table__.left
+        self.db.session.execute(table.update().where(table.c.id == copr_id)
+                                .values(runtime_deps_closure=None))
+        self.db.session.commit()
+        assert self._closure(self.c_td1) == expected
+        self.db.session.commit()
+        assert self.c_td1.runtime_deps_closure == stored
+        assert _edges() == edges
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_db")
+    def test_deep_chain_performance(self):
+        depth = 50
+        chain = [models.Copr(name="chain{}".format(i), user=self.u1, repos="",
+                             runtime_dependencies="copr://user1/chain{}"
+                             .format(i + 1))
+                 for i in range(depth)]
+        self.db.session.add_all(chain)
+        self.db.session.commit()
+
+        copr_id = chain[0].id
+
+        def _measure():
+            with app.app_context():
+                copr = models.Copr.query.get(copr_id)
+                internal, _, non_existing = \
+                    ComplexLogic.get_transitive_runtime_dependencies(copr)
+                queries = len(get_debug_queries())
+                self.db.session.commit()
+            assert len(internal) == depth - 1
+            assert non_existing == ["copr://user1/chain{}".format(depth)]
+            return queries
+
+        cold_queries = _measure()
+        warm_queries = _measure()
+        assert cold_queries > depth
+        # the Copr object itself, and the dependencies by one query
+        assert warm_queries == 2
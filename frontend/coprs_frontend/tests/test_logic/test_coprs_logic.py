@@ -3,7 +3,6 @@ import pytest
 import flask
 
 from datetime import datetime, timedelta, date
-from flask_whooshee import Whooshee
 
 from sqlalchemy import desc
 
@@ -13,11 +12,11 @@ from coprs.forms import PinnedCoprsForm, ChrootForm, ModuleEnableNameValidator
 from coprs.logic.actions_logic import ActionsLogic
 from coprs.logic.coprs_logic import (CoprsLogic, CoprChrootsLogic,
                                      PinnedCoprsLogic, CoprScoreLogic)
+from coprs.logic.search_logic import CoprSearchLogic
 from coprs.logic.users_logic import UsersLogic
 from coprs.logic.complex_logic import ComplexLogic
 
 from coprs import models
-from coprs.whoosheers import CoprWhoosheer
 from tests.coprs_test_case import CoprsTestCase, new_app_context
 from coprs.exceptions import (
     AccessRestricted,
@@ -39,14 +38,11 @@ class TestCoprsLogic(CoprsTestCase):
         # test will fail if this raises exception
         CoprsLogic.raise_if_unfinished_blocking_action(self.c1, "ha, failed")
 
-    def test_fulltext_whooshee_return_all_hits(self, f_users, f_db):
+    def test_fulltext_return_all_hits(self, f_users, f_db):
         # https://bugzilla.redhat.com/show_bug.cgi?id=1153039
         self.prefix = u"prefix"
         self.s_coprs = []
 
-        index = Whooshee.get_or_create_index(app, CoprWhoosheer)
-        writer = index.writer()
-
         u1_count = 150
         for x in range(u1_count):
             self.s_coprs.append(models.Copr(name=self.prefix + str(x), user=self.u1))
@@ -62,15 +58,8 @@ class TestCoprsLogic(CoprsTestCase):
         self.db.session.add_all(self.s_coprs)
         self.db.session.commit()
 
-        for copr in self.s_coprs:
-            CoprWhoosheer.insert_copr(writer, copr)
-        writer.commit(optimize=True)
-
-        query = CoprsLogic.get_multiple_fulltext("prefix")
-        pre_query = models.Copr.query.order_by(desc(models.Copr.created_on))\
-            .join(models.User).filter(models.Copr.deleted == False)
-
-        query = pre_query.whooshee_search(self.prefix, whoosheer=CoprWhoosheer) # needs flask-whooshee-0.2.0
+        CoprSearchLogic.process_queue()
+        query = CoprsLogic.get_multiple_fulltext(self.prefix)
 
         results = query.all()
         for obj in results:
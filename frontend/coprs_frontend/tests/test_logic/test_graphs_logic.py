@@ -0,0 +1,106 @@
+"""
+Test the build and action graph data calculation
+"""
+
+import random
+
+import pytest
+from flask_sqlalchemy import get_debug_queries
+from copr_common.enums import ActionTypeEnum, BackendResultEnum, StatusEnum
+from coprs import app, models
+from coprs.logic.actions_logic import ActionsLogic
+from coprs.logic.builds_logic import BuildsLogic
+from coprs.logic.helpers import get_graph_parameters
+from tests.coprs_test_case import CoprsTestCase
+
+
+@pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds",
+                         "f_db")
+class TestGraphsLogic(CoprsTestCase):
+
+    def _fill_history(self, params, count=300):
+        """
+        Randomly spread build chroots and actions over the graph period.
+        """
+        rand = random.Random(42)
+        start, end = params["start"], params["end"]
+        for _ in range(count):
+            submitted = rand.randint(start - params["step"], end)
+            started = rand.choice([None, submitted + rand.randint(0, 3600)])
+            ended = None
+            if started and rand.random() < 0.8:
+                ended = started + rand.randint(60, 7200)
+
+            status = StatusEnum("pending")
+            if started:
+                status = StatusEnum("succeeded") if ended else \
+                    StatusEnum("running")
+
+            build = models.Build(
+                copr=self.c1, copr_dir=self.c1_dir, user=self.u1,
+                submitted_on=submitted, canceled=rand.random() < 0.1,
+                source_status=StatusEnum("succeeded"))
+            self.db.session.add(models.BuildChroot(
+                build=build, mock_chroot=self.mc1, status=status,
+                started_on=started, ended_on=ended))
+
+            self.db.session.add(models.Action(
+                action_type=ActionTypeEnum("createrepo"),
+                object_type="copr", created_on=submitted, ended_on=ended,
+                result=rand.choice([BackendResultEnum("success"),
+                                    BackendResultEnum("failure")])
+                if ended else BackendResultEnum("waiting")))
+        self.db.session.commit()
+
+    @pytest.mark.parametrize("graph_type", ["10min", "24h"])
+    def test_buckets_match_the_loop(self, graph_type):
+        params = get_graph_parameters(graph_type)
+        self._fill_history(params)
+        first = params["start"]
+        last = params["end"] - params["step"]
+
+        with app.app_context():
+            builds = BuildsLogic.get_jobs_buckets(first, last, params["step"])
+            actions = ActionsLogic.get_actions_buckets(first, last,
+                                                       params["step"])
+            dq = get_debug_queries()
+
+        expected_builds = []
+        expected_actions = []
+        for start in range(first, last + 1, params["step"]):
+            stop = start + params["step"]
+            expected_builds.append((
+                start,
+                BuildsLogic.get_pending_jobs_bucket(start, stop),
+                BuildsLogic.get_running_jobs_bucket(start, stop),
+            ))
+            expected_actions.append((start,) + tuple(
+                ActionsLogic.get_actions_bucket(start, stop,
+                                                BackendResultEnum(result))
+                for result in ["waiting", "success", "failure"]))
+
+        assert builds == expected_builds
+        assert actions == expected_actions
+        assert len(dq) == 2
+
+    def test_graph_data_cached(self):
+        self._fill_history(get_graph_parameters("10min"))
+
+        data = BuildsLogic.get_task_graph_data("10min")
+        assert len(data[0]) == len(data[1]) == 144 + 1
+        assert models.BuildsStatistics.query.count() == 144
+
+        # only the last (missing) bucket needs to be re-calculated
+        models.BuildsStatistics.query.filter(
+            models.BuildsStatistics.time == max(
+                row.time for row in models.BuildsStatistics.query)).delete()
+        self.db.session.commit()
+        assert BuildsLogic.get_task_graph_data("10min")[:2] == data[:2]
+        assert models.BuildsStatistics.query.count() == 144
+
+        small = BuildsLogic.get_small_graph_data("30min")
+        assert len(small[0]) == 48 + 1
+
+        data = ActionsLogic.get_action_graph_data("24h")
+        assert len(data[0]) == 90 + 1
+        assert models.ActionsStatistics.query.count() == 90
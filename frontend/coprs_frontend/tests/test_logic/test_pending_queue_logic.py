@@ -0,0 +1,100 @@
+"""
+Test the materialized pending build queue
+"""
+
+from unittest import mock
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from copr_common.enums import StatusEnum
+from coprs import models
+from coprs.logic.pending_queue_logic import PendingQueueLogic
+from tests.coprs_test_case import CoprsTestCase
+
+
+def _queue():
+    return {task.task_id for task in models.PendingQueueTask.query.all()}
+
+
+@pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds",
+                         "f_db")
+class TestPendingQueueLogic(CoprsTestCase):
+
+    def test_build_lifecycle(self):
+        assert _queue() == set()
+
+        self.b3.source_status = StatusEnum("pending")
+        self.db.session.commit()
+        assert _queue() == {"3"}
+
+        self.b3.source_status = StatusEnum("succeeded")
+        for build_chroot in self.b3_bc:
+            build_chroot.status = StatusEnum("pending")
+        self.db.session.commit()
+        assert _queue() == {bch.task_id for bch in self.b3_bc}
+
+        self.b3_bc[0].status = StatusEnum("running")
+        self.b3_bc[1].status = StatusEnum("succeeded")
+        self.db.session.commit()
+        assert _queue() == {self.b3_bc[0].task_id}
+
+        self.b3.canceled = True
+        self.db.session.commit()
+        assert _queue() == set()
+
+    def test_delete_build(self):
+        for build_chroot in self.b3_bc:
+            build_chroot.status = StatusEnum("pending")
+        self.db.session.commit()
+        assert len(_queue()) == len(self.b3_bc)
+
+        self.db.session.delete(self.b3)
+        self.db.session.commit()
+        assert _queue() == set()
+
+    def test_redis_failure(self):
+        with mock.patch("coprs.logic.pending_queue_logic.rcp.get_connection",
+                        side_effect=RedisConnectionError):
+            self.b3.source_status = StatusEnum("pending")
+            self.db.session.commit()
+        assert _queue() == {"3"}
+
+    def test_queue_order(self):
+        self.b2.source_status = StatusEnum("pending")
+        self.b2.is_background = True
+        self.b3.source_status = StatusEnum("pending")
+        for build_chroot in self.b4_bc:
+            build_chroot.status = StatusEnum("pending")
+        self.db.session.commit()
+
+        tasks = PendingQueueLogic.get_tasks(srpm=True).all()
+        assert [task.task_id for task in tasks] == ["3", "2"]
+        assert not any(task.blocked for task in tasks)
+
+        tasks = PendingQueueLogic.get_tasks(srpm=False).all()
+        assert [task.task_id for task in tasks] == \
+            [bch.task_id for bch in sorted(self.b4_bc,
+                                           key=lambda x: x.mock_chroot_id)]
+        assert tasks[0].to_dict()["tags"] == tasks[0].mock_chroot.tags
+
+    def test_check_and_fix(self):
+        self.b3.source_status = StatusEnum("pending")
+        for build_chroot in self.b4_bc:
+            build_chroot.status = StatusEnum("pending")
+        self.db.session.commit()
+        assert PendingQueueLogic.check() == ([], [], [])
+
+        table = models.PendingQueueTask.__table__
+        self.db.session.execute(
+            table.delete().where(table.c.task_id == "3"))
+        self.db.session.execute(
+            table.update().where(table.c.task_id == self.b4_bc[0].task_id)
+            .values(background=True))
+        self.db.session.execute(table.insert().values(
+            task_id="1", build_id=1, srpm=True, background=False,
+            project_owner="user1", sandbox="user1/foocopr--user1"))
+        self.db.session.commit()
+
+        assert PendingQueueLogic.check(fix=True) == \
+            (["3"], ["1"], [self.b4_bc[0].task_id])
+        assert PendingQueueLogic.check() == ([], [], [])
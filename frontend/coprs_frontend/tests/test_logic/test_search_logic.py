@@ -0,0 +1,156 @@
+"""
+Test the full-text project search documents
+"""
+
+import json
+from unittest import mock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from coprs import models
+from coprs.logic.coprs_logic import CoprsLogic
+from coprs.logic.search_logic import CoprSearchLogic
+from tests.coprs_test_case import CoprsTestCase
+
+
+@pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_db")
+class TestCoprSearchLogic(CoprsTestCase):
+
+    @staticmethod
+    def _search(fulltext):
+        CoprSearchLogic.process_queue()
+        return {copr.full_name for copr
+                in CoprsLogic.get_multiple_fulltext(fulltext)}
+
+    def test_documents_follow_changes(self):
+        assert not CoprSearchLogic.is_complete()
+        CoprSearchLogic.process_queue()
+        assert CoprSearchLogic.is_complete()
+        assert self._search("foocopr") == {"user1/foocopr", "user2/foocopr"}
+        assert self._search("user2 foo") == {"user2/foocopr"}
+        assert self._search("fedora-18") == {"user1/foocopr",
+                                             "user2/barcopr"}
+
+        self.c2.description = "The Hello World project"
+        package = models.Package(name="hello-cli", copr=self.c1,
+                                 source_type=0)
+        self.db.session.add(package)
+        self.db.session.commit()
+        assert self._search("hello") == {"user1/foocopr", "user2/foocopr"}
+        assert self._search("hello-cli") == {"user1/foocopr"}
+        assert self._search("hel wor") == {"user2/foocopr"}
+        assert self._search("!!") == set()
+
+        self.db.session.delete(package)
+        self.db.session.commit()
+        assert self._search("hello") == {"user2/foocopr"}
+
+    def test_rebuild(self):
+        CoprSearchLogic.process_queue()
+        table = models.CoprSearch.__table__
+        self.db.session.execute(table.delete())
+        self.db.session.commit()
+        assert not CoprSearchLogic.is_complete()
+        assert self._search("foocopr") == set()
+
+        assert CoprSearchLogic.rebuild(batch_size=2) == 3
+        assert CoprSearchLogic.is_complete()
+        assert self._search("foocopr") == {"user1/foocopr", "user2/foocopr"}
+
+    def test_queue(self):
+        CoprSearchLogic.process_queue()
+        assert CoprSearchLogic.queue_status() == {"queued": 0, "lag": 0}
+
+        self.c1.description = "hello"
+        self.c2.description = "hello"
+        self.db.session.commit()
+        self.c1.description = "hello again"
+        self.db.session.commit()
+        status = CoprSearchLogic.queue_status()
+        assert status["queued"] == 3
+        assert status["lag"] >= 0
+
+        # documents are not updated until the indexer runs
+        assert {copr.full_name for copr
+                in CoprsLogic.get_multiple_fulltext("hello")} == set()
+        assert CoprSearchLogic.process_queue(batch_size=2) == 3
+        assert CoprSearchLogic.queue_status()["queued"] == 0
+        assert self._search("again") == {"user1/foocopr"}
+
+        response = self.tc.get("/status/search-queue/json/")
+        assert json.loads(response.data) == {"queued": 0, "lag": 0}
+
+    def test_latest_indexed_data_update(self):
+        CoprSearchLogic.process_queue()
+        self.db.session.add(self.c1)
+        assert self.c1.latest_indexed_data_update
+        self.c1.latest_indexed_data_update = 1
+        self.db.session.commit()
+
+        # indexing doesn't count as a data change
+        CoprSearchLogic.rebuild()
+        copr = models.Copr.query.get(self.c1.id)
+        assert copr.latest_indexed_data_update == 1
+        search = models.CoprSearch.query.get(copr.id)
+        assert search.indexed_on > 1
+
+        copr.description = "changed"
+        self.db.session.commit()
+        self.db.session.expire_all()
+        assert models.Copr.query.get(copr.id).latest_indexed_data_update > 1
+
+    def test_postgresql_statements(self):
+        # the test-suite runs on SQLite, check at least the generated SQL
+        # pylint: disable=protected-access
+        document = " ".join(str(CoprSearchLogic._document_expression().compile(
+            dialect=postgresql.dialect())).split())
+        assert document == (
+            "(setweight(to_tsvector(%(to_tsvector_1)s, %(names)s), "
+            "%(setweight_1)s) || setweight(to_tsvector(%(to_tsvector_2)s, "
+            "%(contents)s), %(setweight_2)s)) || setweight(to_tsvector("
+            "%(to_tsvector_3)s, %(texts)s), %(setweight_3)s)")
+
+        with mock.patch.object(CoprSearchLogic, "_postgres",
+                               return_value=True):
+            query = CoprSearchLogic.filter_fulltext(
+                models.Copr.query, "Hello wor-ld")
+        sql = " ".join(str(query.statement.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True})).split())
+        tsquery = "to_tsquery('simple', '''hello'':* & ''wor-ld'':*')"
+        assert "copr_search.document @@ {}".format(tsquery) in sql
+        assert "ORDER BY ts_rank(copr_search.document, {}) DESC, " \
+            "copr.created_on DESC".format(tsquery) in sql
+
+    def test_update_upsert(self):
+        CoprSearchLogic.process_queue()
+        self.db.session.add(self.c1)
+        copr_id = self.c1.id
+        # the document exists already, e.g. a concurrent indexer created it
+        self.db.session.execute(models.CoprSearch.__table__.update().values(
+            document="stale", indexed_on=1))
+        connection = self.db.session.connection()
+        with mock.patch.object(connection, "execute",
+                               side_effect=connection.execute) as execute:
+            CoprSearchLogic.update(connection, [copr_id])
+            statements = [call[0][0] for call in execute.call_args_list]
+        self.db.session.commit()
+        search = models.CoprSearch.query.get(copr_id)
+        assert "foocopr" in search.document
+        assert search.indexed_on > 1
+
+        # no DELETE for the existing projects, one upsert
+        sql = " ".join(str(statements[-1].compile(
+            dialect=postgresql.dialect())).split())
+        assert "ON CONFLICT (copr_id) DO UPDATE SET " \
+            "document = excluded.document, " \
+            "indexed_on = excluded.indexed_on" in sql
+        assert not any(str(statement).startswith("DELETE")
+                       for statement in statements)
+
+    def test_apiv3_search(self):
+        CoprSearchLogic.process_queue()
+        response = self.tc.get("/api_3/project/search?query=barcopr")
+        assert response.status_code == 200
+        items = json.loads(response.data)["items"]
+        assert [item["full_name"] for item in items] == ["user2/barcopr"]
@@ -30,3 +30,17 @@ class TestStatLogic(CoprsTestCase):
         self.db.session.commit()
         csl = CounterStatLogic.get(self.counter_name).one()
         assert csl.counter == 1
+
+    def test_incr_later(self):
+        CounterStatLogic.add(self.counter_name, self.counter_type)
+        self.db.session.commit()
+
+        other_name = "{}:user/other".format(CounterStatType.REPO_DL)
+        for name in [self.counter_name, self.counter_name, other_name]:
+            CounterStatLogic.incr_later(name, self.counter_type)
+        assert CounterStatLogic.get(self.counter_name).one().counter == 0
+
+        assert CounterStatLogic.flush_pending() == 2
+        assert CounterStatLogic.get(self.counter_name).one().counter == 2
+        assert CounterStatLogic.get(other_name).one().counter == 1
+        assert CounterStatLogic.flush_pending() == 0
@@ -1,4 +1,5 @@
 import json
+import time
 
 from unittest import mock, skip
 import pytest
@@ -75,6 +76,31 @@ class TestWaitingBuilds(CoprsTestCase):
         assert len(json.loads(r.data.decode("utf-8"))) == 5
 
 
+    def test_pending_jobs_etag(self, f_users, f_coprs, f_mock_chroots,
+                               f_builds, f_db):
+        r = self.tc.get("/backend/pending-jobs/")
+        etag = r.headers["ETag"]
+        r = self.tc.get("/backend/pending-jobs/",
+                        headers={"If-None-Match": etag})
+        assert r.status_code == 304
+
+        # unrelated change
+        self.c1.description = "foo"
+        self.db.session.add(self.c1)
+        self.db.session.commit()
+        r = self.tc.get("/backend/pending-jobs/",
+                        headers={"If-None-Match": etag})
+        assert r.status_code == 304
+
+        for build_chroot in self.b2_bc:
+            build_chroot.status = StatusEnum("pending")
+            self.db.session.add(build_chroot)
+        self.db.session.commit()
+        r = self.tc.get("/backend/pending-jobs/",
+                        headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.headers["ETag"] != etag
+
     def test_pending_bg_build(self, f_users, f_coprs, f_mock_chroots, f_builds, f_db):
         self.b2.is_background = True
         for build_chroots in [self.b2_bc, self.b3_bc, self.b4_bc]:
@@ -94,13 +120,36 @@ class TestWaitingBuilds(CoprsTestCase):
         self.b3.batch = self.batch3
         self.batch3.blocked_by = self.batch2
         self.db.session.commit()
+        b2_id, b3_id, b4_id = self.b2.id, self.b3.id, self.b4.id
 
         r = self.tc.get("/backend/pending-jobs/")
         data = json.loads(r.data.decode("utf-8"))
 
         ids = [job["build_id"] for job in data]
-        assert self.b3.id not in ids
-        assert {self.b2.id, self.b4.id}.issubset(ids)
+        assert b3_id not in ids
+        assert {b2_id, b4_id}.issubset(ids)
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds", "f_db")
+    def test_pending_jobs_arch_filter(self):
+        self.b2.source_status = StatusEnum("pending")
+        for build_chroots in [self.b3_bc, self.b4_bc]:
+            for build_chroot in build_chroots:
+                build_chroot.status = StatusEnum("pending")
+        self.db.session.commit()
+
+        def _chroots(url):
+            data = json.loads(self.tc.get(url).data.decode("utf-8"))
+            return {job["chroot"] for job in data}
+
+        all_chroots = _chroots("/backend/pending-jobs/")
+        assert None in all_chroots
+        assert {"fedora-17-x86_64", "fedora-17-i386"}.issubset(all_chroots)
+
+        assert _chroots("/backend/pending-jobs/?arch=i386&srpm=0") == \
+            {chroot for chroot in all_chroots
+             if chroot and chroot.endswith("i386")}
+        assert _chroots("/backend/pending-jobs/?arch=x86_64&arch=i386") == \
+            all_chroots
 
     @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds", "f_db")
     def test_build_jobs_performance(self):
@@ -417,6 +466,39 @@ class TestWaitingActions(CoprsTestCase):
         actions = json.loads(r.data.decode("utf-8"))
         assert len(actions) == 1
 
+    @new_app_context
+    def test_claim_actions(self, f_users, f_coprs, f_actions, f_db):
+        url = "/backend/claim-actions/?limit=1"
+        r = self.tc.post(url, headers=self.auth_header)
+        actions = json.loads(r.data.decode("utf-8"))
+        # cancel_build has higher priority than delete
+        assert [a["id"] for a in actions] == [2]
+        assert actions[0]["data"] == json.dumps({'task_id': 123})
+
+        r = self.tc.post(url, headers=self.auth_header)
+        assert [a["id"] for a in json.loads(r.data.decode("utf-8"))] == [1]
+
+        # both are leased
+        r = self.tc.post(url, headers=self.auth_header)
+        assert json.loads(r.data.decode("utf-8")) == []
+
+        # expired lease, the action is offered again
+        action = self.models.Action.query.get(2)
+        action.lease_expires_on = int(time.time()) - 1
+        self.db.session.commit()
+        r = self.tc.post("/backend/claim-actions/?limit=10&lease=60",
+                         headers=self.auth_header)
+        assert [a["id"] for a in json.loads(r.data.decode("utf-8"))] == [2]
+
+    def test_claim_actions_requires_password(self):
+        r = self.tc.post("/backend/claim-actions/")
+        assert b"You have to provide the correct password" in r.data
+
+    def test_claim_actions_bad_limit(self):
+        r = self.tc.post("/backend/claim-actions/?limit=0",
+                         headers=self.auth_header)
+        assert r.status_code == 400
+
     @new_app_context
     def test_get_action_succeeded(self, f_users, f_coprs, f_actions, f_db):
         r = self.tc.get("/backend/action/1/",
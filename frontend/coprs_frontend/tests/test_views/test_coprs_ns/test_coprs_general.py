@@ -16,6 +16,7 @@ from coprs import app, cache, models
 from coprs.helpers import generate_repo_name
 from coprs.logic.coprs_logic import CoprsLogic, CoprDirsLogic
 from coprs.logic.actions_logic import ActionsLogic
+from coprs.logic.stat_logic import CounterStatLogic
 
 from commands.create_chroot import create_chroot_function
 
@@ -793,6 +794,22 @@ class TestCoprRepoGeneration(CoprsTestCase):
         assert b"baseurl=https://" in r.data
         app.config["ENFORCE_PROTOCOL_FOR_BACKEND_URL"] = orig
 
+    def test_repofile_downloads_counted(self, f_users, f_coprs,
+                                        f_mock_chroots, f_custom_builds, f_db):
+        url = "/coprs/{0}/{1}/repo/fedora-18/".format(self.u1.name,
+                                                     self.c1.name)
+        # the second download is served from cache, but still counted
+        for _ in range(2):
+            assert self.tc.get(url).status_code == 200
+        assert self.tc.get(url.replace("fedora-18", "fedora-99")) \
+            .status_code == 404
+
+        self.db.session.add(self.c1)
+        assert CounterStatLogic.get_copr_repo_dl_stat(self.c1) == {}
+        assert CounterStatLogic.flush_pending() == 1
+        assert CounterStatLogic.get_copr_repo_dl_stat(self.c1) == {
+            "fedora-18": 2}
+
     @new_app_context
     def test_repofile_multilib(self, f_users, f_coprs, f_mock_chroots,
                                f_mock_chroots_many, f_custom_builds, f_db):
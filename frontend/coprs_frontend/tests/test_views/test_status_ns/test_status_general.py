@@ -0,0 +1,73 @@
+"""
+Test the /status/ pages
+"""
+
+from unittest import mock
+
+import pytest
+
+from copr_common.enums import StatusEnum
+from tests.coprs_test_case import CoprsTestCase
+
+
+class TestStatusPages(CoprsTestCase):
+
+    def _make_pending(self):
+        self.b2.source_status = StatusEnum("pending")
+        self.b2.is_background = True
+        for build_chroot in self.b3_bc + self.b4_bc:
+            build_chroot.status = StatusEnum("pending")
+        self.db.session.commit()
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds", "f_db")
+    @pytest.mark.parametrize("state", ["importing", "pending", "starting",
+                                       "running"])
+    def test_status_page(self, state):
+        self._make_pending()
+        r = self.tc.get("/status/{}/".format(state))
+        assert r.status_code == 200
+        r = self.tc.get("/status/{}/json/".format(state))
+        assert r.status_code == 200
+        for task in r.json:
+            assert task["type"] in ["rpm", "srpm"]
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds", "f_db")
+    def test_pending_json(self):
+        self._make_pending()
+        tasks = self.tc.get("/status/pending/json/").json
+        assert [(t["type"], t["build_id"], t["chroot"], t["background"])
+                for t in tasks] == [
+            ("rpm", 4, "fedora-17-i386", False),
+            ("rpm", 4, "fedora-17-x86_64", False),
+            ("rpm", 3, "fedora-17-i386", False),
+            ("rpm", 3, "fedora-17-x86_64", False),
+            ("srpm", 2, None, True),
+        ]
+        assert tasks[-1]["project"] == "user1/foocopr"
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds", "f_db")
+    def test_pending_pagination(self):
+        self._make_pending()
+        module = "coprs.views.status_ns.status_general"
+        with mock.patch(module + ".PAGINATE_IF_MORE_THAN", 2), \
+                mock.patch(module + ".TASKS_PER_PAGE", 3):
+            r = self.tc.get("/status/pending/?page=2")
+        page = r.data.decode("utf-8")
+        assert "4 tasks (+ 1 others with lower priority) are" in page
+        assert "too many tasks to be shown on one page" in page
+        assert page.count("/coprs/user2/foocopr/build/3/") == 1
+        assert "/build/4/" not in page
+
+        r = self.tc.post("/status/pending/?page=2",
+                                  data={"go_to_page": 1})
+        assert r.status_code == 302
+        assert r.location.endswith("/status/pending/?page=1")
+
+    @pytest.mark.usefixtures("f_users", "f_coprs", "f_mock_chroots", "f_builds", "f_db")
+    def test_pending_all(self):
+        self._make_pending()
+        r = self.tc.get("/status/pending/all/")
+        page = r.data.decode("utf-8")
+        assert r.status_code == 200
+        assert "<strong>5</strong> jobs" in page
+        assert "srpm-builds" in page
@@ -19,6 +19,49 @@ class TestBuildProxy(object):
         assert build.id == 1
         assert build.foo == "bar"
 
+    def test_get_states(self, send):
+        def _response(endpoint, params):
+            response = mock.Mock(spec=Response)
+            response.json.return_value = {"items": [
+                {"id": int(build_id), "state": "running"}
+                for build_id in params["build_ids"].split(",")
+            ], "meta": {}}
+            return response
+        send.side_effect = _response
+
+        build_proxy = BuildProxy(self.config)
+        states = build_proxy.get_states(range(450, 0, -1))
+        assert [build.id for build in states] == list(range(1, 451))
+        assert [len(call[1]["params"]["build_ids"].split(","))
+                for call in send.call_args_list] == [200, 200, 50]
+
+    def test_get_events(self, _send):
+        response = mock.Mock(spec=Response)
+        response.raw = mock.Mock(chunked=True)
+        response.iter_lines.return_value = iter([
+            'data: {"build_id": 1, "chroot": null, "state": "running"}',
+            "",
+            ": keepalive",
+            "",
+            'data: {"build_id": 1, "chroot": "fedora-rawhide-x86_64",',
+            'data:  "state": "failed"}',
+            "",
+        ])
+        build_proxy = BuildProxy(self.config)
+        with mock.patch.object(Request, "send_stream") as send_stream:
+            send_stream.return_value = response
+            events = list(build_proxy.get_events(build_ids=[2, 1]))
+
+        assert events == [
+            {"build_id": 1, "chroot": None, "state": "running"},
+            {"build_id": 1, "chroot": "fedora-rawhide-x86_64",
+             "state": "failed"},
+        ]
+        assert send_stream.call_args[1]["data"]["build_ids"] == [1, 2]
+        assert send_stream.call_args[1]["auth"] is build_proxy.auth
+        assert response.iter_lines.call_args[1]["chunk_size"] is None
+        assert response.close.called
+
 
 @mock.patch('copr.v3.proxies.Request.send')
 def test_build_distgit(send):
@@ -35,3 +78,20 @@ def test_build_distgit(send):
         'ownername': 'praiskup', 'projectname': 'ping',
         'distgit': None, 'namespace': None, 'package_name': 'mock',
         'committish': 'master', 'project_dirname': None}
+
+
+@mock.patch('copr.v3.proxies.Request.send')
+def test_build_bulk(send):
+    mock_client = Client.create_from_config_file(config_location)
+    builds = [{"source_type": "scm", "clone_url": "https://example.com/a.git"},
+              {"source_type": "pypi", "pypi_package_name": "b"}]
+    mock_client.build_proxy.create_bulk(
+        "praiskup", "ping", builds, buildopts={"chroots": ["fedora-rawhide-x86_64"]},
+    )
+    assert len(send.call_args_list) == 1
+    args = send.call_args_list[0][1]
+    assert args['method'] == 'POST'
+    assert args['endpoint'] == '/build/create/bulk'
+    assert args['data'] == {
+        'ownername': 'praiskup', 'projectname': 'ping', 'builds': builds,
+        'project_dirname': None, 'chroots': ['fedora-rawhide-x86_64']}
@@ -3,6 +3,7 @@ from munch import Munch
 from copr.test import mock
 from copr.v3.helpers import wait, succeeded, List
 from copr.v3 import BuildProxy, CoprException
+from copr.v3.exceptions import CoprNoResultException, CoprAuthException
 
 
 class TestHelpers(object):
@@ -19,6 +20,18 @@ class TestHelpers(object):
 
 
 class TestWait(object):
+    @pytest.fixture(autouse=True)
+    def get_states(self):
+        """
+        Ask the (mocked) BuildProxy.get() for the build states
+        """
+        def _get_states(proxy, build_ids):
+            return [proxy.get(build_id) for build_id in build_ids]
+
+        with mock.patch("copr.v3.proxies.build.BuildProxy.get_states",
+                        _get_states):
+            yield
+
     @mock.patch("copr.v3.proxies.build.BuildProxy.get")
     def test_wait(self, mock_get):
         build = MunchMock(id=1, state="importing")
@@ -64,6 +77,80 @@ class TestWait(object):
         wait(build, interval=0, callback=callback)
         assert callback.called
 
+    @mock.patch("copr.v3.proxies.build.BuildProxy.get")
+    def test_wait_states(self, mock_get):
+        builds = [MunchMock(id=1, state="importing"),
+                  MunchMock(id=2, state="importing")]
+        states = iter([
+            [Munch(id=1, state="running"), Munch(id=2, state="succeeded")],
+            [Munch(id=1, state="failed")],
+        ])
+        final = {1: "failed", 2: "succeeded"}
+        mock_get.side_effect = lambda id: MunchMock(id=id, state=final[id],
+                                                    ended_on=10)
+        callback = mock.Mock()
+        with mock.patch("copr.v3.proxies.build.BuildProxy.get_states") as get_states:
+            get_states.side_effect = lambda ids: next(states)
+            wait(builds, interval=0, callback=callback)
+
+        assert [call[0] for call in get_states.call_args_list] == [([1, 2],), ([1],)]
+        # only the finished builds are fetched
+        assert [call[0] for call in mock_get.call_args_list] == [(2,), (1,)]
+        first, last = [call[0][0] for call in callback.call_args_list]
+        assert [build.state for build in first] == ["running", "succeeded"]
+        assert [build.get("ended_on") for build in last] == [10, 10]
+
+    @mock.patch("copr.v3.proxies.build.BuildProxy.get")
+    def test_wait_events(self, mock_get):
+        builds = [MunchMock(id=1, state="importing"),
+                  MunchMock(id=2, state="importing")]
+        streams = iter([
+            [Munch(build_id=1, chroot=None, state="importing"),
+             Munch(build_id=2, chroot=None, state="running"),
+             Munch(build_id=2, chroot="fedora-rawhide-x86_64", state="failed"),
+             Munch(build_id=2, chroot=None, state="failed")],
+            # the server closed the stream, we re-connect
+            [Munch(build_id=1, chroot=None, state="succeeded")],
+        ])
+        final = {1: "succeeded", 2: "failed"}
+        mock_get.side_effect = lambda id: MunchMock(id=id, state=final[id],
+                                                    ended_on=10)
+        callback = mock.Mock()
+        with mock.patch("copr.v3.proxies.build.BuildProxy.get_events") as get_events:
+            get_events.side_effect = lambda **kwargs: (e for e in next(streams))
+            result = wait(builds, callback=callback, events=True)
+
+        assert [call[1]["build_ids"] for call in get_events.call_args_list] == \
+            [[1, 2], [1]]
+        assert [build.state for build in result] == ["succeeded", "failed"]
+        assert [call[0] for call in mock_get.call_args_list] == [(2,), (1,)]
+        assert [[build.state for build in call[0][0]]
+                for call in callback.call_args_list] == [
+                    ["importing", "running"],
+                    ["importing", "failed"],
+                    ["succeeded", "failed"]]
+
+    @pytest.mark.parametrize("error", [
+        CoprNoResultException("No /build/events/ API"),
+        CoprAuthException("Not authenticated"),
+    ])
+    @mock.patch("copr.v3.proxies.build.BuildProxy.get")
+    def test_wait_events_fallback(self, mock_get, error):
+        build = MunchMock(id=1, state="importing")
+        mock_get.return_value = MunchMock(id=1, state="succeeded")
+        with mock.patch("copr.v3.proxies.build.BuildProxy.get_events") as get_events:
+            get_events.side_effect = error
+            assert wait(build, interval=0, events=True)
+        assert get_events.call_count == 1
+
+    @mock.patch("copr.v3.proxies.build.BuildProxy.get")
+    def test_wait_no_events_by_default(self, mock_get):
+        build = MunchMock(id=1, state="importing")
+        mock_get.return_value = MunchMock(id=1, state="succeeded")
+        with mock.patch("copr.v3.proxies.build.BuildProxy.get_events") as get_events:
+            assert wait(build, interval=0)
+        assert not get_events.called
+
 
 class MunchMock(Munch):
     __proxy__ = BuildProxy({"copr_url": "http://copr", "login": "test", "token": "test"})
@@ -35,3 +35,24 @@ class TestRequest(object):
         args, kwargs = request.call_args
         assert kwargs["method"] == "GET"
         assert kwargs["url"] == "http://copr/api_3/foo"
+
+    @mock.patch('requests.Session.request')
+    def test_send_etag(self, request):
+        first = mock.Mock(spec=Response, status_code=200,
+                          headers={"ETag": '"abc"'})
+        first.json.return_value = {"id": 1}
+        not_modified = mock.Mock(spec=Response, status_code=304, headers={})
+        not_modified.json.side_effect = ValueError
+        request.side_effect = [first, not_modified]
+
+        req = Request(api_base_url="http://copr/api_3")
+        assert req.send(endpoint="build/1", params={"a": 1}) == first
+        assert not request.call_args[1]["headers"]
+        assert req.send(endpoint="build/1", params={"a": 1}) == first
+        assert request.call_args[1]["headers"] == {"If-None-Match": '"abc"'}
+
+        # other clients (maybe with other credentials) don't share the cache
+        request.side_effect = [first]
+        other = Request(api_base_url="http://copr/api_3")
+        assert other.send(endpoint="build/1", params={"a": 1}) == first
+        assert not request.call_args[1]["headers"]
@@ -5,7 +5,8 @@ import os
 import time
 import configparser
 from munch import Munch
-from .exceptions import CoprConfigException, CoprException
+from .exceptions import (CoprConfigException, CoprException, CoprRequestException,
+                         CoprNoResultException, CoprAuthException)
 
 
 class List(list):
@@ -73,7 +74,7 @@ def bind_proxy(func):
     return wrapper
 
 
-def wait(waitable, interval=30, callback=None, timeout=0):
+def wait(waitable, interval=30, callback=None, timeout=0, events=False):
     """
     Wait for a waitable thing to finish. At this point, it is possible to wait only
     for builds, but this function should be enhanced to wait for
@@ -82,8 +83,13 @@ def wait(waitable, interval=30, callback=None, timeout=0):
     :param Munch/list waitable: A Munch result or list of munches
     :param int interval: How many seconds wait before requesting updated Munches from frontend
     :param callable callback: Callable taking one argument (list of build Munches).
-                              It will be triggered before every sleep interval.
+                              It will be triggered before every sleep interval,
+                              or after every state change when watching the events.
     :param int timeout: Limit how many seconds should be waited before this function unsuccessfully ends
+    :param bool events: Watch the build events stream (one long-lived
+                        connection) instead of polling, if the frontend
+                        supports it and we are authenticated.  Off by
+                        default, each stream occupies one frontend worker.
     :return: list of build Munches
 
     Example usage:
@@ -96,30 +102,75 @@ def wait(waitable, interval=30, callback=None, timeout=0):
     builds = waitable if isinstance(waitable, list) else [waitable]
     watched = set([build.id for build in builds])
     munches = dict((build.id, build) for build in builds)
-    failed = []
+    proxies = {}
+    for build in builds:
+        proxy = getattr(build, "__proxy__", None) or waitable.__proxy__
+        proxies.setdefault(proxy, []).append(build.id)
     terminate = time.time() + timeout
+    finished = ["succeeded", "skipped", "failed", "canceled"]
 
-    while True:
-        for build_id in watched.copy():
-            if hasattr(munches[build_id], "__proxy__"):
-                proxy = munches[build_id].__proxy__
-            else:
-                proxy = waitable.__proxy__
+    def _update(proxy, build_id, state):
+        # Ask for the full build information only when the build finishes,
+        # return True if anything changed
+        if state in [None] + finished:
             build = munches[build_id] = proxy.get(build_id)
+            state = build.state
+        elif state != munches[build_id].state:
+            munches[build_id] = Munch(munches[build_id], state=state)
+        else:
+            return False
+
+        if state in finished:
+            watched.remove(build_id)
+        if state == "unknown":
+            raise CoprException("Unknown status.")
+        return True
+
+    def _check_timeout():
+        if timeout and time.time() >= terminate:
+            raise CoprException("Timeouted")
+
+    if events and len(proxies) == 1:
+        proxy = list(proxies)[0]
+        try:
+            while watched:
+                _check_timeout()
+                stream = proxy.get_events(
+                    build_ids=sorted(watched),
+                    timeout=terminate - time.time() if timeout else None)
+                try:
+                    for event in stream:
+                        if event.chroot is not None or event.build_id not in watched:
+                            continue
+                        if _update(proxy, event.build_id, event.state) and callback:
+                            callback(list(munches.values()))
+                        if not watched:
+                            break
+                finally:
+                    stream.close()
+            return list(munches.values())
+        except (CoprNoResultException, CoprRequestException, CoprAuthException):
+            # Frontend without the events API, no free stream, not
+            # authenticated, or the stream broke
+            pass
+
+    while True:
+        for proxy, build_ids in proxies.items():
+            build_ids = [build_id for build_id in build_ids if build_id in watched]
+            if not build_ids:
+                continue
 
-            if build.state in ["failed"]:
-                failed.append(build_id)
-            if build.state in ["succeeded", "skipped", "failed", "canceled"]:
-                watched.remove(build_id)
-            if build.state == "unknown":
-                raise CoprException("Unknown status.")
+            # Ask for all the states at once
+            states = dict((build.id, build.state)
+                          for build in proxy.get_states(build_ids))
+            for build_id in build_ids:
+                _update(proxy, build_id, states.get(build_id))
 
         if callback:
             callback(list(munches.values()))
         if not watched:
             break
-        if timeout and time.time() >= terminate:
-            raise CoprException("Timeouted")
+        _check_timeout()
         time.sleep(interval)
     return list(munches.values())
 
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 
 import requests
+from .helpers import List
 from .requests import munchify
 
 try:
@@ -14,10 +15,17 @@ except ImportError:
 def next_page(objects):
     request = objects.__response__.request
 
-    # Add offset to the previous request URL
+    # Add cursor (or offset, for older servers) to the previous request URL
     url_parts = list(urlparse.urlparse(request.url))
     query = dict(urlparse.parse_qsl(url_parts[4]))
-    query.update({"offset": objects.meta.offset + objects.meta.limit})
+    if "next" in objects.meta:
+        if not objects.meta.next:
+            # this was the last page
+            return List([], meta=objects.meta, response=objects.__response__)
+        query.pop("offset", None)
+        query.update({"cursor": objects.meta.next})
+    else:
+        query.update({"offset": objects.meta.offset + objects.meta.limit})
     url_parts[4] = urlencode(query)
     request.url = urlparse.urlunparse(url_parts)
 
@@ -1,10 +1,23 @@
 from __future__ import absolute_import
 
 import os
+import json
+import time
+import requests
+from munch import Munch
+from future.utils import raise_from
 from . import BaseProxy
 from ..requests import FileRequest, munchify, POST
-from ..exceptions import CoprValidationException
-from ..helpers import for_all_methods, bind_proxy
+from ..exceptions import (CoprValidationException, CoprNoResultException,
+                          CoprRequestException)
+from ..helpers import for_all_methods, bind_proxy, List
+
+
+# How many builds we ask for in one get_states() request
+BUILD_STATES_CHUNK = 200
+
+# How many seconds we wait for the next event (or keep-alive) in get_events()
+BUILD_EVENTS_READ_TIMEOUT = 60
 
 
 @for_all_methods(bind_proxy)
@@ -20,6 +33,85 @@ class BuildProxy(BaseProxy):
         response = self.request.send(endpoint=endpoint)
         return munchify(response)
 
+    def get_states(self, build_ids, chroots=False):
+        """
+        Return the states of many builds at once, using as few requests as
+        possible.  The non-existing builds are omitted.
+
+        :param list build_ids:
+        :param bool chroots: include also the {chroot_name: state} dicts
+        :return: List of Munches with the id, state (and chroots) fields
+        """
+        build_ids = sorted(build_ids)
+        endpoint = "/build/states"
+        items = []
+        response = None
+        for start in range(0, len(build_ids), BUILD_STATES_CHUNK):
+            chunk = build_ids[start:start + BUILD_STATES_CHUNK]
+            params = {
+                "build_ids": ",".join(str(build_id) for build_id in chunk),
+                "chroots": chroots,
+            }
+            try:
+                response = self.request.send(endpoint=endpoint, params=params)
+            except CoprNoResultException:
+                # Frontend without the /build/states/ API
+                return List([self.get(build_id) for build_id in build_ids])
+            items.extend(munchify(response))
+        return List(items, response=response)
+
+    def get_events(self, build_ids=None, ownername=None, projectname=None,
+                   username=None, timeout=None):
+        """
+        Generate the build state changes as they happen, for the given builds,
+        for the builds in the given project, or for the builds submitted by
+        the given user.  For the build_ids, the current states are generated
+        first.  This keeps one connection open, instead of polling.  Only
+        for the authenticated users, and the frontend limits the number of
+        open streams per user.
+
+        :param list build_ids:
+        :param str ownername:
+        :param str projectname:
+        :param str username:
+        :param int timeout: stop generating after this many seconds
+        :return: generator of Munches with the build_id, chroot and state
+            fields; the chroot is None for the build state
+        """
+        endpoint = "/build/events"
+        data = {
+            "build_ids": sorted(build_ids or []),
+            "ownername": ownername,
+            "projectname": projectname,
+            "username": username,
+        }
+        deadline = time.time() + timeout if timeout else None
+        response = self.request.send_stream(
+            endpoint=endpoint, method=POST, data=data, auth=self.auth,
+            timeout=BUILD_EVENTS_READ_TIMEOUT)
+        response.encoding = "utf-8"
+        # With the chunked transfer encoding, the chunks (events) are read as
+        # they come.  Otherwise (e.g. through HTTP/1.0 proxies), any larger
+        # read would block until enough data arrives.
+        chunk_size = None if getattr(response.raw, "chunked", False) else 1
+        try:
+            lines = []
+            for line in response.iter_lines(chunk_size=chunk_size,
+                                            decode_unicode=True):
+                if line.startswith("data:"):
+                    lines.append(line[len("data:"):].strip())
+                elif not line and lines:
+                    yield Munch(json.loads("\n".join(lines)))
+                    lines = []
+                # the server sends keep-alive comments, so we get here often
+                if deadline and time.time() >= deadline:
+                    return
+        except requests.exceptions.RequestException as ex:
+            raise_from(CoprRequestException(
+                "Build events stream failed: {0}".format(ex)), ex)
+        finally:
+            response.close()
+
     def get_source_chroot(self, build_id):
         """
         Return a source build
@@ -288,6 +380,31 @@ class BuildProxy(BaseProxy):
         }
         return self._create(endpoint, data, buildopts=buildopts)
 
+    def create_bulk(self, ownername, projectname, builds, buildopts=None,
+                    project_dirname=None):
+        """
+        Create many builds in one project by one request
+
+        :param str ownername:
+        :param str projectname:
+        :param list builds: dicts with the "source_type" ("url", "scm",
+            "distgit", "pypi", "rubygems" or "custom") and the fields of the
+            corresponding create_from_* request, e.g.
+            {"source_type": "scm", "clone_url": "https://..."}
+        :param buildopts: http://python-copr.readthedocs.io/en/latest/client_v3/build_options.html
+            (shared by all the builds)
+        :param str project_dirname:
+        :return: Munch with the list of new "builds" IDs
+        """
+        endpoint = "/build/create/bulk"
+        data = {
+            "ownername": ownername,
+            "projectname": projectname,
+            "builds": builds,
+            "project_dirname": project_dirname,
+        }
+        return self._create(endpoint, data, buildopts=buildopts)
+
     def _create(self, endpoint, data, files=None, buildopts=None):
         data = data.copy()
 
@@ -3,6 +3,7 @@ from __future__ import absolute_import
 import os
 import json
 import time
+from collections import OrderedDict
 import requests
 import requests_gssapi
 from copr.v3.helpers import List
@@ -16,6 +17,9 @@ GET = "GET"
 POST = "POST"
 PUT = "PUT"
 
+# How many GET responses with ETag we remember, see Request.send()
+ETAG_CACHE_SIZE = 100
+
 
 class Request(object):
     # This should be a replacement of the _fetch method from APIv1
@@ -31,6 +35,9 @@ class Request(object):
         """
         self.api_base_url = api_base_url
         self.connection_attempts = connection_attempts
+        # {url: response}, the recent GET responses with ETag.  Not shared
+        # among the Request instances (e.g. clients with different credentials).
+        self.etag_cache = OrderedDict()
 
     def endpoint_url(self, endpoint, params=None):
         params = params or {}
@@ -43,11 +50,60 @@ class Request(object):
         request_params = self._request_params(
             endpoint, method, data, params, headers, auth)
 
+        cache_key = None
+        cached = None
+        if request_params["method"] == GET:
+            cache_key = requests.Request(
+                GET, request_params["url"],
+                params=request_params["params"]).prepare().url
+            cached = self.etag_cache.get(cache_key)
+            if cached is not None:
+                request_params["headers"] = dict(
+                    request_params["headers"] or {},
+                    **{"If-None-Match": cached.headers["ETag"]})
+
         response = self._send_request_repeatedly(request_params, auth)
+        if response.status_code == 304 and cached is not None:
+            response = cached
 
         handle_errors(response)
+        if cache_key:
+            self._remember(cache_key, response)
         return response
 
+    def send_stream(self, endpoint, method=GET, data=None, params=None,
+                    auth=None, timeout=None):
+        """
+        Like send(), but don't download the response body, e.g. for the
+        never-ending Server-Sent Events streams.  The caller should close() the
+        returned response.
+
+        :param timeout: seconds to wait for the next chunk of the body
+        """
+        request_params = self._request_params(
+            endpoint, method, data, params, None, auth)
+        request_params["stream"] = True
+        request_params["timeout"] = timeout
+        response = self._send_request_repeatedly(request_params, auth)
+        if response.status_code != 200:
+            handle_errors(response)
+            raise CoprRequestException(
+                "Unexpected response status {0}".format(response.status_code),
+                response=response)
+        return response
+
+    def _remember(self, cache_key, response):
+        """
+        Remember the GET response, so we can ask only for a changed data next
+        time (conditional GET)
+        """
+        self.etag_cache.pop(cache_key, None)
+        if response.status_code != 200 or "ETag" not in response.headers:
+            return
+        self.etag_cache[cache_key] = response
+        while len(self.etag_cache) > ETAG_CACHE_SIZE:
+            self.etag_cache.popitem(last=False)
+
     def _send_request_repeatedly(self, request_params, auth):
         """
         Repeat the request until it succeeds, or connection retry reaches its limit.